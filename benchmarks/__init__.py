@@ -0,0 +1,4 @@
+"""
+`benchmarks` package: Standalone performance benchmarks. Not part of the test suite.
+Run from the root of the project, for example: `poetry run python -m benchmarks.access_check`.
+"""
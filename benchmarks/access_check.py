@@ -0,0 +1,29 @@
+"""
+`benchmarks.access_check` module: Latency of authenticated requests, with and without the
+verified access keys cache (see utils.access_check).
+
+Usage: `poetry run python -m benchmarks.access_check`
+"""
+from .common import throwaway_app, create_access_key, timed, report
+
+RUNS = 50
+
+
+def run() -> None:
+    """Times `RUNS` authenticated [GET] /capture/<id_capture> calls, with cache off then on."""
+    with throwaway_app() as app:
+        client = app.test_client()
+        key = create_access_key(app)
+        headers = {"Access-Key": key}
+
+        response = client.post("/capture", headers=headers, json={"url": "https://example.com"})
+        id_capture = response.get_json()["id_capture"]
+
+        for cache_size in [0, 1024]:
+            app.config["ACCESS_KEY_CACHE_SIZE"] = cache_size
+            timings = timed(lambda: client.get(f"/capture/{id_capture}", headers=headers), RUNS)
+            report(f"GET /capture/<id> (cache size: {cache_size})", timings)
+
+
+if __name__ == "__main__":
+    run()
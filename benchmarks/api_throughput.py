@@ -0,0 +1,91 @@
+"""
+`benchmarks.api_throughput` module: API read throughput while capture processes write to the
+database concurrently, using SQLite's default journal mode and the DATABASE_PRAGMAS from config.
+
+Usage: `poetry run python -m benchmarks.api_throughput`
+"""
+import time
+import multiprocessing
+
+from .common import throwaway_app, create_access_key, report
+
+WORKERS = 6
+
+DURATION = 5
+""" For how long should the API be queried, in seconds. """
+
+LOGS = "x" * 256 * 1024
+""" Stand-in for Scoop logs stored with each capture. """
+
+
+def worker(id_access_key: int, stop) -> None:
+    """Simulated capture process: requests, claims and completes captures in a loop."""
+    from scoop_witness_api.models import Capture, CaptureDetail
+
+    while not stop.is_set():
+        Capture.create(url="https://example.com", id_access_key=id_access_key)
+        capture = Capture.claim_next()
+
+        if capture:
+            capture.status = "success"
+            capture.save()
+            CaptureDetail.replace(id_capture=capture.id_capture, stdout_logs=LOGS).execute()
+
+
+def scenario(label: str, pragmas: dict) -> None:
+    """Queries [GET] /capture/<id_capture> for DURATION seconds while WORKERS processes write."""
+    with throwaway_app({"DATABASE_PRAGMAS": pragmas}) as app:
+        from scoop_witness_api.models import AccessKey
+        from scoop_witness_api.utils import get_db
+
+        client = app.test_client()
+        headers = {"Access-Key": create_access_key(app)}
+        id_access_key = AccessKey.select().get().id_access_key
+        context = multiprocessing.get_context("fork")
+        stop = context.Event()
+
+        response = client.post("/capture", headers=headers, json={"url": "https://example.com"})
+        id_capture = response.get_json()["id_capture"]
+
+        get_db().close()  # Connections must not be shared with forked workers
+        workers = [
+            context.Process(target=worker, args=(id_access_key, stop)) for i in range(WORKERS)
+        ]
+
+        for process in workers:
+            process.start()
+
+        timings = []
+        errors = 0
+        until = time.perf_counter() + DURATION
+
+        while time.perf_counter() < until:
+            before = time.perf_counter()
+            response = client.get(f"/capture/{id_capture}", headers=headers)
+            timings.append((time.perf_counter() - before) * 1000)
+
+            if response.status_code != 200:
+                errors += 1
+
+        stop.set()
+
+        for process in workers:
+            process.join()
+
+        report(f"{label} ({len(timings) / DURATION:.0f} req/s, {errors} errors)", timings)
+
+
+def run() -> None:
+    """Runs each scenario in a fresh interpreter: models are bound to the database on import."""
+    from scoop_witness_api.config import DATABASE_PRAGMAS
+
+    context = multiprocessing.get_context("spawn")
+
+    for label, pragmas in [("Default journal", {}), ("DATABASE_PRAGMAS", DATABASE_PRAGMAS)]:
+        process = context.Process(target=scenario, args=(label, pragmas))
+        process.start()
+        process.join()
+
+
+if __name__ == "__main__":
+    run()
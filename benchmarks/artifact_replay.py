@@ -0,0 +1,97 @@
+"""
+`benchmarks.artifact_replay` module: Latency of [GET] /artifact for the request pattern of a
+replay session (i.e. replayweb.page reading a WACZ file).
+
+A session reads the end of the archive (zip directory), a few index blocks, then many small
+records at random offsets. A second visit revalidates the same requests with If-None-Match.
+Compares the artifact lookups cache off and on (see ARTIFACTS_CACHE_SIZE).
+
+Usage: `poetry run python -m benchmarks.artifact_replay`
+"""
+import os
+import random
+
+from .common import throwaway_app, create_access_key, timed, report
+
+ARCHIVE_SIZE = 32 * 1024 * 1024
+
+INDEX_READS = 10
+""" Index blocks of 16 KiB read at the beginning of a session. """
+
+RECORD_READS = 500
+""" Records of 2 to 32 KiB read during a session. """
+
+
+def run() -> None:
+    """Replays a session against a `ARCHIVE_SIZE` bytes archive, with cache off then on."""
+    with throwaway_app() as app:
+        from scoop_witness_api.models import Artifact
+
+        client = app.test_client()
+        headers = {"Access-Key": create_access_key(app)}
+
+        response = client.post("/capture", headers=headers, json={"url": "https://example.com"})
+        id_capture = response.get_json()["id_capture"]
+        url = f"/artifact/{id_capture}/archive.wacz"
+
+        storage_path = os.path.join(app.config["TEMPORARY_STORAGE_PATH"], id_capture)
+        os.makedirs(storage_path)
+        filepath = os.path.join(storage_path, "archive.wacz")
+
+        with open(filepath, "wb") as file:
+            file.write(os.urandom(ARCHIVE_SIZE))
+
+        Artifact.create(id_capture=id_capture, **Artifact.describe_file(filepath))
+        etag = client.get(url, headers={"Range": "bytes=0-0"}).headers["ETag"]
+
+        random.seed(0)
+        index_ranges = [
+            f"bytes={start}-{start + 16 * 1024 - 1}"
+            for start in range(0, INDEX_READS * 16 * 1024, 16 * 1024)
+        ]
+        record_ranges = []
+
+        for i in range(0, RECORD_READS):
+            start = random.randrange(0, ARCHIVE_SIZE - 32 * 1024)
+            record_ranges.append(f"bytes={start}-{start + random.randint(2, 32) * 1024 - 1}")
+
+        def get(range_header: str, if_none_match: str = None):
+            request_headers = {"Range": range_header}
+
+            if if_none_match:
+                request_headers["If-None-Match"] = if_none_match
+
+            response = client.get(url, headers=request_headers)
+            response.get_data()
+            response.close()
+
+        for cache_size in [0, 4096]:
+            app.config["ARTIFACTS_CACHE_SIZE"] = cache_size
+            label = f"(cache size: {cache_size})"
+
+            report(f"Zip directory {label}", timed(lambda: get("bytes=-65536"), 50))
+            report(
+                f"Index blocks {label}",
+                timed(lambda: get(random.choice(index_ranges)), INDEX_READS * 10),
+            )
+            report(
+                f"Records {label}", timed(lambda: get(random.choice(record_ranges)), RECORD_READS)
+            )
+            report(
+                f"Records, 4 at once {label}",
+                timed(
+                    lambda: get(
+                        "bytes="
+                        + ",".join(r.split("=")[1] for r in random.sample(record_ranges, 4))
+                    ),
+                    RECORD_READS // 4,
+                ),
+            )
+            report(
+                f"Revalidation {label}",
+                timed(lambda: get(random.choice(record_ranges), etag), RECORD_READS),
+            )
+
+
+if __name__ == "__main__":
+    run()
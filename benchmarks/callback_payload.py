@@ -0,0 +1,100 @@
+"""
+`benchmarks.callback_payload` module: Cost of preparing a callback request for a completed capture,
+up to the bytes handed to the HTTP client.
+
+Compares:
+- Round trip: jsonify(), decode and parse the result, then let requests serialize it again.
+- utils.capture_to_json: serialize once, send as-is.
+
+Usage: `poetry run python -m benchmarks.callback_payload`
+"""
+import json
+
+import requests
+from flask import jsonify
+
+from .common import throwaway_app, create_access_key, timed, report
+
+RUNS = 2000
+
+ATTACHMENTS = 12
+""" Number of artifacts listed in the payload, in addition to the archive. """
+
+CALLBACK_URL = "https://example.com/callback"
+
+
+def run() -> None:
+    """Times `RUNS` callback preparations for a successful capture, with logs exposed."""
+    with throwaway_app({"EXPOSE_SCOOP_LOGS": True}) as app:
+        from scoop_witness_api.models import Capture, CaptureDetail, Artifact
+        from scoop_witness_api.utils import capture_to_dict, capture_to_json
+
+        client = app.test_client()
+        headers = {"Access-Key": create_access_key(app)}
+        body = {"url": "https://example.com", "callback_url": CALLBACK_URL}
+
+        response = client.post("/capture", headers=headers, json=body)
+        capture = Capture.get_by_id(response.get_json()["id_capture"])
+        capture.status = "success"
+        capture.save()
+
+        CaptureDetail.create(
+            id_capture=capture.id_capture,
+            stdout_logs="x" * 64 * 1024,
+            stderr_logs="",
+            summary={"attachments": {"screenshot": "screenshot.png"}},
+        )
+
+        for filename in ["archive.wacz"] + [f"attachment-{i}.png" for i in range(ATTACHMENTS)]:
+            Artifact.create(
+                id_capture=capture.id_capture,
+                filename=filename,
+                size=0,
+                sha256="e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+                content_type="application/octet-stream",
+            )
+
+        def round_trip():
+            json_data = json.loads(jsonify(capture_to_dict(capture)).data.decode("utf-8"))
+            return requests.Request("POST", CALLBACK_URL, json=json_data).prepare()
+
+        def serialize_once():
+            return requests.Request(
+                "POST",
+                CALLBACK_URL,
+                data=capture_to_json(capture),
+                headers={"Content-Type": "application/json"},
+            ).prepare()
+
+        # Both include capture_to_dict()'s queries: time serialization alone as well.
+        capture_dict = capture_to_dict(capture)
+
+        report("Round trip", timed(round_trip, RUNS))
+        report("Serialize once", timed(serialize_once, RUNS))
+        report(
+            "Round trip (serialization only)",
+            timed(
+                lambda: requests.Request(
+                    "POST",
+                    CALLBACK_URL,
+                    json=json.loads(jsonify(capture_dict).data.decode("utf-8")),
+                ).prepare(),
+                RUNS,
+            ),
+        )
+        report(
+            "Serialize once (serialization only)",
+            timed(
+                lambda: requests.Request(
+                    "POST",
+                    CALLBACK_URL,
+                    data=app.json.dumps(capture_dict).encode("utf-8"),
+                    headers={"Content-Type": "application/json"},
+                ).prepare(),
+                RUNS,
+            ),
+        )
+
+
+if __name__ == "__main__":
+    run()
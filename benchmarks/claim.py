@@ -0,0 +1,130 @@
+"""
+`benchmarks.claim` module: Contention between parallel capture processes claiming captures from
+the queue. Compares the legacy "SELECT then conditional UPDATE" approach with Capture.claim_next.
+
+Usage: `poetry run python -m benchmarks.claim`
+"""
+import time
+import datetime
+import multiprocessing
+
+import peewee
+
+from .common import throwaway_app, create_access_key
+
+WORKERS = 6
+
+CAPTURES = 600
+
+
+def legacy_claim():
+    """
+    Claims a capture the way start-capture-process used to.
+    Returns a (capture, wasted) tuple.
+    """
+    from scoop_witness_api.models import Capture
+
+    captures = (
+        Capture.select()
+        .where(Capture.status == "pending")
+        .order_by("created_timestamp")
+        .paginate(1, 1)
+    )
+
+    if not len(captures):
+        return (None, False)
+
+    capture = captures[0]
+
+    update_count = (
+        Capture.update(status="started")
+        .where(Capture.id_capture == capture.id_capture, Capture.status == "pending")
+        .execute()
+    )
+
+    if update_count < 1:
+        return (None, True)
+
+    capture = Capture.get(Capture.id_capture == capture.id_capture)
+    capture.started_timestamp = datetime.datetime.utcnow()
+    capture.save()
+
+    return (capture, False)
+
+
+def atomic_claim():
+    """
+    Claims a capture using Capture.claim_next.
+    Returns a (capture, wasted) tuple.
+    """
+    from scoop_witness_api.models import Capture
+
+    return (Capture.claim_next(), False)
+
+
+def worker(strategy: str) -> tuple:
+    """
+    Claims captures until the queue is empty.
+    Returns a (claims, wasted cycles) tuple.
+    Cycles interrupted by a locked database count as wasted.
+    """
+    from scoop_witness_api.models import Capture
+
+    claim = legacy_claim if strategy == "legacy" else atomic_claim
+    claims = 0
+    wasted = 0
+
+    while True:
+        try:
+            capture, was_wasted = claim()
+        except peewee.OperationalError:
+            wasted += 1
+            continue
+
+        if capture:
+            claims += 1
+        elif was_wasted:
+            wasted += 1
+        elif not Capture.select().where(Capture.status == "pending").exists():
+            break
+
+    return (claims, wasted)
+
+
+def run() -> None:
+    """Runs WORKERS simulated capture processes against CAPTURES pending captures, per strategy."""
+    with throwaway_app() as app:
+        from scoop_witness_api.models import AccessKey, Capture
+        from scoop_witness_api.utils import get_db
+
+        create_access_key(app)
+        id_access_key = AccessKey.select().get().id_access_key
+
+        for strategy in ["legacy", "atomic"]:
+            Capture.delete().execute()
+            Capture.insert_many(
+                [{"url": "https://example.com", "id_access_key": id_access_key}] * CAPTURES
+            ).execute()
+
+            # Connections must not be shared with forked workers
+            get_db().close()
+
+            before = time.perf_counter()
+
+            with multiprocessing.get_context("fork").Pool(WORKERS) as pool:
+                results = pool.map(worker, [strategy] * WORKERS)
+
+            elapsed = time.perf_counter() - before
+            claims = sum([result[0] for result in results])
+            wasted = sum([result[1] for result in results])
+            double_claims = claims - Capture.select().where(Capture.status == "started").count()
+
+            print(
+                f"{strategy:<8} workers={WORKERS} claims={claims} "
+                f"claims/s={claims / elapsed:9.1f} wasted cycles={wasted} "
+                f"double claims={double_claims}"
+            )
+
+
+if __name__ == "__main__":
+    run()
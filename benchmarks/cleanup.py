@@ -0,0 +1,87 @@
+"""
+`benchmarks.cleanup` module: Cost of a `cleanup` run on a storage folder holding many captures,
+only a few of which are due for deletion.
+
+Compares the legacy approach (listing every folder under TEMPORARY_STORAGE_PATH, and checking its
+modification time) with `cleanup`, which only visits expired captures (see Capture.get_expired()).
+
+Usage: `poetry run python -m benchmarks.cleanup`
+"""
+import os
+import re
+import glob
+import uuid
+import datetime
+
+from .common import throwaway_app, create_access_key, timed, report
+
+CAPTURES = 20000
+""" Captures with a folder in storage. """
+
+EXPIRED_RATIO = 0.01
+""" Share of these captures that are due for deletion. """
+
+
+def legacy_scan(storage_path: str, expiration: int) -> int:
+    """
+    Lists expired capture folders the way `cleanup` used to: glob, regex match and stat every
+    entry of the storage folder. Returns how many were found (nothing is deleted).
+    """
+    expired = 0
+
+    for directory in glob.glob(f"{storage_path}{os.sep}*"):
+        if not re.search(
+            r"[a-z0-9]{8}-[a-z0-9]{4}-[a-z0-9]{4}-[a-z0-9]{4}-[a-z0-9]{12}$", directory
+        ):
+            continue
+
+        diff = datetime.datetime.now().timestamp() - os.stat(directory).st_mtime
+
+        if diff >= expiration:
+            expired += 1
+
+    return expired
+
+
+def run() -> None:
+    """Creates `CAPTURES` captures and folders, then times both approaches."""
+    with throwaway_app() as app:
+        from scoop_witness_api.models import AccessKey, Capture
+
+        create_access_key(app)
+        id_access_key = AccessKey.get().id_access_key
+        storage_path = app.config["TEMPORARY_STORAGE_PATH"]
+        expiration = int(app.config["TEMPORARY_STORAGE_EXPIRATION"])
+        runner = app.test_cli_runner()
+
+        now = datetime.datetime.utcnow()
+        past = now - datetime.timedelta(seconds=1)
+        future = now + datetime.timedelta(seconds=expiration)
+        rows = []
+
+        for i in range(0, CAPTURES):
+            id_capture = uuid.uuid4()
+            os.makedirs(f"{storage_path}{os.sep}{id_capture}{os.sep}attachments")
+            rows.append(
+                {
+                    "id_capture": id_capture,
+                    "id_access_key": id_access_key,
+                    "url": "https://example.com",
+                    "status": "success",
+                    "started_timestamp": now,
+                    "expires_timestamp": past if i < CAPTURES * EXPIRED_RATIO else future,
+                }
+            )
+
+        for i in range(0, CAPTURES, 500):
+            Capture.insert_many(rows[i : i + 500]).execute()  # noqa: E203
+
+        print(f"{CAPTURES} captures, {int(CAPTURES * EXPIRED_RATIO)} of which are due.")
+
+        report("Legacy scan (no deletion)", timed(lambda: legacy_scan(storage_path, 0), 5))
+        report("cleanup (deletion)", timed(lambda: runner.invoke(args="cleanup"), 1))
+        report("cleanup (nothing due)", timed(lambda: runner.invoke(args="cleanup"), 5))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,89 @@
+"""
+`benchmarks.common` module: Helpers shared across benchmarks.
+"""
+import os
+import uuid
+import time
+import statistics
+from contextlib import contextmanager
+from tempfile import TemporaryDirectory
+
+from scoop_witness_api import create_app
+
+
+@contextmanager
+def throwaway_app(config_override: dict = {}):
+    """
+    Creates an app instance backed by a temporary database and storage folder.
+    Mirrors the setup of the test suite (see conftest.py).
+    Models are bound to the database on first import: use once per process.
+    """
+    with TemporaryDirectory() as temporary_dir:
+        config = {
+            "DATABASE_PATH": os.path.join(temporary_dir, "database"),
+            "DATABASE_FILENAME": f"{uuid.uuid4()}.db",
+            "TEMPORARY_STORAGE_PATH": os.path.join(temporary_dir, "storage"),
+            "METRICS_API_PATH": os.path.join(temporary_dir, "metrics"),
+            **config_override,
+        }
+
+        app = create_app(config)
+
+        with app.app_context():
+            from scoop_witness_api.utils import get_db
+            from scoop_witness_api.models import (
+                AccessKey,
+                Capture,
+                Counter,
+                CaptureDetail,
+                CaptureTiming,
+                Artifact,
+                ArtifactBlob,
+                CallbackDelivery,
+            )
+
+            get_db().create_tables(
+                [
+                    AccessKey,
+                    Capture,
+                    Counter,
+                    CaptureDetail,
+                    CaptureTiming,
+                    Artifact,
+                    ArtifactBlob,
+                    CallbackDelivery,
+                ]
+            )
+
+            yield app
+
+
+def create_access_key(app) -> str:
+    """Creates an access key and returns its human-readable version."""
+    from scoop_witness_api.models import AccessKey
+
+    key, digest = AccessKey.create_key_digest(salt=app.config["ACCESS_KEY_SALT"])
+    AccessKey.create(label="Benchmark", key_digest=digest)
+    return key
+
+
+def timed(callable, runs: int) -> list:
+    """Runs `callable` `runs` times and returns individual timings, in milliseconds."""
+    timings = []
+
+    for i in range(0, runs):
+        before = time.perf_counter()
+        callable()
+        timings.append((time.perf_counter() - before) * 1000)
+
+    return timings
+
+
+def report(label: str, timings: list) -> None:
+    """Prints p50 / p99 / mean for a list of timings (in milliseconds)."""
+    timings = sorted(timings)
+    p50 = timings[int(len(timings) * 0.50)]
+    p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+    mean = statistics.mean(timings)
+
+    print(f"{label:<40} n={len(timings):<6} p50={p50:9.3f}ms p99={p99:9.3f}ms mean={mean:9.3f}ms")
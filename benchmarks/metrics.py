@@ -0,0 +1,58 @@
+"""
+`benchmarks.metrics` module: Overhead of recording metrics on hot paths (see utils.metrics).
+
+Compares [GET] /capture/<id_capture> and [GET] /artifact/<id_capture>/<filename> with metrics
+recorded, then with metric updates replaced by no-ops.
+
+Usage: `poetry run python -m benchmarks.metrics`
+"""
+import os
+
+from .common import throwaway_app, create_access_key, timed, report
+
+RUNS = 2000
+
+
+def run() -> None:
+    """Times `RUNS` calls to each route with metrics, a raw update, then routes without metrics."""
+    with throwaway_app() as app:
+        from scoop_witness_api.utils import metrics
+
+        client = app.test_client()
+        headers = {"Access-Key": create_access_key(app)}
+
+        response = client.post("/capture", headers=headers, json={"url": "https://example.com"})
+        id_capture = response.get_json()["id_capture"]
+
+        storage_path = os.path.join(app.config["TEMPORARY_STORAGE_PATH"], id_capture)
+        os.makedirs(storage_path)
+
+        with open(os.path.join(storage_path, "archive.wacz"), "wb") as file:
+            file.write(os.urandom(256 * 1024))
+
+        def capture_get():
+            return client.get(f"/capture/{id_capture}", headers=headers)
+
+        def artifact_get():
+            return client.get(f"/artifact/{id_capture}/archive.wacz").close()
+
+        report("GET /capture/<id> (metrics on)", timed(capture_get, RUNS))
+        report("GET /artifact/<id>/archive.wacz (metrics on)", timed(artifact_get, RUNS))
+        report(
+            "Histogram.observe()",
+            timed(lambda: metrics.API_REQUEST_DURATION.observe(0.02, route="/"), RUNS),
+        )
+
+        observe, inc = metrics.Histogram.observe, metrics.Counter.inc
+        metrics.Histogram.observe = lambda *args, **kwargs: None
+        metrics.Counter.inc = lambda *args, **kwargs: None
+
+        try:
+            report("GET /capture/<id> (metrics off)", timed(capture_get, RUNS))
+            report("GET /artifact/<id>/archive.wacz (metrics off)", timed(artifact_get, RUNS))
+        finally:
+            metrics.Histogram.observe, metrics.Counter.inc = observe, inc
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,85 @@
+"""
+`benchmarks.queue_wakeup` module: Enqueue-to-started latency with idle capture processes, comparing
+random sleep polling with FIFO-based wakeups (see utils.capture_queue_wakeup).
+
+Usage: `poetry run python -m benchmarks.queue_wakeup`
+"""
+import time
+import random
+import multiprocessing
+
+from .common import throwaway_app, create_access_key, report
+
+WORKERS = 6
+
+CAPTURES = 30
+
+INTERVAL = 0.2
+""" Time between two capture requests, in seconds. """
+
+
+def worker(app, strategy: str, stop) -> None:
+    """Simulated capture process: claims captures and completes them immediately."""
+    from scoop_witness_api.models import Capture
+    from scoop_witness_api.utils import wait_for_capture
+
+    with app.app_context():
+        while not stop.is_set():
+            capture = Capture.claim_next()
+
+            if capture:
+                Capture.update(status="success").where(
+                    Capture.id_capture == capture.id_capture
+                ).execute()
+            elif strategy == "sleep":
+                time.sleep(0.5 + random.random())
+            else:
+                wait_for_capture(1)
+
+
+def run() -> None:
+    """Requests CAPTURES captures, one every INTERVAL seconds, against WORKERS idle processes."""
+    with throwaway_app() as app:
+        from scoop_witness_api.models import Capture
+        from scoop_witness_api.utils import get_db
+
+        client = app.test_client()
+        headers = {"Access-Key": create_access_key(app)}
+        context = multiprocessing.get_context("fork")
+
+        for strategy in ["sleep", "fifo"]:
+            Capture.delete().execute()
+            stop = context.Event()
+
+            # Connections must not be shared with forked workers
+            get_db().close()
+
+            workers = [
+                context.Process(target=worker, args=(app, strategy, stop)) for i in range(WORKERS)
+            ]
+
+            for process in workers:
+                process.start()
+
+            time.sleep(2)  # Let workers go idle
+
+            for i in range(0, CAPTURES):
+                client.post("/capture", headers=headers, json={"url": "https://example.com"})
+                time.sleep(INTERVAL)
+
+            time.sleep(2)
+            stop.set()
+
+            for process in workers:
+                process.join()
+
+            timings = [
+                (capture.started_timestamp - capture.created_timestamp).total_seconds() * 1000
+                for capture in Capture.select().where(Capture.started_timestamp.is_null(False))
+            ]
+
+            report(f"Enqueue to started ({strategy})", timings)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,34 @@
+"""
+`benchmarks.scoop_launch` module: Overhead of starting Scoop, per SCOOP_LAUNCH_MODE.
+Times `scoop --version`, which covers process startup without launching a browser.
+Full captures log Scoop's wall time per capture (see start-capture-process).
+
+Usage: `poetry run python -m benchmarks.scoop_launch`
+"""
+import subprocess
+
+from .common import throwaway_app, timed, report
+
+RUNS = 10
+
+
+def run() -> None:
+    """Times RUNS `scoop --version` calls for each launch mode."""
+    with throwaway_app():
+        from scoop_witness_api.commands.start_capture_process import resolve_scoop_command
+
+        for launch_mode in ["npx", "direct"]:
+            try:
+                command = resolve_scoop_command(launch_mode) + ["--version"]
+                timings = timed(
+                    lambda: subprocess.run(command, capture_output=True, check=True), RUNS
+                )
+            except Exception as err:
+                print(f"scoop --version ({launch_mode}): skipped ({err})")
+                continue
+
+            report(f"scoop --version ({launch_mode})", timings)
+
+
+if __name__ == "__main__":
+    run()
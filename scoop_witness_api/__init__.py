@@ -2,8 +2,9 @@
 `scoop_witness_api` module: REST API for the `scoop-rest-api` project.
 """
 import os
+import time
 
-from flask import Flask
+from flask import Flask, g, request
 
 from scoop_witness_api import utils
 
@@ -30,6 +31,43 @@ def create_app(config_override: dict = {}):
         # Create directory for TEMPORARY_STORAGE_PATH if it does not exist
         os.makedirs(app.config["TEMPORARY_STORAGE_PATH"], exist_ok=True)
 
+        #
+        # Open a database connection for each request, close it once done.
+        # (See https://docs.peewee-orm.com/en/latest/peewee/database.html#flask)
+        #
+        @app.before_request
+        def db_connect():
+            utils.get_db().connect(reuse_if_open=True)
+
+        @app.teardown_request
+        def db_close(exception=None):
+            db = utils.get_db()
+
+            if not db.is_closed():
+                db.close()
+
+        #
+        # Time each request, by route (see utils.metrics)
+        #
+        @app.before_request
+        def request_timer_start():
+            g.request_start = time.perf_counter()
+
+        @app.after_request
+        def request_timer_stop(response):
+            if "request_start" in g:
+                utils.metrics.API_REQUEST_DURATION.observe(
+                    time.perf_counter() - g.request_start,
+                    route=request.url_rule.rule if request.url_rule else "",
+                    method=request.method,
+                    status=response.status_code,
+                )
+
+            # Share this process' metrics with the others (at most every few seconds)
+            utils.metrics.export_snapshot()
+
+            return response
+
         #
         # Import views
         #
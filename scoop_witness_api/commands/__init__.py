@@ -10,3 +10,7 @@ from .start_capture_process import start_capture_process
 from .start_parallel_capture_processes import start_parallel_capture_processes
 from .cleanup import cleanup
 from .inspect_capture import inspect_capture
+from .deliver_callbacks import deliver_callbacks
+from .migrate_capture_details import migrate_capture_details
+from .migrate_capture_expiration import migrate_capture_expiration
+from .capture_timings import capture_timings
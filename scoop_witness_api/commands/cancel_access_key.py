@@ -1,8 +1,6 @@
 """
 `commands.cancel_access_key` module: Controller for the `cancel-access-key` CLI command.
 """
-import datetime
-
 import click
 from flask import current_app
 
@@ -30,7 +28,6 @@ def cancel_access_key(id_access_key: int) -> None:
     if access_key.canceled_timestamp:
         click.echo(f"access key #{id_access_key} has already been canceled.")
 
-    access_key.canceled_timestamp = datetime.datetime.utcnow()
-    access_key.save()
+    access_key.cancel()
 
     click.echo(f"access key #{id_access_key} canceled.")
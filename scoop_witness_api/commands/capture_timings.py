@@ -0,0 +1,116 @@
+"""
+`commands.capture_timings` module: Controller for the `capture-timings` CLI command.
+"""
+import re
+import math
+import datetime
+
+import click
+from flask import current_app
+
+SINCE_UNITS = {"m": 60, "h": 60 * 60, "d": 60 * 60 * 24}
+""" Units accepted by --since for relative durations, in seconds. """
+
+PERCENTILES = [50, 90, 99]
+
+
+@current_app.cli.command("capture-timings")
+@click.option(
+    "--since",
+    required=False,
+    default="24h",
+    help="Only include captures created since then. Duration (30m, 24h, 7d) or ISO 8601 date.",
+)
+def capture_timings(since: str) -> None:
+    """
+    Prints percentiles of the time spent in each phase of the captures created since --since.
+    Phases are listed in chronological order (see models.CaptureTiming).
+    "callback_time" goes from completion to callback delivery (see models.CallbackDelivery).
+    """
+    from ..models import Capture, CaptureTiming, CallbackDelivery
+
+    try:
+        since_timestamp = parse_since(since)
+    except ValueError:
+        click.echo("--since must be a duration (30m, 24h, 7d) or an ISO 8601 date.")
+        exit(1)
+
+    timings = {phase: [] for phase in CaptureTiming.PHASES + ["callback_time"]}
+
+    query = (
+        CaptureTiming.select(*[getattr(CaptureTiming, phase) for phase in CaptureTiming.PHASES])
+        .join(Capture)
+        .where(Capture.created_timestamp >= since_timestamp)
+        .tuples()
+    )
+
+    for row in query:
+        for phase, value in zip(CaptureTiming.PHASES, row):
+            if value is not None:
+                timings[phase].append(value)
+
+    query = (
+        CallbackDelivery.select(CallbackDelivery.delivered_timestamp, Capture.ended_timestamp)
+        .join(Capture)
+        .where(
+            Capture.created_timestamp >= since_timestamp,
+            CallbackDelivery.status == "delivered",
+        )
+        .tuples()
+    )
+
+    for delivered_timestamp, ended_timestamp in query:
+        timings["callback_time"].append((delivered_timestamp - ended_timestamp).total_seconds())
+
+    #
+    # Report
+    #
+    click.echo(80 * "-")
+    click.echo(f"Capture timings since {since_timestamp.isoformat()} UTC (in seconds):")
+    click.echo(80 * "-")
+
+    header = f"{'phase':<20} {'count':>7}"
+    header += "".join(f" {'p' + str(percentile):>9}" for percentile in PERCENTILES)
+    header += f" {'max':>9}"
+    click.echo(header)
+
+    for phase, values in timings.items():
+        output = f"{phase:<20} {len(values):>7}"
+
+        if not values:
+            click.echo(output)
+            continue
+
+        values.sort()
+
+        for percentile in PERCENTILES:
+            output += f" {get_percentile(values, percentile):>9.3f}"
+
+        output += f" {values[-1]:>9.3f}"
+        click.echo(output)
+
+
+def parse_since(since: str) -> datetime.datetime:
+    """
+    Returns the UTC date --since designates, either as a duration ago (30m, 24h, 7d) or an
+    ISO 8601 date. Raises ValueError if `since` is neither.
+    """
+    match = re.match(r"^(\d+)([mhd])$", since.strip())
+
+    if match:
+        seconds = int(match.group(1)) * SINCE_UNITS[match.group(2)]
+        return datetime.datetime.utcnow() - datetime.timedelta(seconds=seconds)
+
+    since_timestamp = datetime.datetime.fromisoformat(since.strip())
+
+    # Aware dates are converted to UTC, naive dates are assumed to be UTC already
+    if since_timestamp.tzinfo:
+        since_timestamp = since_timestamp.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+    return since_timestamp
+
+
+def get_percentile(sorted_values: list, percentile: int) -> float:
+    """Returns the `percentile`-th percentile of a sorted list, using the nearest-rank method."""
+    rank = math.ceil(percentile / 100 * len(sorted_values))
+    return sorted_values[max(rank, 1) - 1]
@@ -2,49 +2,162 @@
 `commands.cleanup` module: Controller for the `cleanup` CLI command.
 """
 import os
-import glob
-import re
 import datetime
 import shutil
+import traceback
+from concurrent.futures import ThreadPoolExecutor
 
 import click
 from flask import current_app
 
+from ..utils import delete_blob, get_storage
+
 
 @current_app.cli.command("cleanup")
-def cleanup() -> None:
+@click.option(
+    "--batch-size",
+    required=False,
+    default=None,
+    type=int,
+    help="How many expired captures to process at once. Defaults to CLEANUP_BATCH_SIZE.",
+)
+def cleanup(batch_size=None) -> None:
     """
     Clears temporarily storage of expired files.
+
+    Only captures that are due are visited, in order of expiration, in batches of
+    CLEANUP_BATCH_SIZE (see Capture.get_expired()). Files are deleted by up to CLEANUP_CONCURRENCY
+    threads, after which captures are marked as purged and stop advertising their artifacts.
+    Purged captures are never visited again: an interrupted run is picked up where it left off.
+    Captures whose files could not be deleted are retried on the next run.
+
+    Artifacts are removed from storage as well if they are not stored locally (see STORAGE_BACKEND).
+    Blobs of the content-addressed store are removed once no capture references them anymore.
+    References are released for artifacts recorded as deduplicated (see models.Artifact).
     """
+    from ..models import Capture, Artifact, ArtifactBlob
+
+    TEMPORARY_STORAGE_EXPIRATION = int(current_app.config["TEMPORARY_STORAGE_EXPIRATION"])
+    CLEANUP_CONCURRENCY = int(current_app.config["CLEANUP_CONCURRENCY"])
+    batch_size = batch_size if batch_size else int(current_app.config["CLEANUP_BATCH_SIZE"])
+
+    app = current_app._get_current_object()
+    storage = get_storage()
+    executor = ThreadPoolExecutor(max_workers=CLEANUP_CONCURRENCY)
+    purged_total = 0
+    failed_total = 0
+
     #
-    # API temporary storage folder
+    # API temporary storage folder: captures that are due, batch by batch
     #
-    TEMPORARY_STORAGE_PATH = current_app.config["TEMPORARY_STORAGE_PATH"]
-    TEMPORARY_STORAGE_EXPIRATION = int(current_app.config["TEMPORARY_STORAGE_EXPIRATION"])
+    try:
+        captures = Capture.get_expired(batch_size)
 
-    for directory in glob.glob(f"{TEMPORARY_STORAGE_PATH}{os.sep}*"):
-        # Directory must be a UUID
-        if not re.search(
-            r"[a-z0-9]{8}-[a-z0-9]{4}-[a-z0-9]{4}-[a-z0-9]{4}-[a-z0-9]{12}$", directory
-        ):
-            continue
+        while captures:
+            # Pull artifacts filenames for the entire batch at once
+            artifacts = {}
+            query = (
+                Artifact.select(
+                    Artifact.id_capture,
+                    Artifact.filename,
+                    Artifact.sha256,
+                    Artifact.deduplicated,
+                )
+                .where(Artifact.id_capture.in_([capture.id_capture for capture in captures]))
+                .tuples()
+            )
 
-        # Directory must have been created more than TEMPORARY_STORAGE_EXPIRATION seconds ago
-        diff = datetime.datetime.now().timestamp() - os.stat(directory).st_mtime
+            for id_capture, filename, sha256, deduplicated in query:
+                artifacts.setdefault(str(id_capture), []).append((filename, sha256, deduplicated))
 
-        if diff >= TEMPORARY_STORAGE_EXPIRATION:
-            click.echo(f"{directory} has expired and will be deleted")
-            shutil.rmtree(directory)
+            # Files are deleted in parallel, database updates happen here.
+            results = executor.map(
+                lambda capture: delete_capture_files_in_app_context(
+                    app, storage, capture.id_capture, artifacts.get(str(capture.id_capture), [])
+                ),
+                captures,
+            )
+
+            purged = []
+            blobs = []
+
+            for capture, result in zip(captures, results):
+                if result is None:
+                    failed_total += 1
+                    continue
+
+                purged.append(capture.id_capture)
+                blobs += result
+
+            with Capture._meta.database.atomic():
+                if purged:
+                    Capture.update(purged=True).where(Capture.id_capture.in_(purged)).execute()
+
+                ArtifactBlob.remove_references(blobs)
+
+            purged_total += len(purged)
+            captures = Capture.get_expired(batch_size, after=captures[-1])
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+    click.echo(f"{purged_total} expired capture(s) purged, {failed_total} to be retried.")
+
+    #
+    # Content-addressed store: blobs no capture is linked to anymore.
+    # A blob referenced again while it is being deleted is left alone (see delete_blob()).
+    #
+    for sha256 in ArtifactBlob.get_unreferenced():
+        if delete_blob(sha256, ArtifactBlob.delete_unreferenced):
+            click.echo(f"Blob {sha256} was no longer referenced and was deleted")
 
     #
     # Scoop's temporary folder, in case there are lingering files there.
+    # Scoop clears it after each capture: this folder only ever holds a few entries.
     #
     SCOOP_TMP_PATH = f"node_modules{os.sep}@harvard-lil{os.sep}scoop{os.sep}tmp"
+    now = datetime.datetime.now().timestamp()
+
+    try:
+        entries = list(os.scandir(SCOOP_TMP_PATH))
+    except FileNotFoundError:
+        entries = []
 
-    for directory in glob.glob(f"{SCOOP_TMP_PATH}{os.sep}*"):
+    for entry in entries:
         # Directory must have been created more than TEMPORARY_STORAGE_EXPIRATION seconds ago
-        diff = datetime.datetime.now().timestamp() - os.stat(directory).st_mtime
+        if entry.is_dir() and now - entry.stat().st_mtime >= TEMPORARY_STORAGE_EXPIRATION:
+            click.echo(f"{entry.path} has expired and will be deleted")
+            shutil.rmtree(entry.path, ignore_errors=True)
+
+
+def delete_capture_files_in_app_context(app, *args):
+    """Runs delete_capture_files() from a thread pool, within an app context."""
+    with app.app_context():
+        return delete_capture_files(*args)
 
-        if diff >= TEMPORARY_STORAGE_EXPIRATION:
-            click.echo(f"{directory} has expired and will be deleted")
+
+def delete_capture_files(storage, id_capture, artifacts: list):
+    """
+    Deletes the files of a given capture: its artifacts, from storage, and its temporary folder.
+    `artifacts` is a list of (filename, sha256, deduplicated) tuples, as listed in the artifacts
+    manifest.
+
+    Returns the list of blobs this capture references (see models.ArtifactBlob), or None if
+    files could not be deleted. Does not access the database: runs from a thread pool.
+    """
+    directory = f"{current_app.config['TEMPORARY_STORAGE_PATH']}{os.sep}{id_capture}"
+
+    try:
+        # Remote storage: artifacts go first. Folder is kept until they are gone.
+        storage.delete_artifacts(id_capture, [filename for filename, sha256, _ in artifacts])
+
+        try:
             shutil.rmtree(directory)
+        except FileNotFoundError:  # Nothing left to delete
+            pass
+    except Exception:
+        click.echo(f"{directory}: files could not be deleted, will retry")
+        click.echo(traceback.format_exc())  # Full trace should be in the logs
+        return None
+
+    click.echo(f"{directory} has expired and was deleted")
+    return [sha256 for filename, sha256, deduplicated in artifacts if deduplicated]
@@ -13,9 +13,29 @@ def create_tables() -> None:
     Initializes database for the Scoop REST API.
     Tables will be created only if they don't already exist.
     """
-    from ..models import AccessKey, Capture
+    from ..models import (
+        AccessKey,
+        Capture,
+        Counter,
+        CaptureDetail,
+        CaptureTiming,
+        Artifact,
+        ArtifactBlob,
+        CallbackDelivery,
+    )
 
     click.echo("Creating tables...")
-    get_db().create_tables([AccessKey, Capture])
+    get_db().create_tables(
+        [
+            AccessKey,
+            Capture,
+            Counter,
+            CaptureDetail,
+            CaptureTiming,
+            Artifact,
+            ArtifactBlob,
+            CallbackDelivery,
+        ]
+    )
     click.echo("Done.")
     exit(0)
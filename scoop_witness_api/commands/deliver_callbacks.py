@@ -0,0 +1,137 @@
+"""
+`commands.deliver_callbacks` module: Controller for the `deliver-callbacks` CLI command.
+"""
+import time
+import datetime
+import traceback
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import requests
+from requests.adapters import HTTPAdapter
+from flask import current_app
+
+from ..utils import metrics
+
+
+@current_app.cli.command("deliver-callbacks")
+@click.option("--single-run", is_flag=True, required=False, default=False)
+def deliver_callbacks(single_run=False) -> None:
+    """
+    Calls the webhooks queued by capture processes, up to CALLBACK_DELIVERY_CONCURRENCY at a time.
+    Failed deliveries are retried with exponential backoff, up to CALLBACK_DELIVERY_MAX_ATTEMPTS.
+    Runs in a loop unless interrupted. With "--single-run", stops once no delivery is due.
+
+    Metrics are written to METRICS_TEXTFILE_PATH/deliver-callbacks.prom.
+    """
+    from ..models import CallbackDelivery
+
+    CONCURRENCY = int(current_app.config["CALLBACK_DELIVERY_CONCURRENCY"])
+    TIMEOUT = int(current_app.config["CALLBACK_DELIVERY_TIMEOUT"])
+    MAX_ATTEMPTS = int(current_app.config["CALLBACK_DELIVERY_MAX_ATTEMPTS"])
+    BACKOFF = int(current_app.config["CALLBACK_DELIVERY_BACKOFF"])
+    POLL_INTERVAL = int(current_app.config["CALLBACK_DELIVERY_POLL_INTERVAL"])
+
+    # Connections are kept alive and reused across deliveries
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=CONCURRENCY, pool_maxsize=CONCURRENCY)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+
+    executor = ThreadPoolExecutor(max_workers=CONCURRENCY)
+
+    in_flight = {}
+    """ Deliveries being sent, by future. """
+
+    try:
+        while True:
+            metrics.export_textfile("deliver-callbacks")
+
+            # Workers pick up new deliveries as soon as they are free: slow callback URLs only
+            # hold up their own worker. Claimed deliveries can't be picked up by other senders
+            # until their attempt times out.
+            if len(in_flight) < CONCURRENCY:
+                for delivery in CallbackDelivery.claim_due(
+                    CONCURRENCY - len(in_flight), lease=TIMEOUT * 2
+                ):
+                    in_flight[executor.submit(send, session, delivery, TIMEOUT)] = delivery
+
+            if not in_flight:
+                if single_run:
+                    break
+
+                time.sleep(POLL_INTERVAL)
+                continue
+
+            # HTTP calls happen in parallel, database updates happen here.
+            done, _ = futures.wait(
+                in_flight.keys(), timeout=POLL_INTERVAL, return_when=futures.FIRST_COMPLETED
+            )
+
+            for future in done:
+                delivery = in_flight.pop(future)
+                error = future.result()
+
+                if error:
+                    delivery.mark_attempt_failed(error, MAX_ATTEMPTS, BACKOFF)
+                    metrics.CALLBACK_DELIVERIES.inc(
+                        outcome="failed" if delivery.status == "failed" else "retry"
+                    )
+                    click.echo(
+                        f"{log_prefix(delivery)} Attempt #{delivery.attempts} failed ({error}) - "
+                        f"{'giving up' if delivery.status == 'failed' else 'will retry'}"
+                    )
+                else:
+                    delivery.mark_delivered()
+                    metrics.CALLBACK_DELIVERIES.inc(outcome="delivered")
+                    click.echo(f"{log_prefix(delivery)} Delivered")
+    #
+    # Catch-all
+    #
+    except Exception:
+        click.echo(traceback.format_exc())  # Full trace should be in the logs
+    #
+    # Voluntary interruption
+    #
+    except:  # noqa: we can't intercept interrupt signals if we specify an exception type
+        click.echo("Operation aborted")
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        session.close()
+        metrics.export_textfile("deliver-callbacks", force=True)
+
+
+def send(session: requests.Session, delivery, timeout: int) -> str:
+    """
+    POSTs a delivery's payload to its callback URL.
+    Returns an error message if the call failed, an empty string otherwise.
+    """
+    start_time = time.perf_counter()
+    error = ""
+
+    try:
+        response = session.post(
+            delivery.callback_url,
+            data=delivery.payload,
+            headers={"Content-Type": "application/json"},
+            timeout=timeout,
+        )
+        response.raise_for_status()
+    except Exception as err:
+        error = str(err) or err.__class__.__name__
+
+    metrics.CALLBACK_DELIVERY_DURATION.observe(
+        time.perf_counter() - start_time,
+        result="error" if error else "delivered",
+    )
+
+    return error
+
+
+def log_prefix(delivery) -> str:
+    """
+    Returns a log prefix to be added at the beginning of each line.
+    """
+    timestamp = datetime.datetime.utcnow().isoformat(sep="T", timespec="auto")
+    return f"[{timestamp}] Callback #{delivery.id_callback_delivery} to {delivery.callback_url} |"
@@ -7,7 +7,8 @@ from flask import json
 import click
 from flask import current_app
 
-from ..models import Capture
+from ..models import Capture, CaptureDetail, CaptureTiming, Artifact
+from ..utils import read_scoop_logs
 
 
 @current_app.cli.command("inspect-capture")
@@ -30,22 +31,45 @@ def inspect_capture(id_capture: int) -> None:
         click.echo(f"Capture #{id_capture} could not be found.")
         exit(1)
 
+    # Heavy properties are stored separately, and only exist once a capture is complete
+    capture_detail = CaptureDetail.get_or_none(CaptureDetail.id_capture == capture.id_capture)
+    capture_detail = capture_detail if capture_detail else CaptureDetail()
+
     # Note: we do not use utils.capture_to_dict here.
     # This is because we want a full report, including logs, regardless of capture state.
+    # Full logs are read from storage if still available: the database only holds their tail.
     click.echo(
         json.dumps(
             {
                 "id_capture": capture.id_capture,
-                "id_access_key": int(str(capture.id_access_key)),
+                "id_access_key": capture.id_access_key_id,
                 "url": capture.url,
                 "callback_url": capture.callback_url,
                 "status": capture.status,
                 "created_timestamp": capture.created_timestamp,
                 "started_timestamp": capture.started_timestamp,
                 "ended_timestamp": capture.ended_timestamp,
-                "stdout_logs": capture.stdout_logs,
-                "stderr_logs": capture.stderr_logs,
-                "summary": capture.summary,
+                "stdout_logs": (
+                    read_scoop_logs(capture.id_capture, "stdout") or capture_detail.stdout_logs
+                ),
+                "stderr_logs": (
+                    read_scoop_logs(capture.id_capture, "stderr") or capture_detail.stderr_logs
+                ),
+                "summary": capture_detail.summary,
+                "timings": (
+                    CaptureTiming.select(*[getattr(CaptureTiming, p) for p in CaptureTiming.PHASES])
+                    .where(CaptureTiming.id_capture == capture.id_capture)
+                    .dicts()
+                    .first()
+                ),
+                "artifacts": list(
+                    Artifact.select(
+                        Artifact.filename, Artifact.size, Artifact.sha256, Artifact.content_type
+                    )
+                    .where(Artifact.id_capture == capture.id_capture)
+                    .order_by(Artifact.id_artifact)
+                    .dicts()
+                ),
             }
         )
     )
@@ -0,0 +1,72 @@
+"""
+`commands.migrate_capture_details` module: Controller for the `migrate-capture-details` CLI command.
+"""
+import click
+import peewee
+from flask import current_app
+from playhouse.migrate import SqliteMigrator, migrate
+
+from ..utils import get_db
+
+LEGACY_COLUMNS = ["stdout_logs", "stderr_logs", "summary"]
+""" Columns of the "capture" table that were moved to "capture_detail". """
+
+
+@current_app.cli.command("migrate-capture-details")
+@click.option(
+    "--vacuum",
+    is_flag=True,
+    default=False,
+    help="Reclaims the space freed by the migration (rewrites the database file).",
+)
+def migrate_capture_details(vacuum: bool) -> None:
+    """
+    Moves logs and summaries from the "capture" table to the "capture_detail" table.
+    Only needed for databases created before "capture_detail" was introduced.
+    Can safely be run multiple times.
+    """
+    from ..models import Capture, CaptureDetail
+
+    db = get_db()
+    columns = [column.name for column in db.get_columns(Capture._meta.table_name)]
+
+    click.echo("Creating capture_detail table...")
+    db.create_tables([CaptureDetail])
+
+    if not set(LEGACY_COLUMNS).issubset(columns):
+        click.echo("Nothing to migrate.")
+        exit(0)
+
+    click.echo("Copying logs and summaries...")
+    with db.atomic():
+        legacy = peewee.Table(Capture._meta.table_name)
+        fields = [legacy.c.id_capture] + [legacy.c[column] for column in LEGACY_COLUMNS]
+
+        copied = (
+            CaptureDetail.insert_from(
+                legacy.select(*fields).where(
+                    legacy.c.stdout_logs.is_null(False)
+                    | legacy.c.stderr_logs.is_null(False)
+                    | legacy.c.summary.is_null(False)
+                ),
+                [CaptureDetail.id_capture]
+                + [CaptureDetail._meta.fields[c] for c in LEGACY_COLUMNS],
+            )
+            .on_conflict_ignore()
+            .as_rowcount()
+            .execute()
+        )
+
+        click.echo(f"{copied} capture(s) copied.")
+
+        migrator = SqliteMigrator(db)
+        migrate(
+            *[migrator.drop_column(Capture._meta.table_name, column) for column in LEGACY_COLUMNS]
+        )
+
+    if vacuum:
+        click.echo("Vacuuming database...")
+        db.execute_sql("VACUUM")
+
+    click.echo("Done.")
+    exit(0)
@@ -0,0 +1,67 @@
+"""
+`commands.migrate_capture_expiration` module:
+Controller for the `migrate-capture-expiration` CLI command.
+"""
+import click
+import peewee
+from flask import current_app
+from playhouse.migrate import SqliteMigrator, migrate
+
+from ..utils import get_db
+
+NEW_COLUMNS = ["expires_timestamp", "purged"]
+""" Columns of the "capture" table `cleanup` relies on. """
+
+
+@current_app.cli.command("migrate-capture-expiration")
+def migrate_capture_expiration() -> None:
+    """
+    Adds expiration dates to the "capture" table, as well as the index `cleanup` relies on.
+    Only needed for databases created before captures had an expiration date.
+    Can safely be run multiple times.
+
+    Captures that started before that are given an expiration date based on
+    TEMPORARY_STORAGE_EXPIRATION. Those whose files were already deleted are purged by the next
+    `cleanup` run.
+    """
+    from ..models import Capture
+
+    TEMPORARY_STORAGE_EXPIRATION = int(current_app.config["TEMPORARY_STORAGE_EXPIRATION"])
+
+    db = get_db()
+    columns = [column.name for column in db.get_columns(Capture._meta.table_name)]
+
+    with db.atomic():
+        if not set(NEW_COLUMNS).issubset(columns):
+            click.echo("Adding columns...")
+            migrator = SqliteMigrator(db)
+            migrate(
+                *[
+                    migrator.add_column(
+                        Capture._meta.table_name, column, Capture._meta.fields[column]
+                    )
+                    for column in NEW_COLUMNS
+                    if column not in columns
+                ]
+            )
+
+        click.echo("Creating index...")
+        Capture.create_table(safe=True)
+
+        # Timestamps are stored in milliseconds
+        click.echo("Setting expiration dates...")
+        updated = (
+            Capture.update(
+                expires_timestamp=peewee.SQL(
+                    "COALESCE(started_timestamp, created_timestamp) + ?",
+                    [TEMPORARY_STORAGE_EXPIRATION * 1000],
+                )
+            )
+            .where(Capture.expires_timestamp.is_null(), Capture.status != "pending")
+            .execute()
+        )
+
+        click.echo(f"{updated} capture(s) updated.")
+
+    click.echo("Done.")
+    exit(0)
@@ -2,30 +2,52 @@
 `commands.start_capture_process` module: Controller for the `start-capture-process` CLI command.
 """
 import os
+import glob
+import shutil
 import time
 import datetime
 import subprocess
 import random
 import traceback
 import json
+import signal
+import threading
+from concurrent import futures
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 import click
-from flask import current_app, jsonify
+from flask import current_app
 
-from ..utils import capture_to_dict
+from ..utils import capture_to_json, wait_for_capture, get_db
+from ..utils import ScoopLogsWriter, get_scoop_logs_path
+from ..utils import ProxyPortManager
+from ..utils import get_artifact_path, link_to_blob, restore_blob, get_storage
+from ..utils import metrics
 
 
 @current_app.cli.command("start-capture-process")
 @click.option("--proxy-port", required=False, default=9000)
 @click.option("--single-run", is_flag=True, required=False, default=False)
-def start_capture_process(proxy_port=9000, single_run=False) -> None:
+@click.option(
+    "--slots",
+    required=False,
+    default=1,
+    type=int,
+    help="How many captures to run concurrently. Slot N uses --proxy-port + N.",
+)
+def start_capture_process(proxy_port=9000, single_run=False, slots=1) -> None:
     """
-    Takes a capture from the queue and processes it.
+    Takes captures from the queue and processes them, up to --slots at a time.
     Runs in a loop unless interrupted, or if "--single-run" is on.
     Multiple instances of this command can be run in parallel: see "start-capture-process" command.
 
-    If interrupted during capture: puts capture back into queue.
+    Scoop runs happen in a thread pool. Everything else, including database access, happens in
+    the main thread: the process only uses one database connection, regardless of --slots.
+
+    If interrupted during capture: marks captures in progress as failed.
+    On SIGTERM: stops once the captures in progress, if any, are complete.
+
+    Metrics are written to METRICS_TEXTFILE_PATH/capture-process-<proxy port>.prom.
     """
     from ..models import Capture
 
@@ -33,288 +55,578 @@ def start_capture_process(proxy_port=9000, single_run=False) -> None:
         click.echo("--proxy-port must be a valid, free TCP port.")
         exit(1)
 
-    while True:
-        try:
-            captures = None
-            """ List of pending captures. """
+    if slots < 1:
+        click.echo("--slots must be at least 1.")
+        exit(1)
 
-            capture = None
-            """ Capture currently being processed. """
+    # Resolve how Scoop should be started once, for the lifetime of this process
+    try:
+        scoop_command = resolve_scoop_command(current_app.config["SCOOP_LAUNCH_MODE"])
+    except Exception as err:
+        click.echo(f"Scoop could not be found: {err}")
+        exit(1)
 
-            proxy_port_is_available = True
-            """ Determines if the targeted proxy port is currently available.
-                Capture cycle will be skipped if not. """
+    # Reserve --proxy-port + slot for the lifetime of this process, or other ports from the pool
+    PROCESSES_PROXY_PORT = int(current_app.config["PROCESSES_PROXY_PORT"])
+    PROXY_PORTS_POOL_SIZE = int(current_app.config["PROXY_PORTS_POOL_SIZE"])
+    CAPTURE_QUEUE_POLL_INTERVAL = int(current_app.config["CAPTURE_QUEUE_POLL_INTERVAL"])
+    TEMPORARY_STORAGE_EXPIRATION = int(current_app.config["TEMPORARY_STORAGE_EXPIRATION"])
 
-            storage_path = None
-            """ Path to temporary folder used by the API to store artifacts.
-                Will be created on the fly if necessary. """
+    proxy_ports = [
+        ProxyPortManager(
+            int(proxy_port) + slot,
+            range(PROCESSES_PROXY_PORT, PROCESSES_PROXY_PORT + PROXY_PORTS_POOL_SIZE),
+        )
+        for slot in range(0, slots)
+    ]
+    slots_proxy_ports = [None] * slots
 
-            attachments_path = None
-            """ Path to the temporary folder used by the API to store attachments.
-                Will be created on the fly if necessary. """
+    # Stop gracefully on SIGTERM (see `start-parallel-capture-processes --autoscale`)
+    draining = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: draining.set())
 
-            archive_path = None
-            """ Path to the resulting WARC/WACZ file. Should be a filename under storage_path. """
+    executor = ThreadPoolExecutor(max_workers=slots)
+    app = current_app._get_current_object()
+    metrics_name = f"capture-process-{proxy_port}"
 
-            json_summary_path = None
-            """ Path to the JSON summary file. Should be a filename under storage_path. """
+    running = {}
+    """ Captures in progress and their Scoop run (future), by slot. """
 
-            scoop_options = current_app.config["SCOOP_CLI_OPTIONS"]
-            """ Shortcut to app-level Scoop CLI options. """
+    scoop_processes = {}
+    """ Scoop processes currently running, by id_capture. Maintained by run_capture(). """
 
-            scoop_stdout = None
-            """ STDOUT from Scoop run. """
+    check_queue = True
+    """ Should the queue be checked right away? (I.e. a slot was just freed, or API signaled). """
 
-            scoop_stderr = None
-            """ STDERR from Scoop run. """
+    poll_at = 0
+    """ When should the queue be checked regardless, as per time.monotonic(). """
 
-            scoop_exit_code = None
-            """ Exit code from Scoop run. """
+    claimed_once = False
+    """ In single-run mode: has the queue been checked already? """
 
-            #
-            # Pull 1 pending capture from the queue
-            #
-            captures = (
-                Capture.select()
-                .where(Capture.status == "pending")
-                .order_by("created_timestamp")
-                .paginate(1, 1)
-            )
+    try:
+        while True:
+            metrics.export_textfile(metrics_name)
 
             #
-            # If there is a capture to process:
-            # Check that --proxy-port is available
+            # Complete captures Scoop is done with: results are saved from this thread only
             #
-            if len(captures):
-                try:
-                    requests.head(f"http://localhost:{proxy_port}", timeout=1)
-                    proxy_port_is_available = False
-                except requests.exceptions.ReadTimeout:
-                    proxy_port_is_available = False
-                except Exception:
-                    proxy_port_is_available = True
-
-                if not proxy_port_is_available:
-                    click.echo(f"{log_prefix()} Port {proxy_port} already in use - skipping cycle")
+            for slot, (capture, future) in list(running.items()):
+                if future.done():
+                    del running[slot]
+                    complete_capture(capture, future)
+                    check_queue = True
+
+            if draining.is_set() and not running:
+                click.echo(f"{log_prefix()} Received SIGTERM - stopping")
+                break
+
+            if single_run and claimed_once and not running:
+                break
 
             #
-            # Wait until next tick if no capture to process or port is not available.
+            # Claim pending captures for free slots: marks them as "started" in the process
             #
-            if not len(captures) or not proxy_port_is_available:
-                if single_run:
-                    break
-                else:
-                    # Randomize wait time to prevent queuing clashes (TBD)
-                    time.sleep(0.5 + random.random())
-                    continue
-
-            capture = captures[0]
+            can_claim = not draining.is_set() and not (single_run and claimed_once)
+
+            if can_claim and (check_queue or time.monotonic() >= poll_at):
+                check_queue = False
+                poll_at = time.monotonic() + CAPTURE_QUEUE_POLL_INTERVAL
+
+                for slot in range(0, slots):
+                    if slot in running:
+                        continue
+
+                    # Check that the slot's proxy port is available (bind test), switch otherwise
+                    previous_proxy_port = slots_proxy_ports[slot]
+                    slots_proxy_ports[slot] = proxy_ports[slot].get_port()
+
+                    if slots_proxy_ports[slot] is None:
+                        click.echo(f"{log_prefix()} Slot {slot}: No proxy port available")
+                        # Randomize wait time to prevent queuing clashes (TBD)
+                        poll_at = time.monotonic() + 0.5 + random.random()
+                        continue
+                    elif slots_proxy_ports[slot] != previous_proxy_port:
+                        click.echo(
+                            f"{log_prefix()} Slot {slot}: "
+                            f"Using proxy port {slots_proxy_ports[slot]}"
+                        )
+
+                    claim_start_time = time.perf_counter()
+                    capture = Capture.claim_next(expiration=TEMPORARY_STORAGE_EXPIRATION)
+                    claim_time = time.perf_counter() - claim_start_time
+                    metrics.CAPTURE_CLAIM_DURATION.observe(claim_time)
+
+                    if not capture:
+                        break
+
+                    click.echo(f"{log_prefix(capture)} Marked as started (slot {slot})")
+
+                    running[slot] = (
+                        capture,
+                        executor.submit(
+                            run_capture_in_app_context,
+                            app,
+                            capture,
+                            slots_proxy_ports[slot],
+                            scoop_command,
+                            scoop_processes,
+                            {"claim_time": claim_time},
+                        ),
+                    )
+
+                claimed_once = True
+                continue
 
             #
-            # Define paths
+            # Wait for a capture to complete, or for the API to signal a new capture.
+            # Waits are sliced so SIGTERM is acted upon within a second.
             #
+            if len(running) < slots and can_claim:
+                remaining = max(poll_at - time.monotonic(), 0)
+                check_queue = wait_for_capture(min(1.0, remaining))
+            else:
+                futures.wait(
+                    [future for capture, future in running.values()],
+                    timeout=1.0,
+                    return_when=futures.FIRST_COMPLETED,
+                )
+    #
+    # Catch-all
+    #
+    except Exception:
+        click.echo(traceback.format_exc())  # Full trace should be in the logs
+        abort_captures(running, scoop_processes, "other, see logs")
+    #
+    # Voluntary interruption
+    #
+    except:  # noqa: we can't intercept interrupt signals if we specify an exception type
+        click.echo("Operation aborted")
+        abort_captures(running, scoop_processes, "interrupted")
+    finally:
+        executor.shutdown(wait=False)
+        metrics.export_textfile(metrics_name, force=True)
+
+        for manager in proxy_ports:
+            manager.release()
+
+
+def run_capture_in_app_context(app, *args) -> tuple:
+    """Runs run_capture() from a thread pool, within an app context."""
+    with app.app_context():
+        return run_capture(*args)
+
+
+def run_capture(
+    capture,
+    proxy_port: int,
+    scoop_command: list,
+    scoop_processes: dict,
+    timings: dict,
+) -> tuple:
+    """
+    Runs Scoop for a given capture, and checks the results.
+    Updates `capture`'s status, and returns what else should be saved:
+    (capture_detail, artifacts, timings).
+    - `artifacts` flags those that were deduplicated (see ARTIFACTS_DEDUPLICATION)
+    - `artifacts` are uploaded if they are not stored locally (see STORAGE_BACKEND)
+    - `timings` is completed with the duration of each phase (see models.CaptureTiming)
+    Does not access the database: runs from a thread pool (see complete_capture()).
+    """
+    from ..models import Artifact
+
+    storage_path = None
+    """ Path to temporary folder used by the API to store artifacts.
+        Will be created on the fly if necessary. """
+
+    attachments_path = None
+    """ Path to the temporary folder used by the API to store attachments.
+        Will be created on the fly if necessary. """
+
+    archive_path = None
+    """ Path to the resulting WARC/WACZ file. Should be a filename under storage_path. """
+
+    json_summary_path = None
+    """ Path to the JSON summary file. Should be a filename under storage_path. """
+
+    scoop_options = current_app.config["SCOOP_CLI_OPTIONS"]
+    """ Shortcut to app-level Scoop CLI options. """
+
+    scoop_stdout = None
+    """ Streams STDOUT from Scoop run to disk. Keeps its tail for the database. """
+
+    scoop_stderr = None
+    """ Streams STDERR from Scoop run to disk. Keeps its tail for the database. """
+
+    scoop_exit_code = None
+    """ Exit code from Scoop run. """
+
+    artifacts = []
+    """ Manifest of the files generated by a successful capture (see models.Artifact). """
+
+    #
+    # Define paths
+    #
+
+    # Temporary storage folder
+    temporary_storage_path = current_app.config["TEMPORARY_STORAGE_PATH"]
+    storage_path = f"{temporary_storage_path}{os.sep}{capture.id_capture}"
+    json_summary_path = f"{storage_path}{os.sep}archive.json"
+    attachments_path = f"{storage_path}{os.sep}attachments"
+    archive_path = f"{storage_path}{os.sep}archive.wacz"
+
+    #
+    # Create capture-specific folders
+    #
+    os.makedirs(storage_path)
+    click.echo(f"{log_prefix(capture)} Temporary storage folder: {storage_path}")
+    os.makedirs(attachments_path)
+
+    #
+    # Run capture
+    #
+    scoop_args = scoop_command + [
+        capture.url,
+        "--output",
+        archive_path,
+        "--format",
+        "wacz",
+        "--json-summary-output",
+        json_summary_path,
+        "--export-attachments-output",
+        attachments_path,
+        "--proxy-port",
+        str(proxy_port),
+    ]
+
+    for key, value in scoop_options.items():
+        scoop_args.append(key)
+        scoop_args.append(str(value))
+
+    scoop_start_time = time.perf_counter()
+    scoop_start_timestamp = datetime.datetime.now(datetime.timezone.utc)
+
+    process = subprocess.Popen(
+        scoop_args,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+
+    scoop_processes[str(capture.id_capture)] = process
+
+    try:
+        # Stream logs to compressed files in storage, line by line
+        scoop_logs_tail_size = int(current_app.config["SCOOP_LOGS_TAIL_SIZE"])
+
+        scoop_stdout = ScoopLogsWriter(
+            process.stdout,
+            get_scoop_logs_path(capture.id_capture, "stdout"),
+            scoop_logs_tail_size,
+        )
+
+        scoop_stderr = ScoopLogsWriter(
+            process.stderr,
+            get_scoop_logs_path(capture.id_capture, "stderr"),
+            scoop_logs_tail_size,
+        )
+
+        scoop_stdout.start()
+        scoop_stderr.start()
+
+        process.wait(
+            # Enforce hard timeout after SCOOP_TIMEOUT_FUSE seconds past capture timeout
+            timeout=scoop_options["--capture-timeout"] / 1000
+            + int(current_app.config["SCOOP_TIMEOUT_FUSE"])
+        )
+    #
+    # Edge case: Scoop keeps running more than SCOOP_TIMEOUT_FUSE seconds after capture:
+    # Process timeout has been reached
+    #
+    except subprocess.TimeoutExpired:
+        process.kill()
+        capture.status = "failed"
+        capture.ended_timestamp = datetime.datetime.utcnow()
+        click.echo(f"{log_prefix(capture)} Failed (timeout violation)")
+        timings["scoop_time"] = time.perf_counter() - scoop_start_time
+        metrics.CAPTURE_SCOOP_DURATION.observe(timings["scoop_time"])
+        metrics.CAPTURES_COMPLETED.inc(status="failed", reason="timeout")
+        return (None, [], timings)
+    finally:
+        del scoop_processes[str(capture.id_capture)]
+
+    scoop_stdout.join()
+    scoop_stderr.join()
+
+    scoop_exit_code = process.poll()
+
+    scoop_wall_time = time.perf_counter() - scoop_start_time
+    timings["scoop_time"] = scoop_wall_time
+    metrics.CAPTURE_SCOOP_DURATION.observe(scoop_wall_time)
+    click.echo(
+        f"{log_prefix(capture)} Scoop ran for {scoop_wall_time:.2f}s "
+        f"({current_app.config['SCOOP_LAUNCH_MODE']} launch mode)"
+    )
+
+    # Heavy properties are stored separately (see models.CaptureDetail)
+    capture_detail = {
+        "id_capture": capture.id_capture,
+        "stdout_logs": scoop_stdout.tail(),
+        "stderr_logs": scoop_stderr.tail(),
+        "summary": None,
+    }
+
+    #
+    # Check capture results
+    #
+
+    verification_start_time = time.perf_counter()
+
+    # Assume capture failed until proven otherwise
+    capture.status = "failed"
+    capture.ended_timestamp = datetime.datetime.utcnow()
+    success = False
+    failed_reason = ""
+    failed_category = ""  # Reported to metrics.CAPTURES_COMPLETED
+
+    if scoop_exit_code != 0:
+        failed_reason = f"exit code {scoop_exit_code}"
+        failed_category = "exit_code"
+
+    # Confirm capture success
+    if scoop_exit_code == 0:
+        success = True
+
+        # Archive file must exist
+        if not os.path.exists(archive_path):
+            failed_reason = f"{archive_path} not found"
+            failed_category = "missing_archive"
+            success = False
 
-            # Temporary storage folder
-            temporary_storage_path = current_app.config["TEMPORARY_STORAGE_PATH"]
-            storage_path = f"{temporary_storage_path}{os.sep}{capture.id_capture}"
-            json_summary_path = f"{storage_path}{os.sep}archive.json"
-            attachments_path = f"{storage_path}{os.sep}attachments"
-            archive_path = f"{storage_path}{os.sep}archive.wacz"
+        # JSON summary must exist
+        if not os.path.exists(json_summary_path) and not failed_reason:
+            failed_reason = f"{json_summary_path} not found"
+            failed_category = "missing_summary"
+            success = False
 
-            #
-            # Mark capture as "started"
-            #
-            update_count = (
-                Capture.update(status="started")
-                .where(Capture.id_capture == capture.id_capture, Capture.status == "pending")
-                .execute()
-            )
-            # https://github.com/harvard-lil/perma/blob/develop/perma_web/perma/models.py#L2115C1-L2118C18
-
-            if update_count < 1:
-                click.echo(
-                    f"{log_prefix(capture)} Already running in another process: status already updated."  # noqa
+        # Analyze JSON summary and:
+        # - Check that expected extracted attachments are indeed on disk
+        # - Store a copy of the summary in the database
+        if success:
+            with open(json_summary_path) as file:
+                json_summary = json.load(file)
+                filenames_to_check = []
+
+                capture_detail["summary"] = json_summary  # Store copy of JSON summary
+                timings.update(
+                    get_scoop_phases(json_summary, scoop_start_timestamp, scoop_wall_time)
                 )
-                continue
 
-            # Get a fresh copy of the capture job
-            capture = Capture.get(Capture.id_capture == capture.id_capture)
-            capture.started_timestamp = datetime.datetime.utcnow()
-            capture.save()
+                for filename in json_summary["attachments"].values():
+                    if isinstance(filename, list):  # Example: "certificates" is a list
+                        filenames_to_check = filenames_to_check + filename
+                    else:
+                        filenames_to_check.append(filename)
+
+                for filename in filenames_to_check:
+                    filepath = f"{attachments_path}{os.sep}{filename}"
+                    if not os.path.exists(filepath):
+                        failed_reason = f"{filepath} not found"
+                        failed_category = "missing_attachment"
+                        success = False
+
+    # Build artifacts manifest: archive first, then attachments
+    if success:
+        for filepath in [archive_path] + sorted(glob.glob(f"{attachments_path}{os.sep}*")):
+            artifact = Artifact.describe_file(filepath)
+            artifact["id_capture"] = capture.id_capture
+            artifact["deduplicated"] = False
+            artifacts.append(artifact)
+
+    # Deduplicate attachments (archives are unique to each capture)
+    if success and current_app.config["ARTIFACTS_DEDUPLICATION"]:
+        for artifact in artifacts[1:]:
+            filepath = get_artifact_path(capture.id_capture, artifact["filename"])
+
+            artifact["deduplicated"] = link_to_blob(filepath, artifact["sha256"])
+
+    # Move artifacts to remote storage, if any
+    storage = get_storage()
+
+    if success and not storage.local:
+        try:
+            storage.store_artifacts(capture.id_capture, artifacts)
 
-            click.echo(f"{log_prefix(capture)} Marked as started")
+            for artifact in artifacts:
+                os.remove(get_artifact_path(capture.id_capture, artifact["filename"]))
+        except Exception:
+            click.echo(traceback.format_exc())  # Full trace should be in the logs
+            failed_reason = "artifacts could not be stored"
+            failed_category = "storage"
+            success = False
+            artifacts = []
 
-            #
-            # Create capture-specific folders
-            #
-            os.makedirs(storage_path)
-            click.echo(f"{log_prefix(capture)} Temporary storage folder: {storage_path}")
-            os.makedirs(attachments_path)
+    timings["verification_time"] = time.perf_counter() - verification_start_time
 
-            #
-            # Run capture
-            #
-            scoop_args = [
-                "npx",
-                "scoop",
-                capture.url,
-                "--output",
-                archive_path,
-                "--format",
-                "wacz",
-                "--json-summary-output",
-                json_summary_path,
-                "--export-attachments-output",
-                attachments_path,
-                "--proxy-port",
-                str(proxy_port),
-            ]
-
-            for key, value in scoop_options.items():
-                scoop_args.append(key)
-                scoop_args.append(str(value))
-
-            process = subprocess.Popen(
-                scoop_args,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-            )
-
-            scoop_stdout, scoop_stderr = process.communicate(
-                # Enforce hard timeout after SCOOP_TIMEOUT_FUSE seconds past capture timeout
-                timeout=scoop_options["--capture-timeout"] / 1000
-                + int(current_app.config["SCOOP_TIMEOUT_FUSE"])
-            )
-
-            scoop_exit_code = process.poll()
-
-            if scoop_exit_code is None:  # Kill rogue process after 5 second wait
-                click.echo(f"{log_prefix(capture)} Process still running - terminating in 5s")
-                time.sleep(5)
-                process.kill()
-
-            capture.stdout_logs = scoop_stdout.decode("utf-8")
-            capture.stderr_logs = scoop_stderr.decode("utf-8")
+    # Report on status
+    if success:
+        click.echo(f"{log_prefix(capture)} Success")
+        capture.status = "success"
+    else:
+        click.echo(f"{log_prefix(capture)} Failed ({failed_reason})")
+        capture.status = "failed"
 
-            #
-            # Check capture results
-            #
+    metrics.CAPTURES_COMPLETED.inc(status=capture.status, reason=failed_category)
 
-            # Assume capture failed until proven otherwise
-            capture.status = "failed"
-            capture.ended_timestamp = datetime.datetime.utcnow()
-            success = False
-            failed_reason = ""
-
-            if scoop_exit_code != 0:
-                failed_reason = f"exit code {scoop_exit_code}"
-
-            # Confirm capture success
-            if scoop_exit_code == 0:
-                success = True
-
-                # Archive file must exist
-                if not os.path.exists(archive_path):
-                    failed_reason = f"{archive_path} not found"
-                    success = False
-
-                # JSON summary must exist
-                if not os.path.exists(json_summary_path) and not failed_reason:
-                    failed_reason = f"{json_summary_path} not found"
-                    success = False
-
-                # Analyze JSON summary and:
-                # - Check that expected extracted attachments are indeed on disk
-                # - Store a copy of the summary in the database
-                if success:
-                    with open(json_summary_path) as file:
-                        json_summary = json.load(file)
-                        filenames_to_check = []
-
-                        capture.summary = json_summary  # Store copy of JSON summary
-
-                        for filename in json_summary["attachments"].values():
-                            if isinstance(filename, list):  # Example: "certificates" is a list
-                                filenames_to_check = filenames_to_check + filename
-                            else:
-                                filenames_to_check.append(filename)
-
-                        for filename in filenames_to_check:
-                            filepath = f"{attachments_path}{os.sep}{filename}"
-                            if not os.path.exists(filepath):
-                                click.echo(f"{log_prefix(capture)} Failed ({filepath} not found)")
-                                success = False
-
-            # Report on status and update database record
-            if success:
-                click.echo(f"{log_prefix(capture)} Success")
-                capture.status = "success"
-            else:
-                click.echo(f"{log_prefix(capture)} Failed ({failed_reason})")
-                capture.status = "failed"
+    return (capture_detail, artifacts, timings)
 
-            capture.save()
 
-            #
-            # Break loop if we are in single-run mode
-            #
-            if single_run:
-                break
+def get_scoop_phases(json_summary: dict, scoop_start_timestamp, scoop_wall_time: float) -> dict:
+    """
+    Splits Scoop's wall time into startup and capture phases, using the "startedAt" date Scoop
+    reports in its JSON summary. `scoop_start_timestamp` is when Scoop was spawned (UTC, aware).
+    Returns an empty dict if "startedAt" is missing or unusable.
+    """
+    try:
+        # JavaScript dates are serialized as "YYYY-MM-DDTHH:mm:ss.sssZ"
+        started_at = datetime.datetime.fromisoformat(
+            json_summary["startedAt"].replace("Z", "+00:00")
+        )
+        startup_time = (started_at - scoop_start_timestamp).total_seconds()
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return {}
 
-        #
-        # Edge case: Scoop keeps running more than SCOOP_TIMEOUT_FUSE seconds after capture:
-        # Process timeout has been reached
-        #
-        except subprocess.TimeoutExpired:
-            if capture:
-                capture.status = "failed"
-                capture.ended_timestamp = datetime.datetime.utcnow()
-                capture.save()
-                click.echo(f"{log_prefix(capture)} Failed (timeout violation)")
-
-            if process:
-                process.kill()
-        #
-        # Catch-all
-        #
-        except Exception:
-            if capture:
-                capture.status = "failed"
-                capture.ended_timestamp = datetime.datetime.utcnow()
-                capture.save()
-                click.echo(f"{log_prefix(capture)} Failed (other, see logs)")
+    # Clocks can drift: keep values within bounds
+    startup_time = min(max(startup_time, 0.0), scoop_wall_time)
 
-            click.echo(traceback.format_exc())  # Full trace should be in the logs
-            break  # Close the loop and terminate process
-        #
-        # Voluntary interruption
-        #
-        except:  # noqa: we can't intercept interrupt signals if we specify an exception type
-            click.echo("Operation aborted")
-
-            if capture:
-                if capture.status != "failed":
-                    capture.status = "failed"
-
-                capture.ended_timestamp = datetime.datetime.utcnow()
-                capture.save()  # Update capture state
-
-            break
-        #
-        # In any case: call webhook, if any
-        #
-        finally:
-            if capture and capture.callback_url:
-                try:
-                    click.echo(f"{log_prefix(capture)} Callback to {capture.callback_url}")
-
-                    # Workaround to be able to use Flask's jsonify, for consistency across the app
-                    json_data = json.loads(jsonify(capture_to_dict(capture)).data.decode("utf-8"))
-
-                    requests.post(capture.callback_url, json=json_data, timeout=10)
-                except Exception:
-                    click.echo(f"{log_prefix(capture)} Callback to {capture.callback_url} failed")
-                    click.echo(traceback.format_exc())  # Full trace should be in the logs
+    return {
+        "scoop_startup_time": startup_time,
+        "scoop_capture_time": scoop_wall_time - startup_time,
+    }
+
+
+def complete_capture(capture, future) -> None:
+    """
+    Saves the results of a Scoop run (see run_capture()), and queues a webhook call if needed.
+
+    Deduplicated artifacts reference their blob (see models.ArtifactBlob). `cleanup` may have
+    deleted one of these blobs after it was linked to, but before it was referenced again: the
+    artifact itself is then put back in the store (see utils.artifact_storage.restore_blob()).
+    """
+    from ..models import CaptureDetail, CaptureTiming, Artifact, ArtifactBlob
+
+    capture_detail = None
+    artifacts = []
+    timings = {}
+
+    try:
+        capture_detail, artifacts, timings = future.result()
+    except Exception:
+        capture.status = "failed"
+        capture.ended_timestamp = datetime.datetime.utcnow()
+        click.echo(f"{log_prefix(capture)} Failed (other, see logs)")
+        click.echo(traceback.format_exc())  # Full trace should be in the logs
+        metrics.CAPTURES_COMPLETED.inc(status="failed", reason="error")
+
+    save_start_time = time.perf_counter()
+
+    with get_db().atomic():
+        capture.save()
+
+        if capture_detail:
+            CaptureDetail.replace(**capture_detail).execute()
+
+        if artifacts:
+            Artifact.insert_many(artifacts).execute()
+
+        blobs = [artifact for artifact in artifacts if artifact["deduplicated"]]
+
+        if blobs:
+            ArtifactBlob.add_references(blobs)
+
+        timings["save_time"] = time.perf_counter() - save_start_time
+
+        if capture.started_timestamp:
+            timings["queue_time"] = (
+                capture.started_timestamp - capture.created_timestamp
+            ).total_seconds()
+            timings["total_time"] = (
+                capture.ended_timestamp - capture.created_timestamp
+            ).total_seconds()
+
+        CaptureTiming.replace(id_capture=capture.id_capture, **timings).execute()
+
+    # References are committed: blobs are safe from `cleanup` from now on
+    for artifact in blobs:
+        restore_blob(
+            get_artifact_path(capture.id_capture, artifact["filename"]), artifact["sha256"]
+        )
+
+    queue_callback(capture)
+
+
+def abort_captures(running: dict, scoop_processes: dict, reason: str) -> None:
+    """
+    Marks captures in progress as failed, and stops their Scoop process.
+    """
+    for capture, future in running.values():
+        process = scoop_processes.get(str(capture.id_capture))
+
+        if process:
+            process.kill()
+
+        capture.status = "failed"
+        capture.ended_timestamp = datetime.datetime.utcnow()
+        capture.save()  # Update capture state
+        click.echo(f"{log_prefix(capture)} Failed ({reason})")
+        metrics.CAPTURES_COMPLETED.inc(status="failed", reason="aborted")
+
+        queue_callback(capture)
+
+
+def queue_callback(capture) -> None:
+    """
+    Queues a webhook call for a given capture, if it has a callback URL (see `deliver-callbacks`).
+    """
+    from ..models import CallbackDelivery
+
+    if not capture.callback_url:
+        return
+
+    try:
+        CallbackDelivery.enqueue(capture, capture_to_json(capture))
+        click.echo(f"{log_prefix(capture)} Callback to {capture.callback_url} queued")
+    except Exception:
+        click.echo(f"{log_prefix(capture)} Callback to {capture.callback_url} could not be queued")
+        click.echo(traceback.format_exc())  # Full trace should be in the logs
+
+
+def resolve_scoop_command(launch_mode: str) -> list:
+    """
+    Returns the command used to start Scoop, to which CLI arguments are appended.
+    - "npx": Lets npx resolve Scoop for every capture.
+    - "direct": Resolves Scoop's entry point from node_modules once, and runs it with node.
+      Skips npx's package resolution on every capture.
+    Raises ValueError for any other launch mode (see SCOOP_LAUNCH_MODE).
+    """
+    if launch_mode == "npx":
+        return ["npx", "scoop"]
+
+    if launch_mode != "direct":
+        raise ValueError(
+            f'Unknown SCOOP_LAUNCH_MODE "{launch_mode}": must be either "npx" or "direct".'
+        )
+
+    node_path = shutil.which("node")
+    scoop_bin_path = f"node_modules{os.sep}.bin{os.sep}scoop"
+
+    if not node_path:
+        raise FileNotFoundError("node is not available.")
+
+    if not os.path.exists(scoop_bin_path):
+        raise FileNotFoundError(f"{scoop_bin_path} does not exist. Run npm install.")
+
+    # node_modules/.bin/scoop is a symbolic link to the script that it runs
+    return [node_path, os.path.realpath(scoop_bin_path)]
 
 
 def log_prefix(capture=None) -> str:
@@ -2,8 +2,12 @@
 `commands.start_parallel_capture_processes` module:
 Controller for the `start-parallel-capture-processes` CLI command.
 """
+import os
 import sys
+import json
 import time
+import math
+import random
 import datetime
 import subprocess
 import signal
@@ -12,45 +16,140 @@ import click
 
 from flask import current_app
 
+from ..utils import get_cpu_times, get_cpu_usage, get_memory_available
+
 
 @current_app.cli.command("start-parallel-capture-processes")
-def start_parallel_capture_processes() -> None:
+@click.option(
+    "--autoscale",
+    is_flag=True,
+    required=False,
+    default=False,
+    help="Scale between MIN_PROCESSES and MAX_PROCESSES depending on load.",
+)
+def start_parallel_capture_processes(autoscale=False) -> None:
     """
-    Runs multiple capture processes in parallel.
+    Runs multiple capture processes in parallel, each running PROCESSES_SLOTS captures at once.
+
+    By default, runs PROCESSES capture processes.
+
+    With --autoscale, runs between MIN_PROCESSES and MAX_PROCESSES capture processes, depending on
+    the state of the capture queue and on available CPU and memory (see get_scaling_target()).
+    Capture processes are stopped gracefully when scaling down: they complete their current
+    capture first.
+
+    Capture processes start concurrently, spread over PROCESSES_STARTUP_JITTER seconds.
+    Those that stop unexpectedly are restarted with exponential backoff (see CaptureProcessSlot).
+    State of every slot is reported to TEMPORARY_STORAGE_PATH/capture-processes.json.
 
     Use SIGINT (Ctrl + C) to interrupt.
 
     See configuration options in config.py.
     """
+    from ..models import Capture
+
     PROCESSES = int(current_app.config["PROCESSES"])
+    MIN_PROCESSES = int(current_app.config["MIN_PROCESSES"])
+    AUTOSCALE_INTERVAL = int(current_app.config["AUTOSCALE_INTERVAL"])
+    PROCESSES_STARTUP_JITTER = float(current_app.config["PROCESSES_STARTUP_JITTER"])
+
+    slots = {}
+    """ Capture process slots, by index. Index determines the process' proxy port. """
 
-    processes = []
+    cpu_times = get_cpu_times()
+    last_scaling = time.monotonic()
+    last_status_write = 0
 
     #
-    # Start capture processes
+    # Schedule capture processes: they start concurrently, spread over PROCESSES_STARTUP_JITTER
     #
-    for process_index in range(0, PROCESSES):
-        process = start_capture_process(process_index)
-        processes.append(process)
+    for process_index in range(0, MIN_PROCESSES if autoscale else PROCESSES):
+        slots[process_index] = CaptureProcessSlot(
+            process_index, random.uniform(0, PROCESSES_STARTUP_JITTER)
+        )
 
     #
     # Process loop
     #
     try:
         while True:
-            time.sleep(1)  # Waiting for SIGINT
+            time.sleep(0.25)  # Waiting for SIGINT
+
+            # Start scheduled processes, restart processes that stopped unexpectedly (with backoff)
+            # and forget about processes that were drained.
+            for process_index, slot in list(slots.items()):
+                if not slot.process:
+                    if time.monotonic() >= slot.start_at:
+                        slot.start()
+
+                    continue
+
+                exit_code = slot.process.poll()
+
+                if exit_code is None:
+                    continue
+
+                slot.stopped(exit_code)
+
+                if slot.draining:
+                    click.echo(f"{log_prefix(process_index)} drained - Stopped")
+                    del slots[process_index]
+                    continue
+
+                delay = slot.schedule_restart()
+
+                click.echo(
+                    f"{log_prefix(process_index)} {'crashed' if exit_code else 'stopped'} "
+                    f"(exit code {exit_code}) - Rebooting in {delay:.0f}s"
+                )
 
-            # Try to restart processes that crashed
-            for process_index, process in enumerate(processes):
-                exit_code = process.poll()
+            # Report on slots states
+            if time.monotonic() - last_status_write >= 1:
+                last_status_write = time.monotonic()
+                write_status_file(slots, autoscale)
 
-                if exit_code is not None:
-                    if exit_code > 0:
-                        click.echo(f"{log_prefix(process_index)} crashed - Rebooting")
-                    else:
-                        click.echo(f"{log_prefix(process_index)} stopped - Rebooting")
+            if not autoscale or time.monotonic() - last_scaling < AUTOSCALE_INTERVAL:
+                continue
 
-                    processes[process_index] = start_capture_process(process_index)
+            #
+            # Autoscaling
+            #
+            last_scaling = time.monotonic()
+            previous_cpu_times, cpu_times = cpu_times, get_cpu_times()
+            active = [index for index in sorted(slots.keys()) if not slots[index].draining]
+
+            target = get_scaling_target(
+                active=len(active),
+                started=Capture.select().where(Capture.status == "started").count(),
+                pending=Capture.count_pending(),
+                oldest_pending_age=Capture.get_oldest_pending_age(),
+                cpu_usage=get_cpu_usage(previous_cpu_times, cpu_times),
+                memory_available=get_memory_available(),
+            )
+
+            # Scale up: use the lowest available slots
+            process_index = 0
+
+            while len(active) < target:
+                if process_index not in slots:
+                    slots[process_index] = CaptureProcessSlot(
+                        process_index, random.uniform(0, PROCESSES_STARTUP_JITTER)
+                    )
+                    active.append(process_index)
+
+                process_index += 1
+
+            # Scale down: drain the highest active slots
+            for process_index in reversed(active[target:]):
+                slot = slots[process_index]
+
+                if not slot.process:  # Not started (yet): nothing to drain
+                    del slots[process_index]
+                    continue
+
+                click.echo(f"{log_prefix(process_index)} Draining (scaling down)")
+                slot.process.send_signal(signal.SIGTERM)
+                slot.draining = True
 
     #
     # Voluntary interruption
@@ -58,31 +157,192 @@ def start_parallel_capture_processes() -> None:
     except:  # noqa: we can't intercept interrupt signals if we specify an exception type
         click.echo("Operation aborted")
 
-        for process_index, process in enumerate(processes):
-            process.send_signal(signal.SIGINT)
-            process.wait()
+        for process_index, slot in slots.items():
+            if not slot.process:
+                continue
+
+            slot.process.send_signal(signal.SIGINT)
+            slot.process.wait()
             click.echo(f"{log_prefix(process_index)} Received SIGINT signal.")
 
+        try:
+            os.remove(get_status_file_path())
+        except FileNotFoundError:
+            pass
+
+
+def get_scaling_target(
+    active: int,
+    started: int,
+    pending: int,
+    oldest_pending_age: float,
+    cpu_usage,
+    memory_available,
+) -> int:
+    """
+    Returns how many capture processes should be running, given:
+    - `active`: How many capture processes are currently running (excluding draining ones).
+      Each runs up to PROCESSES_SLOTS captures at once.
+    - `started`: How many captures are currently being processed
+    - `pending`: How many captures are waiting in the queue
+    - `oldest_pending_age`: For how long the oldest pending capture has been waiting (seconds)
+    - `cpu_usage` / `memory_available`: Host stats, None if unknown (see utils.host_stats)
+
+    Scales up when captures have been waiting for AUTOSCALE_PENDING_AGE seconds and the host has
+    room for more processes, by AUTOSCALE_STEP processes at most.
+    Scales down by 1 process at a time when the queue is empty and the remaining processes have
+    enough slots for the captures in progress.
+    Note: `started` counts captures across all capture processes sharing the database.
+    Result is always between MIN_PROCESSES and MAX_PROCESSES.
+    """
+    MIN_PROCESSES = int(current_app.config["MIN_PROCESSES"])
+    MAX_PROCESSES = int(current_app.config["MAX_PROCESSES"])
+    AUTOSCALE_STEP = int(current_app.config["AUTOSCALE_STEP"])
+    AUTOSCALE_PENDING_AGE = int(current_app.config["AUTOSCALE_PENDING_AGE"])
+    AUTOSCALE_MAX_CPU_USAGE = float(current_app.config["AUTOSCALE_MAX_CPU_USAGE"])
+    AUTOSCALE_MIN_MEMORY_AVAILABLE = int(current_app.config["AUTOSCALE_MIN_MEMORY_AVAILABLE"])
+    PROCESSES_SLOTS = int(current_app.config["PROCESSES_SLOTS"])
 
-def start_capture_process(process_index: int) -> subprocess.Popen:
-    """Starts a capture process on port PROCESSES_PROXY_PORT + process_index."""
-    PROCESSES_PROXY_PORT = int(current_app.config["PROCESSES_PROXY_PORT"])
+    target = active
 
-    port = PROCESSES_PROXY_PORT + process_index
+    if pending and oldest_pending_age >= AUTOSCALE_PENDING_AGE:
+        host_is_busy = (cpu_usage is not None and cpu_usage >= AUTOSCALE_MAX_CPU_USAGE) or (
+            memory_available is not None and memory_available < AUTOSCALE_MIN_MEMORY_AVAILABLE
+        )
 
-    # Wait 1 second before launching each process.
-    # NOTE: This is a stretch to fit into "barebones" philosophy of the project. TBD.
-    time.sleep(1)
+        # One slot per capture in progress or waiting
+        if not host_is_busy:
+            needed = math.ceil((started + pending) / PROCESSES_SLOTS)
+            target = max(active, min(needed, active + AUTOSCALE_STEP))
 
-    process = subprocess.Popen(
-        ["flask", "start-capture-process", "--proxy-port", str(port)],
-        stdout=sys.stdout,
-        stderr=sys.stderr,
-    )
+    elif not pending and started <= (active - 1) * PROCESSES_SLOTS:
+        target = active - 1
+
+    return max(MIN_PROCESSES, min(MAX_PROCESSES, target))
+
+
+class CaptureProcessSlot:
+    """
+    A capture process, as managed by `start-parallel-capture-processes`.
+    Runs PROCESSES_SLOTS captures at once, on as many consecutive proxy ports.
+    Keeps track of restarts, and delays restarts exponentially when the process keeps crashing.
+    """
+
+    def __init__(self, index: int, start_delay: float = 0):
+        self.index = index
+        self.slots = int(current_app.config["PROCESSES_SLOTS"])
+        self.port = int(current_app.config["PROCESSES_PROXY_PORT"]) + index * self.slots
+        self.process = None
+        self.start_at = time.monotonic() + start_delay
+        self.started_at = None
+        self.draining = False
+
+        self.restarts = 0
+        """ How many times this slot's process was restarted. """
+
+        self.crashes = 0
+        """ How many times in a row this slot's process stopped unexpectedly. """
+
+        self.last_exit_code = None
+
+    def start(self) -> None:
+        """Starts a capture process with PROCESSES_SLOTS slots, from port PROCESSES_PROXY_PORT + index * PROCESSES_SLOTS."""  # noqa
+        self.process = subprocess.Popen(
+            [
+                "flask",
+                "start-capture-process",
+                "--proxy-port",
+                str(self.port),
+                "--slots",
+                str(self.slots),
+            ],
+            stdout=sys.stdout,
+            stderr=sys.stderr,
+        )
+        self.started_at = time.monotonic()
+
+        click.echo(
+            f"{log_prefix(self.index)} Launched with {self.slots} slot(s), from port {self.port}"
+        )
+
+    def stopped(self, exit_code: int) -> None:
+        """Records that this slot's process has stopped."""
+        self.process = None
+        self.last_exit_code = exit_code
+
+    def schedule_restart(self) -> float:
+        """
+        Schedules a restart of this slot's process after an unexpected stop.
+        Delay starts at PROCESSES_RESTART_BACKOFF seconds, and doubles with every consecutive
+        crash, up to PROCESSES_RESTART_BACKOFF_MAX. A process that ran for longer than that
+        resets the counter. Returns the delay, in seconds.
+        """
+        PROCESSES_RESTART_BACKOFF = float(current_app.config["PROCESSES_RESTART_BACKOFF"])
+        PROCESSES_RESTART_BACKOFF_MAX = float(current_app.config["PROCESSES_RESTART_BACKOFF_MAX"])
+
+        if self.started_at and time.monotonic() - self.started_at >= PROCESSES_RESTART_BACKOFF_MAX:
+            self.crashes = 0
+
+        self.crashes += 1
+        self.restarts += 1
+
+        delay = min(
+            PROCESSES_RESTART_BACKOFF * 2 ** (self.crashes - 1),
+            PROCESSES_RESTART_BACKOFF_MAX,
+        )
+        self.start_at = time.monotonic() + delay
+
+        return delay
+
+    def to_dict(self) -> dict:
+        """Returns the state of this slot as a dictionary, as written to the status file."""
+        now = time.monotonic()
+
+        if self.draining:
+            state = "draining"
+        elif self.process:
+            state = "running"
+        else:
+            state = "waiting"
+
+        return {
+            "slot": self.index,
+            "port": self.port,
+            "slots": self.slots,
+            "state": state,
+            "pid": self.process.pid if self.process else None,
+            "uptime": round(now - self.started_at, 1) if self.process else None,
+            "starts_in": round(max(self.start_at - now, 0), 1) if not self.process else None,
+            "restarts": self.restarts,
+            "crashes": self.crashes,
+            "last_exit_code": self.last_exit_code,
+        }
+
+
+def get_status_file_path() -> str:
+    """Returns the path of the file `start-parallel-capture-processes` reports its state to."""
+    return f"{current_app.config['TEMPORARY_STORAGE_PATH']}{os.sep}capture-processes.json"
+
+
+def write_status_file(slots: dict, autoscale: bool) -> None:
+    """
+    Writes the state of all capture process slots to the status file, as JSON.
+    The file is replaced atomically: readers never see a partial write.
+    """
+    path = get_status_file_path()
 
-    click.echo(f"{log_prefix(process_index)} Launched on port {port}")
+    with open(f"{path}.tmp", "w") as file:
+        json.dump(
+            {
+                "pid": os.getpid(),
+                "autoscale": autoscale,
+                "updated_timestamp": datetime.datetime.utcnow().isoformat(),
+                "slots": [slot.to_dict() for slot in slots.values()],
+            },
+            file,
+        )
 
-    return process
+    os.replace(f"{path}.tmp", path)
 
 
 def log_prefix(process_index: int) -> str:
@@ -43,7 +43,7 @@ def status() -> None:
     click.echo(80 * "-")
     for entry in captures:
         output = f"#{entry.id_capture} "
-        output += f"author: {entry.id_access_key} "
+        output += f"author: {entry.id_access_key_id} "
         output += f"status: {entry.status} "
         output += f"created: {entry.created_timestamp} "
 
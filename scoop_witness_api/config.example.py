@@ -13,9 +13,18 @@ If you would like to use an alternative way of providing configuration, see:
 ACCESS_KEY_SALT = b"$2b$12$rXmm9AWx82fxw9Jbs1PXI.zebeXu4Ydi1huwxyH5k9flyhccBBTxa"  # default / dev
 """ Salt to be used to hash access keys. Use bcrypt.gensalt() to generate a new one. """
 
+ACCESS_KEY_CACHE_SIZE = 1024
+""" How many verified access keys should be kept in memory, per API process. 0 to disable. """
+
+ACCESS_KEY_CACHE_TTL = 60 * 5
+""" How long should a verified access key be kept in memory for? (In seconds). """
+
 MAX_PENDING_CAPTURES = 300
 """ Stop accepting new capture requests if there are over X captures in the queue. """
 
+MAX_CAPTURES_PER_BATCH = 300
+""" Maximum number of capture requests accepted at once by [POST] /captures/batch. """
+
 EXPOSE_SCOOP_LOGS = False
 """ If `True`, Scoop logs will be exposed at API level by capture_to_dict. Handle with care. """
 
@@ -31,6 +40,20 @@ DATABASE_PATH = "./database"
 DATABASE_FILENAME = "scoop.db"
 """ (SQLite) Database filename. """
 
+DATABASE_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": "normal",
+    "busy_timeout": 10 * 1000,
+    "cache_size": -1 * 64 * 1024,
+    "mmap_size": 256 * 1024 * 1024,
+}
+"""
+    (SQLite) PRAGMA statements applied to every new connection.
+    See https://www.sqlite.org/pragma.html for details.
+    - "wal" journal mode lets the API read while capture processes write.
+    - Negative "cache_size" values are expressed in KiB.
+"""
+
 #
 # Paths settings
 #
@@ -38,7 +61,16 @@ TEMPORARY_STORAGE_PATH = "./storage"
 """ Directory in which files will be (temporarily) stored. """
 
 TEMPORARY_STORAGE_EXPIRATION = 60 * 60 * 24
-""" How long should temporary files be stored for? (In seconds). Can be provided via an environment variable. """  # noqa
+"""
+    How long should temporary files be stored for? (In seconds). Can be provided via an environment variable.
+    Captures are given an expiration date when they start: changes do not apply to captures already started.
+"""  # noqa
+
+CLEANUP_BATCH_SIZE = 500
+""" `cleanup`: How many expired captures should be processed at once? """
+
+CLEANUP_CONCURRENCY = 8
+""" `cleanup`: How many expired captures should have their files deleted in parallel? """
 
 
 #
@@ -47,19 +79,202 @@ TEMPORARY_STORAGE_EXPIRATION = 60 * 60 * 24
 API_DOMAIN = "http://localhost:5000"
 """ Root URL of the API. """
 
-API_STORAGE_URL = f"{API_DOMAIN}/storage"
-""" URL for the storage folder. """
+#
+# Artifacts settings (see [GET] /artifact)
+#
+ARTIFACTS_MAX_AGE = 60 * 60 * 24 * 365
+""" Artifacts never change once written: how long can clients cache them for? (In seconds). """
+
+ARTIFACTS_MAX_RANGES = 32
+""" How many byte ranges can be requested at once? Requests for more get the full file (HTTP 200). """  # noqa
+
+ARTIFACTS_CACHE_SIZE = 4096
+""" How many artifact lookups should be kept in memory, per API process. 0 to disable. """
+
+ARTIFACTS_CACHE_TTL = 60
+""" How long should an artifact lookup be kept in memory for? (In seconds). """
+
+ARTIFACTS_DEDUPLICATION = False
+"""
+    If `True`, identical attachments across captures are stored once, in a content-addressed store under TEMPORARY_STORAGE_PATH/blobs.
+    Attachments become hard links to their blob: TEMPORARY_STORAGE_PATH must be on a filesystem supporting them.
+"""  # noqa
+
+ARTIFACTS_OFFLOAD = None
+"""
+    Lets the reverse proxy transfer artifacts instead of the API process. Can be:
+    - `None`: the API process streams files itself.
+    - "x-accel-redirect": nginx. See ARTIFACTS_OFFLOAD_PREFIX.
+    - "x-sendfile": Apache (mod_xsendfile), lighttpd ... The proxy must be allowed to read TEMPORARY_STORAGE_PATH.
+"""  # noqa
+
+ARTIFACTS_OFFLOAD_PREFIX = "/_storage"
+""" "x-accel-redirect" offload mode: nginx `internal` location mapped to TEMPORARY_STORAGE_PATH. """
+
+#
+# Storage settings
+#
+STORAGE_BACKEND = "local"
+"""
+    Where artifacts are kept once a capture is complete. Can be:
+    - "local": TEMPORARY_STORAGE_PATH. Artifacts are served by the API process that has them on disk.
+    - "s3": An S3-compatible bucket (see STORAGE_S3_*). [GET] /artifact redirects to presigned URLs.
+      Artifacts are uploaded by capture processes, and removed from TEMPORARY_STORAGE_PATH.
+"""  # noqa
+
+STORAGE_S3_ENDPOINT_URL = "https://s3.us-east-1.amazonaws.com"
+""" "s3" storage backend: URL of the S3-compatible service. Objects are addressed path-style. """
+
+STORAGE_S3_REGION = "us-east-1"
+""" "s3" storage backend: Region requests are signed for. """
+
+STORAGE_S3_BUCKET = ""
+""" "s3" storage backend: Bucket artifacts are stored in. """
+
+STORAGE_S3_PREFIX = ""
+""" "s3" storage backend: Prefix of the keys artifacts are stored under. """
+
+STORAGE_S3_ACCESS_KEY_ID = ""
+""" "s3" storage backend: Access key id. Needs read, write and delete access to the bucket. """
+
+STORAGE_S3_SECRET_ACCESS_KEY = ""
+""" "s3" storage backend: Secret access key. """
+
+STORAGE_S3_PRESIGNED_URL_EXPIRATION = 60 * 60
+""" "s3" storage backend: How long should URLs [GET] /artifact redirects to be valid for? (In seconds). """  # noqa
+
+STORAGE_S3_MULTIPART_CHUNK_SIZE = 8 * 1024 * 1024
+"""
+    "s3" storage backend: Files larger than this are uploaded in parts of that size (in bytes).
+    AWS S3 requires parts of at least 5 MiB.
+"""
+
+STORAGE_S3_UPLOAD_CONCURRENCY = 4
+""" "s3" storage backend: How many files or parts should be uploaded in parallel, per capture. """
+
+STORAGE_S3_TIMEOUT = 30
+""" "s3" storage backend: How long should the S3-compatible service be given to respond? (In seconds). """  # noqa
 
 #
 # Background processing options
 #
-PROCESSES = 6
-""" How many tick commands (capture processing) should run in parallel."""
+PROCESSES = 2
+""" How many capture processes should run in parallel. Each runs PROCESSES_SLOTS captures at once."""  # noqa
+
+PROCESSES_SLOTS = 3
+"""
+    How many captures each capture process runs concurrently (see `start-capture-process --slots`).
+    Slots share a process and its database connection: fewer processes use less memory.
+"""
+
+PROCESSES_STARTUP_JITTER = 5
+"""
+    Capture processes are started concurrently, each after a random delay of up to that many seconds.
+    Spreads the cost of starting processes over time.
+"""  # noqa
+
+PROCESSES_RESTART_BACKOFF = 1
+"""
+    How long to wait before restarting a capture process that stopped unexpectedly (in seconds).
+    Doubles with every consecutive crash of a given process, up to PROCESSES_RESTART_BACKOFF_MAX.
+"""
+
+PROCESSES_RESTART_BACKOFF_MAX = 300
+"""
+    Maximum delay before restarting a capture process that keeps crashing (in seconds).
+    Processes that ran for longer than that are considered stable: their crash counter is reset.
+"""
+
+MIN_PROCESSES = 1
+""" `start-parallel-capture-processes --autoscale`: Minimum number of capture processes. """
+
+MAX_PROCESSES = 8
+""" `start-parallel-capture-processes --autoscale`: Maximum number of capture processes. """
+
+AUTOSCALE_INTERVAL = 10
+""" `start-parallel-capture-processes --autoscale`: How often to re-evaluate scale (in seconds). """
+
+AUTOSCALE_STEP = 2
+""" `start-parallel-capture-processes --autoscale`: Maximum number of processes to add at once. """
+
+AUTOSCALE_PENDING_AGE = 5
+"""
+    `start-parallel-capture-processes --autoscale`:
+    Scale up once the oldest pending capture has been waiting for that long (in seconds).
+"""
+
+AUTOSCALE_MAX_CPU_USAGE = 0.85
+"""
+    `start-parallel-capture-processes --autoscale`:
+    Do not scale up while host CPU usage is above that ratio (read from /proc/stat).
+"""
+
+AUTOSCALE_MIN_MEMORY_AVAILABLE = 2 * 1024 * 1024 * 1024
+"""
+    `start-parallel-capture-processes --autoscale`:
+    Do not scale up while available host memory is below that amount (in bytes, read from /proc/meminfo).
+"""  # noqa
 
 PROCESSES_PROXY_PORT = 9000
 """
     Default port for Scoop Proxy for a given process.
-    Will be incremented by 1 for each new parallel process.
+    Each capture process uses PROCESSES_SLOTS consecutive ports, one per slot.
+"""
+
+PROXY_PORTS_POOL_SIZE = 100
+"""
+    Number of ports, starting from PROCESSES_PROXY_PORT, capture processes can fall back to
+    when their own proxy port is in use.
+    Should be greater than PROCESSES and MAX_PROCESSES, multiplied by PROCESSES_SLOTS.
+"""
+
+CAPTURE_QUEUE_POLL_INTERVAL = 30
+"""
+    How long should an idle capture process wait before checking the queue again? (In seconds).
+    Idle capture processes are woken up as soon as a capture is requested: this is a fallback.
+"""
+
+#
+# Callbacks settings (see `deliver-callbacks`)
+#
+CALLBACK_DELIVERY_CONCURRENCY = 8
+""" How many callbacks should be delivered in parallel, per `deliver-callbacks` process. """
+
+CALLBACK_DELIVERY_TIMEOUT = 10
+""" How long should a callback URL be given to respond? (In seconds). """
+
+CALLBACK_DELIVERY_MAX_ATTEMPTS = 8
+""" How many times should delivering a given callback be attempted before giving up? """
+
+CALLBACK_DELIVERY_BACKOFF = 30
+"""
+    How long should the first retry of a failed callback be delayed for? (In seconds).
+    Delay is doubled on every subsequent attempt.
+"""
+
+CALLBACK_DELIVERY_POLL_INTERVAL = 5
+""" How long should `deliver-callbacks` wait before checking the queue again? (In seconds). """
+
+#
+# Metrics settings
+#
+EXPOSE_METRICS = False
+"""
+    If `True`, metrics of the API are exposed at [GET] /metrics.
+    Not behind auth: restrict access at reverse proxy level.
+"""
+
+METRICS_TEXTFILE_PATH = "./metrics"
+"""
+    Directory CLI workers (`start-capture-process`, `deliver-callbacks`) write their metrics to.
+    Meant to be read by node_exporter's textfile collector. `None` to disable.
+"""
+
+METRICS_API_PATH = "./metrics/api"
+"""
+    Directory API processes (gunicorn workers) share their metrics through, so [GET] /metrics
+    reports totals for all of them. Snapshots of processes that are gone are deleted upon scrape.
+    `None` to only report metrics of the process serving the request (single worker only).
 """
 
 #
@@ -104,3 +319,16 @@ SCOOP_CLI_OPTIONS = {
 
 SCOOP_TIMEOUT_FUSE = 45
 """ Number of seconds to wait before "killing" a Scoop progress after capture timeout. """
+
+SCOOP_LOGS_TAIL_SIZE = 64 * 1024
+"""
+    How much of Scoop's STDOUT and STDERR should be stored in the database, per capture? (In bytes).
+    Full logs are stored, compressed, next to the capture's artifacts (see `inspect-capture`).
+"""
+
+SCOOP_LAUNCH_MODE = "npx"
+"""
+    How capture processes should start Scoop:
+    - "npx": Via `npx scoop`, which resolves the Scoop package on every capture.
+    - "direct": Scoop's entry point is resolved from node_modules once, and run directly with node.
+"""
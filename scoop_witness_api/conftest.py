@@ -1,9 +1,17 @@
 """ Test suite configuration and fixtures. """
 import uuid
 import os
+import hashlib
+import threading
+import datetime
+from urllib.parse import parse_qsl
+from contextlib import contextmanager
 from tempfile import TemporaryDirectory
 
 import pytest
+from playhouse.test_utils import count_queries
+from werkzeug.serving import make_server
+from werkzeug.wrappers import Request, Response
 
 from scoop_witness_api import create_app
 
@@ -31,15 +39,38 @@ def app():
                 "EXPOSE_SCOOP_CAPTURE_SUMMARY": True,
                 "TEMPORARY_STORAGE_PATH": TEMPORARY_STORAGE_PATH,
                 "TEMPORARY_STORAGE_EXPIRATION": 3,
+                "METRICS_TEXTFILE_PATH": os.path.join(temporary_dir, "metrics"),
+                "METRICS_API_PATH": os.path.join(temporary_dir, "metrics", "api"),
+                "EXPOSE_METRICS": True,
             }
         )
 
         # Create tables
         with app.app_context():
             from scoop_witness_api.utils import get_db
-            from scoop_witness_api.models import AccessKey, Capture
+            from scoop_witness_api.models import (
+                AccessKey,
+                Capture,
+                Counter,
+                CaptureDetail,
+                CaptureTiming,
+                Artifact,
+                ArtifactBlob,
+                CallbackDelivery,
+            )
 
-            get_db().create_tables([AccessKey, Capture])
+            get_db().create_tables(
+                [
+                    AccessKey,
+                    Capture,
+                    Counter,
+                    CaptureDetail,
+                    CaptureTiming,
+                    Artifact,
+                    ArtifactBlob,
+                    CallbackDelivery,
+                ]
+            )
 
         # Run tests
         yield app
@@ -51,8 +82,21 @@ def database_cleanup(app):
     Clear leftover records before each test.
     """
     with app.app_context():
-        from scoop_witness_api.models import AccessKey, Capture
+        from scoop_witness_api.models import (
+            AccessKey,
+            Capture,
+            CaptureDetail,
+            CaptureTiming,
+            Artifact,
+            ArtifactBlob,
+            CallbackDelivery,
+        )
 
+        CallbackDelivery.delete().execute()
+        ArtifactBlob.delete().execute()
+        Artifact.delete().execute()
+        CaptureTiming.delete().execute()
+        CaptureDetail.delete().execute()
         Capture.delete().execute()
         AccessKey.delete().execute()
 
@@ -75,6 +119,24 @@ def access_key(app) -> dict:
     return {"instance": access_key, "readable": access_key_readable}
 
 
+@pytest.fixture()
+def assert_max_queries():
+    """
+    Returns a context manager asserting that no more than `max_queries` database queries
+    are run within it. Helps catch N+1 queries on hot paths.
+    """
+
+    @contextmanager
+    def assert_max_queries(max_queries: int):
+        with count_queries() as counter:
+            yield counter
+
+        queries = "\n".join([str(query.msg) for query in counter.get_queries()])
+        assert counter.count <= max_queries, f"{counter.count} queries run:\n{queries}"
+
+    return assert_max_queries
+
+
 @pytest.fixture()
 def client(app):
     """Returns a Flask HTTP test client for the current app."""
@@ -114,3 +176,141 @@ def id_capture(app, client, access_key, default_capture_url) -> str:
         )
 
         return capture.get_json()["id_capture"]
+
+
+class S3StandIn:
+    """
+    WSGI app standing in for an S3-compatible object storage service (single bucket).
+    Supports what utils.storage.S3Storage needs: PUT, GET and DELETE of objects, and multipart
+    uploads. Checks the signature of every request, be it signed via headers or presigned.
+    Signatures are re-computed with S3Storage.sign(): this checks that what is signed matches what
+    is sent. The signing itself is checked against AWS's examples (see test_artifact.py).
+    Objects are kept in memory, by key.
+    """
+
+    def __init__(self, storage):
+        self.storage = storage  # utils.storage.S3Storage, used to re-compute signatures
+        self.objects = {}
+        self.content_types = {}
+        self.multipart_uploads = {}
+        self.requests = []
+
+    def __call__(self, environ, start_response):
+        request = Request(environ)
+        path, _, raw_query = environ["RAW_URI"].partition("?")
+        params = dict(parse_qsl(raw_query, keep_blank_values=True))
+        key = path.split(f"/{self.storage.bucket}/", 1)[1]
+
+        self.requests.append((request.method, key, params))
+
+        if not self.check_signature(request, path, params):
+            response = Response("<Error><Code>SignatureDoesNotMatch</Code></Error>", 403)
+        elif request.method == "POST" and "uploads" in params:
+            upload_id = uuid.uuid4().hex
+            self.multipart_uploads[upload_id] = {}
+            self.content_types[key] = request.content_type
+            response = Response(
+                "<InitiateMultipartUploadResult "
+                'xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+                f"<UploadId>{upload_id}</UploadId></InitiateMultipartUploadResult>"
+            )
+        elif request.method == "PUT" and "uploadId" in params:
+            data = request.get_data()
+            self.multipart_uploads[params["uploadId"]][int(params["partNumber"])] = data
+            response = Response("")
+            response.headers["ETag"] = f'"{hashlib.md5(data).hexdigest()}"'
+        elif request.method == "POST" and "uploadId" in params:
+            parts = self.multipart_uploads.pop(params["uploadId"])
+            self.objects[key] = b"".join(parts[number] for number in sorted(parts.keys()))
+            response = Response("<CompleteMultipartUploadResult/>")
+        elif request.method == "DELETE" and "uploadId" in params:
+            self.multipart_uploads.pop(params["uploadId"], None)
+            response = Response("", 204)
+        elif request.method == "PUT":
+            self.objects[key] = request.get_data()
+            self.content_types[key] = request.content_type
+            response = Response("")
+        elif request.method == "GET" and key in self.objects:
+            response = Response(self.objects[key], content_type=self.content_types.get(key))
+        elif request.method == "DELETE":
+            self.objects.pop(key, None)
+            response = Response("", 204)
+        else:
+            response = Response("<Error><Code>NoSuchKey</Code></Error>", 404)
+
+        return response(environ, start_response)
+
+    def check_signature(self, request, path: str, params: dict) -> bool:
+        """Signs the request as received, and compares signatures."""
+        # Presigned URL
+        if "X-Amz-Signature" in params:
+            signature = params.pop("X-Amz-Signature")
+            headers = {"Host": request.host}
+            payload_hash = "UNSIGNED-PAYLOAD"
+            amz_date = params["X-Amz-Date"]
+            expires = int(params["X-Amz-Expires"])
+        # Authorization header
+        else:
+            authorization = dict(
+                item.strip().split("=", 1)
+                for item in request.headers.get("Authorization", "").split(" ", 1)[1].split(",")
+            )
+            signature = authorization["Signature"]
+            headers = {
+                name: request.headers[name] for name in authorization["SignedHeaders"].split(";")
+            }
+            payload_hash = request.headers["X-Amz-Content-SHA256"]
+            amz_date = request.headers["X-Amz-Date"]
+            expires = 15 * 60
+
+            if payload_hash != hashlib.sha256(request.get_data()).hexdigest():
+                return False
+
+        timestamp = datetime.datetime.strptime(amz_date, "%Y%m%dT%H%M%SZ").replace(
+            tzinfo=datetime.timezone.utc
+        )
+
+        if datetime.datetime.now(datetime.timezone.utc) - timestamp > datetime.timedelta(
+            seconds=expires
+        ):
+            return False
+
+        query = self.storage.get_query_string(params)
+        expected = self.storage.sign(request.method, path, query, headers, payload_hash, timestamp)
+        return signature == expected[1]
+
+
+@pytest.fixture()
+def s3_stand_in(app):
+    """
+    Runs an S3-compatible stand-in on a random local port, and has the app store artifacts there
+    (STORAGE_BACKEND = "s3") for the duration of a test. Returns the stand-in (see S3StandIn).
+    """
+    from scoop_witness_api.utils.storage import S3Storage
+
+    original_config = {key: value for key, value in app.config.items() if key.startswith("STORAGE")}
+    server = make_server("127.0.0.1", 0, lambda environ, start_response: None, threaded=True)
+
+    app.config.update(
+        {
+            "STORAGE_BACKEND": "s3",
+            "STORAGE_S3_ENDPOINT_URL": f"http://127.0.0.1:{server.server_port}",
+            "STORAGE_S3_REGION": "us-east-1",
+            "STORAGE_S3_BUCKET": "scoop-witness-api",
+            "STORAGE_S3_PREFIX": "test",
+            "STORAGE_S3_ACCESS_KEY_ID": "access-key-id",
+            "STORAGE_S3_SECRET_ACCESS_KEY": "secret-access-key",
+            "STORAGE_S3_MULTIPART_CHUNK_SIZE": 1024,
+        }
+    )
+
+    stand_in = S3StandIn(S3Storage(app.config))
+    server.app = stand_in
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        yield stand_in
+    finally:
+        server.shutdown()
+        app.config.update(original_config)
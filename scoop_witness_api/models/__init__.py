@@ -1,5 +1,11 @@
 """
 `models` package: Classes to interact with the database.
 """
+from .counter import Counter
 from .access_key import AccessKey
 from .capture import Capture
+from .capture_detail import CaptureDetail
+from .capture_timing import CaptureTiming
+from .artifact import Artifact
+from .artifact_blob import ArtifactBlob
+from .callback_delivery import CallbackDelivery
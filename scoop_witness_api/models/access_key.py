@@ -2,11 +2,13 @@
 `models.access_key` module: Class to interact wit the "access_key" table.
 """
 import uuid
+import datetime
 
 import bcrypt
 import peewee
 
 from ..utils import get_db
+from .counter import Counter
 
 
 class AccessKey(peewee.Model):
@@ -25,10 +27,30 @@ class AccessKey(peewee.Model):
     key_digest = peewee.CharField(max_length=256, null=False, unique=True, index=True)
     """Argon2 digest."""
 
+    GENERATION_COUNTER = "access_key_generation"
+    """Name of the counter incremented every time access keys are invalidated."""
+
     class Meta:
         table_name = "access_key"
         database = get_db()
 
+    def cancel(self) -> None:
+        """
+        Makes this access key inoperable.
+        Bumps the access keys generation counter so other processes drop cached copies of it.
+        """
+        with self._meta.database.atomic():
+            self.canceled_timestamp = datetime.datetime.utcnow()
+            self.save()
+            Counter.increment(self.GENERATION_COUNTER)
+
+    @classmethod
+    def get_generation(cls) -> int:
+        """
+        Returns the current value of the access keys generation counter.
+        """
+        return Counter.get_value(cls.GENERATION_COUNTER)
+
     @classmethod
     def create_key_digest(cls, key="", salt="") -> tuple:
         """
@@ -0,0 +1,61 @@
+"""
+`models.artifact` module: Class to interact wit the "artifact" table.
+"""
+import os
+import hashlib
+import mimetypes
+
+import peewee
+
+from ..models import Capture
+from ..utils import get_db
+
+
+class Artifact(peewee.Model):
+    """
+    "artifact" table definition. Manifest of the files generated by a successful capture.
+    Recorded once, at the end of the capture process: the API does not need to access storage to
+    list artifacts.
+    """
+
+    id_artifact = peewee.AutoField()
+
+    id_capture = peewee.ForeignKeyField(model=Capture, field="id_capture", index=True)
+
+    filename = peewee.CharField(max_length=255, null=False)
+    """Filename, as exposed under /artifact/<id_capture>/<filename>."""
+
+    size = peewee.BigIntegerField(null=False)
+    """Size in bytes."""
+
+    sha256 = peewee.CharField(max_length=64, null=False)
+    """Hex-encoded SHA-256 digest of the file's contents."""
+
+    content_type = peewee.CharField(max_length=255, null=False)
+
+    deduplicated = peewee.BooleanField(null=False, default=False)
+    """Was this file linked to a blob of the content-addressed store? (see models.ArtifactBlob)"""
+
+    class Meta:
+        table_name = "artifact"
+        database = get_db()
+        indexes = ((("id_capture", "filename"), True),)
+
+    @classmethod
+    def describe_file(cls, path: str) -> dict:
+        """
+        Returns filename, size, sha256 and content_type for a given file, as a dictionary.
+        """
+        digest = hashlib.sha256()
+        filename = os.path.basename(path)
+
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+
+        return {
+            "filename": filename,
+            "size": os.path.getsize(path),
+            "sha256": digest.hexdigest(),
+            "content_type": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+        }
@@ -0,0 +1,63 @@
+"""
+`models.artifact_blob` module: Class to interact wit the "artifact_blob" table.
+"""
+import peewee
+
+from ..utils import get_db
+
+
+class ArtifactBlob(peewee.Model):
+    """
+    "artifact_blob" table definition. Reference counts of the content-addressed store
+    (see utils.artifact_storage). A blob is referenced once per artifact linked to it.
+    """
+
+    sha256 = peewee.CharField(max_length=64, primary_key=True, null=False)
+    """Hex-encoded SHA-256 digest of the blob's contents. Determines its path in the store."""
+
+    size = peewee.BigIntegerField(null=False)
+    """Size in bytes."""
+
+    references = peewee.IntegerField(null=False, default=0, index=True)
+    """How many artifacts are linked to this blob."""
+
+    class Meta:
+        table_name = "artifact_blob"
+        database = get_db()
+
+    @classmethod
+    def add_references(cls, blobs: list) -> None:
+        """
+        Adds a reference to each blob in a list of {"sha256", "size"} dicts.
+        Blobs are created as needed.
+        """
+        for blob in blobs:
+            (
+                cls.insert(sha256=blob["sha256"], size=blob["size"], references=1)
+                .on_conflict(
+                    conflict_target=[cls.sha256],
+                    update={cls.references: cls.references + 1},
+                )
+                .execute()
+            )
+
+    @classmethod
+    def remove_references(cls, sha256_list: list) -> None:
+        """
+        Removes a reference to each blob in a list of hashes. A hash can be listed multiple times.
+        """
+        for sha256 in sha256_list:
+            cls.update(references=cls.references - 1).where(cls.sha256 == sha256).execute()
+
+    @classmethod
+    def delete_unreferenced(cls, sha256: str) -> bool:
+        """
+        Deletes the record of a given blob, unless it was referenced again in the meantime.
+        Returns True if the record was deleted.
+        """
+        return cls.delete().where(cls.sha256 == sha256, cls.references <= 0).execute() > 0
+
+    @classmethod
+    def get_unreferenced(cls) -> list:
+        """Returns the hashes of the blobs no artifact is linked to anymore."""
+        return [row[0] for row in cls.select(cls.sha256).where(cls.references <= 0).tuples()]
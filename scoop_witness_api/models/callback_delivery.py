@@ -0,0 +1,113 @@
+"""
+`models.callback_delivery` module: Class to interact wit the "callback_delivery" table.
+"""
+import datetime
+
+import peewee
+from ..models import Capture
+from ..utils import get_db
+
+
+class CallbackDelivery(peewee.Model):
+    """
+    "callback_delivery" table definition. Queue of webhook calls to be made upon capture completion.
+    Filled by capture processes, consumed by the `deliver-callbacks` command.
+    """
+
+    id_callback_delivery = peewee.AutoField()
+
+    id_capture = peewee.ForeignKeyField(model=Capture, field="id_capture", index=True)
+
+    callback_url = peewee.TextField(null=False)
+
+    payload = peewee.BlobField(null=False)
+    """JSON object to be POSTed to callback_url, serialized once (see utils.capture_to_json)."""
+
+    status = peewee.CharField(
+        max_length=16,
+        choices=["pending", "delivered", "failed"],
+        default="pending",
+    )
+    """Current status can be: "pending", "delivered", "failed" (gave up after max attempts)."""
+
+    attempts = peewee.IntegerField(null=False, default=0)
+
+    created_timestamp = peewee.TimestampField(utc=True, resolution=1000, null=False)
+
+    next_attempt_timestamp = peewee.TimestampField(utc=True, resolution=1000, null=False)
+    """Delivery will not be attempted before that point in time."""
+
+    delivered_timestamp = peewee.TimestampField(utc=True, resolution=1000, null=True, default=None)
+
+    last_error = peewee.TextField(null=True)
+
+    class Meta:
+        table_name = "callback_delivery"
+        database = get_db()
+        indexes = ((("status", "next_attempt_timestamp"), False),)
+
+    @classmethod
+    def enqueue(cls, capture, payload: bytes):
+        """
+        Schedules a call to the callback URL of a given capture, as soon as possible.
+        """
+        now = datetime.datetime.utcnow()
+
+        return cls.create(
+            id_capture=capture.id_capture,
+            callback_url=capture.callback_url,
+            payload=payload,
+            created_timestamp=now,
+            next_attempt_timestamp=now,
+        )
+
+    @classmethod
+    def claim_due(cls, limit: int, lease: int) -> list:
+        """
+        Atomically picks up to `limit` pending deliveries that are due, and returns them.
+        Claimed deliveries are pushed back by `lease` seconds: parallel senders cannot pick them
+        up in the meantime, and they become due again if the sender stops before reporting back.
+        """
+        now = datetime.datetime.utcnow()
+
+        due = (
+            cls.select(cls.id_callback_delivery)
+            .where(cls.status == "pending", cls.next_attempt_timestamp <= now)
+            .order_by(cls.next_attempt_timestamp)
+            .limit(limit)
+        )
+
+        with cls._meta.database.atomic(lock_type="IMMEDIATE"):
+            return list(
+                cls.update(next_attempt_timestamp=now + datetime.timedelta(seconds=lease))
+                .where(cls.id_callback_delivery.in_(due))
+                .returning(cls)
+                .execute()
+            )
+
+    def mark_delivered(self) -> None:
+        """Records a successful delivery attempt."""
+        self.attempts += 1
+        self.status = "delivered"
+        self.delivered_timestamp = datetime.datetime.utcnow()
+        self.last_error = None
+        self.save()
+
+    def mark_attempt_failed(self, error: str, max_attempts: int, backoff: int) -> None:
+        """
+        Records a failed delivery attempt.
+        Next attempt is delayed exponentially: `backoff` seconds, then twice as long every time.
+        Delivery is marked as "failed" once `max_attempts` is reached.
+        """
+        self.attempts += 1
+        self.last_error = error
+
+        if self.attempts >= max_attempts:
+            self.status = "failed"
+        else:
+            delay = backoff * 2 ** (self.attempts - 1)
+            self.next_attempt_timestamp = datetime.datetime.utcnow() + datetime.timedelta(
+                seconds=delay
+            )
+
+        self.save()
@@ -2,13 +2,17 @@
 `models.capture` module: Class to interact wit the "capture" table.
 """
 import uuid
+import datetime
 
 import peewee
 from playhouse.sqlite_ext import JSONField
 
-from ..models import AccessKey
+from ..models import AccessKey, Counter
 from ..utils import get_db
 
+PENDING_DELTA = "(NEW.status = 'pending') - (OLD.status = 'pending')"
+""" SQL expression: change in pending captures count caused by a status update (-1, 0 or 1). """
+
 
 class Capture(peewee.Model):
     """
@@ -29,6 +33,12 @@ class Capture(peewee.Model):
         utc=True, resolution=1000, null=True, default=None, index=True
     )
 
+    expires_timestamp = peewee.TimestampField(utc=True, resolution=1000, null=True, default=None)
+    """When this capture's files are due for deletion (see `cleanup`). Set when it is claimed."""
+
+    purged = peewee.BooleanField(null=False, default=False)
+    """Have this capture's files been deleted from storage? (see `cleanup`)."""
+
     url = peewee.TextField(null=False)
 
     callback_url = peewee.TextField(null=True)
@@ -44,15 +54,144 @@ class Capture(peewee.Model):
     )
     """Current status can be: "pending", "started", "failed"."""
 
-    stdout_logs = peewee.TextField(null=True)
-    """STDOUT Logs generated by the capture software."""
-
-    stderr_logs = peewee.TextField(null=True)
-    """STDERR Logs generated by the capture software."""
+    PENDING_COUNTER = "pending_captures"
+    """Name of the counter tracking how many captures are pending. Maintained by triggers."""
 
-    summary = JSONField(null=True)
-    """JSON object summarizing capture info."""
+    EXPIRATION_INDEX = "capture_expires_timestamp_unpurged"
+    """
+    Name of the partial index of captures whose files have not been deleted yet, by expiration.
+    Lets `cleanup` visit due captures only (see get_expired()).
+    """
 
     class Meta:
         table_name = "capture"
         database = get_db()
+
+    @classmethod
+    def create_table(cls, safe=True, **options) -> None:
+        """
+        Creates the "capture" table, as well as the triggers maintaining the pending captures
+        counter and the partial index of captures to clean up (see EXPIRATION_INDEX).
+        The counter is (re)initialized from the current state of the table.
+        """
+        super().create_table(safe=safe, **options)
+        Counter.create_table(safe=True)
+
+        db = cls._meta.database
+        increment = f"UPDATE counter SET value = value + {{}} WHERE name = '{cls.PENDING_COUNTER}';"
+
+        with db.atomic():
+            db.execute_sql(
+                "CREATE TRIGGER IF NOT EXISTS capture_pending_insert "
+                "AFTER INSERT ON capture WHEN NEW.status = 'pending' "
+                f"BEGIN {increment.format('1')} END;"
+            )
+
+            db.execute_sql(
+                "CREATE TRIGGER IF NOT EXISTS capture_pending_update "
+                "AFTER UPDATE OF status ON capture WHEN OLD.status IS NOT NEW.status "
+                f"BEGIN {increment.format(PENDING_DELTA)} END;"
+            )
+
+            db.execute_sql(
+                "CREATE TRIGGER IF NOT EXISTS capture_pending_delete "
+                "AFTER DELETE ON capture WHEN OLD.status = 'pending' "
+                f"BEGIN {increment.format('-1')} END;"
+            )
+
+            db.execute_sql(
+                f"CREATE INDEX IF NOT EXISTS {cls.EXPIRATION_INDEX} "
+                "ON capture (expires_timestamp, id_capture) WHERE purged = 0"
+            )
+
+            Counter.replace(
+                name=cls.PENDING_COUNTER,
+                value=cls.select().where(cls.status == "pending").count(),
+            ).execute()
+
+    @classmethod
+    def count_pending(cls) -> int:
+        """
+        Returns the number of pending captures, as tracked by the pending captures counter.
+        """
+        return Counter.get_value(cls.PENDING_COUNTER)
+
+    @classmethod
+    def get_oldest_pending_age(cls) -> float:
+        """
+        Returns for how long the oldest pending capture has been waiting, in seconds.
+        Returns 0 if the queue is empty.
+        """
+        oldest = (
+            cls.select(peewee.fn.MIN(cls.created_timestamp)).where(cls.status == "pending").scalar()
+        )
+
+        if not oldest:
+            return 0.0
+
+        return (datetime.datetime.utcnow() - oldest).total_seconds()
+
+    @classmethod
+    def claim_next(cls, expiration: int = None):
+        """
+        Atomically marks the oldest pending capture as "started" and returns it.
+        Returns None if the queue is empty.
+        Files created for this capture will be due for deletion in `expiration` seconds, if set.
+
+        Captures created at the same time (i.e. via [POST] /captures/batch) are claimed in order of
+        insertion, using SQLite's rowid as a tiebreaker.
+
+        Selection and update happen in a single UPDATE ... RETURNING statement, run inside of an
+        IMMEDIATE transaction: parallel capture processes cannot claim the same capture.
+        """
+        oldest_pending = (
+            cls.select(cls.id_capture)
+            .where(cls.status == "pending")
+            .order_by(cls.created_timestamp, peewee.SQL("rowid"))
+            .limit(1)
+        )
+
+        now = datetime.datetime.utcnow()
+        expires_timestamp = None
+
+        if expiration is not None:
+            expires_timestamp = now + datetime.timedelta(seconds=expiration)
+
+        with cls._meta.database.atomic(lock_type="IMMEDIATE"):
+            captures = list(
+                cls.update(
+                    status="started",
+                    started_timestamp=now,
+                    expires_timestamp=expires_timestamp,
+                )
+                .where(cls.id_capture == oldest_pending, cls.status == "pending")
+                .returning(cls)
+                .execute()
+            )
+
+        return captures[0] if captures else None
+
+    @classmethod
+    def get_expired(cls, limit: int, after=None) -> list:
+        """
+        Returns up to `limit` captures whose files are due for deletion and have not been purged,
+        in order of expiration. Only id_capture and expires_timestamp are pulled.
+
+        `after` is the last capture of the previous batch, if any: batches are paginated using
+        (expires_timestamp, id_capture) as a cursor, which EXPIRATION_INDEX covers.
+        """
+        query = cls.select(cls.id_capture, cls.expires_timestamp).where(
+            cls.purged == False,  # noqa: E712
+            cls.expires_timestamp <= datetime.datetime.utcnow(),
+        )
+
+        if after:
+            query = query.where(
+                peewee.Tuple(cls.expires_timestamp, cls.id_capture)
+                > (
+                    cls.expires_timestamp.db_value(after.expires_timestamp),
+                    cls.id_capture.db_value(after.id_capture),
+                )
+            )
+
+        return list(query.order_by(cls.expires_timestamp, cls.id_capture).limit(limit))
@@ -0,0 +1,30 @@
+"""
+`models.capture_detail` module: Class to interact wit the "capture_detail" table.
+"""
+import peewee
+from playhouse.sqlite_ext import JSONField
+
+from ..models import Capture
+from ..utils import get_db
+
+
+class CaptureDetail(peewee.Model):
+    """
+    "capture_detail" table definition. Heavy, seldom-read properties of a capture.
+    Kept apart from the "capture" table so queries on the capture queue stay light.
+    """
+
+    id_capture = peewee.ForeignKeyField(model=Capture, field="id_capture", primary_key=True)
+
+    stdout_logs = peewee.TextField(null=True)
+    """STDOUT Logs generated by the capture software (tail, see SCOOP_LOGS_TAIL_SIZE)."""
+
+    stderr_logs = peewee.TextField(null=True)
+    """STDERR Logs generated by the capture software (tail, see SCOOP_LOGS_TAIL_SIZE)."""
+
+    summary = JSONField(null=True)
+    """JSON object summarizing capture info."""
+
+    class Meta:
+        table_name = "capture_detail"
+        database = get_db()
@@ -0,0 +1,62 @@
+"""
+`models.capture_timing` module: Class to interact wit the "capture_timing" table.
+"""
+import peewee
+
+from ..models import Capture
+from ..utils import get_db
+
+
+class CaptureTiming(peewee.Model):
+    """
+    "capture_timing" table definition. How long each phase of a capture took, in seconds.
+    Written by capture processes upon completion. See `capture-timings` for a report.
+
+    Phases that did not happen, or could not be measured, are NULL.
+    Time spent delivering callbacks is not stored here (see models.CallbackDelivery).
+    """
+
+    id_capture = peewee.ForeignKeyField(model=Capture, field="id_capture", primary_key=True)
+
+    queue_time = peewee.FloatField(null=True)
+    """Time spent waiting in the queue: from creation to claim by a capture process."""
+
+    claim_time = peewee.FloatField(null=True)
+    """Time spent by the capture process claiming the capture (see Capture.claim_next)."""
+
+    scoop_startup_time = peewee.FloatField(null=True)
+    """Time between spawning Scoop and Scoop starting the capture ("startedAt" in its summary)."""
+
+    scoop_capture_time = peewee.FloatField(null=True)
+    """Time between Scoop starting the capture and Scoop exiting."""
+
+    scoop_time = peewee.FloatField(null=True)
+    """Wall time of the Scoop subprocess, startup included."""
+
+    verification_time = peewee.FloatField(null=True)
+    """
+    Time spent checking Scoop's output, describing (hashing), deduplicating and, if they are not
+    stored locally, uploading artifacts.
+    """
+
+    save_time = peewee.FloatField(null=True)
+    """Time spent saving the capture's results to the database."""
+
+    total_time = peewee.FloatField(null=True)
+    """From creation to completion."""
+
+    PHASES = [
+        "queue_time",
+        "claim_time",
+        "scoop_startup_time",
+        "scoop_capture_time",
+        "scoop_time",
+        "verification_time",
+        "save_time",
+        "total_time",
+    ]
+    """Names of the fields holding timings, in chronological order."""
+
+    class Meta:
+        table_name = "capture_timing"
+        database = get_db()
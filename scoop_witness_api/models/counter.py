@@ -0,0 +1,40 @@
+"""
+`models.counter` module: Class to interact wit the "counter" table.
+"""
+import peewee
+
+from ..utils import get_db
+
+
+class Counter(peewee.Model):
+    """
+    "counter" table definition. Named integer values shared between processes.
+    """
+
+    name = peewee.CharField(max_length=64, primary_key=True, null=False)
+
+    value = peewee.IntegerField(null=False, default=0)
+
+    class Meta:
+        table_name = "counter"
+        database = get_db()
+
+    @classmethod
+    def get_value(cls, name: str) -> int:
+        """
+        Returns the current value of a given counter.
+        Counters that were never incremented have a value of 0.
+        """
+        value = cls.select(cls.value).where(cls.name == name).scalar()
+        return int(value) if value else 0
+
+    @classmethod
+    def increment(cls, name: str, by: int = 1) -> None:
+        """
+        Atomically increments (or decrements) a given counter, creating it if needed.
+        """
+        (
+            cls.insert(name=name, value=by)
+            .on_conflict(conflict_target=[cls.name], update={cls.value: cls.value + by})
+            .execute()
+        )
@@ -32,3 +32,19 @@ def test_cancel_access_key_cli_valid_id_access_key(runner, access_key):
     access_key["instance"] = AccessKey.get(AccessKey.id_access_key == id_access_key)
 
     assert access_key["instance"].canceled_timestamp is not None
+
+
+def test_cancel_access_key_cli_invalidates_cache(client, runner, access_key, id_capture):
+    """cancel-access-key command makes a cached access key inoperable."""
+    id_access_key = access_key["instance"].id_access_key
+    headers = {"Access-Key": access_key["readable"]}
+
+    # Access key is now verified and cached
+    response = client.get(f"/capture/{id_capture}", headers=headers)
+    assert response.status_code == 200
+
+    result = runner.invoke(args=f"cancel-access-key --id_access_key={id_access_key}")
+    assert result.exit_code == 0
+
+    response = client.get(f"/capture/{id_capture}", headers=headers)
+    assert response.status_code == 403
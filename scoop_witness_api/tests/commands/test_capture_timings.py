@@ -0,0 +1,59 @@
+"""
+Test suite for the "capture-timings" command.
+"""
+import datetime
+
+
+def test_capture_timings_cli(runner, access_key, default_capture_url):
+    """capture-timings command prints percentiles per phase for captures created since --since."""
+    from scoop_witness_api.models import Capture, CaptureTiming, CallbackDelivery
+
+    now = datetime.datetime.utcnow()
+
+    # 10 recent captures, with scoop_time going from 1 to 10 seconds
+    for i in range(1, 11):
+        capture = Capture.create(
+            id_access_key=access_key["instance"].id_access_key,
+            url=default_capture_url,
+            status="success",
+            created_timestamp=now,
+            ended_timestamp=now,
+        )
+        CaptureTiming.create(id_capture=capture.id_capture, scoop_time=float(i))
+
+    # Delivered callback, 2 seconds after completion
+    capture.callback_url = "https://example.com/callback"
+    delivery = CallbackDelivery.enqueue(capture, b"{}")
+    delivery.status = "delivered"
+    delivery.delivered_timestamp = now + datetime.timedelta(seconds=2)
+    delivery.save()
+
+    # Older capture, to be left out
+    capture = Capture.create(
+        id_access_key=access_key["instance"].id_access_key,
+        url=default_capture_url,
+        status="success",
+        created_timestamp=now - datetime.timedelta(days=2),
+    )
+    CaptureTiming.create(id_capture=capture.id_capture, scoop_time=100.0)
+
+    result = runner.invoke(args="capture-timings --since 24h")
+    assert result.exit_code == 0
+
+    lines = {line.split()[0]: line.split()[1:] for line in result.output.splitlines()[3:]}
+    assert lines["scoop_time"] == ["10", "5.000", "9.000", "10.000", "10.000"]
+    assert lines["callback_time"] == ["1", "2.000", "2.000", "2.000", "2.000"]
+    assert lines["queue_time"] == ["0"]
+
+    # ISO 8601 dates are accepted as well
+    result = runner.invoke(
+        args=f"capture-timings --since {(now - datetime.timedelta(days=3)).isoformat()}"
+    )
+    assert result.exit_code == 0
+    assert "scoop_time                11" in result.output
+
+
+def test_capture_timings_cli_invalid_since(runner):
+    """capture-timings command returns an error code if --since is invalid."""
+    result = runner.invoke(args="capture-timings --since yesterday")
+    assert result.exit_code == 1
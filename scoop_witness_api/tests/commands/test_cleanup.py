@@ -3,10 +3,19 @@ Test suite for the "cleanup" command.
 """
 import time
 import os
+import datetime
 
 from flask import current_app
 
 
+def expire(capture) -> None:
+    """Makes a capture due for cleanup (see models.Capture.expires_timestamp)."""
+    from scoop_witness_api.models import Capture
+
+    past = datetime.datetime.utcnow() - datetime.timedelta(seconds=1)
+    Capture.update(expires_timestamp=past).where(Capture.id_capture == capture.id_capture).execute()
+
+
 def test_cleanup_cli(runner, access_key, id_capture):
     """cleanup command deletes obsolete files and returns exit code 0."""
 
@@ -35,3 +44,174 @@ def test_cleanup_cli(runner, access_key, id_capture):
     assert before_cleanup != after_cleanup
     assert after_cleanup == 0
     assert result.exit_code == 0
+
+
+def test_cleanup_cli_blobs(runner, access_key, default_capture_url):
+    """cleanup command only deletes blobs once no unexpired capture references them."""
+    from scoop_witness_api.models import Capture, Artifact, ArtifactBlob
+    from scoop_witness_api.utils import get_artifact_path, get_blob_path, link_to_blob
+
+    captures = []
+
+    # Two captures with the same attachment, deduplicated
+    for i in range(0, 2):
+        capture = Capture.create(
+            id_access_key=access_key["instance"].id_access_key, url=default_capture_url
+        )
+        filepath = get_artifact_path(capture.id_capture, "screenshot.png")
+        os.makedirs(os.path.dirname(filepath))
+
+        with open(filepath, "w") as file:
+            file.write("png")
+
+        artifact = Artifact.describe_file(filepath)
+        assert link_to_blob(filepath, artifact["sha256"])
+        Artifact.create(id_capture=capture.id_capture, deduplicated=True, **artifact)
+        ArtifactBlob.add_references([artifact])
+
+        captures.append(capture)
+
+    blob_path = get_blob_path(artifact["sha256"])
+
+    # First capture expires: blob is still referenced by the second one
+    expire(captures[0])
+    result = runner.invoke(args="cleanup")
+
+    assert result.exit_code == 0
+    assert ArtifactBlob.get_by_id(artifact["sha256"]).references == 1
+    assert os.path.exists(blob_path)
+
+    # Second capture expires: blob goes
+    expire(captures[1])
+    result = runner.invoke(args="cleanup")
+
+    assert result.exit_code == 0
+    assert ArtifactBlob.get_or_none(ArtifactBlob.sha256 == artifact["sha256"]) is None
+    assert not os.path.exists(blob_path)
+
+
+def test_cleanup_cli_blobs_references(runner, access_key, default_capture_url):
+    """
+    cleanup command releases blob references based on what the database recorded, even if
+    the blob is missing from disk, and leaves blobs referenced again while being deleted alone.
+    """
+    from scoop_witness_api.models import Capture, Artifact, ArtifactBlob
+    from scoop_witness_api.utils import get_artifact_path, get_blob_path, link_to_blob
+    from scoop_witness_api.utils import delete_blob
+
+    capture = Capture.create(
+        id_access_key=access_key["instance"].id_access_key, url=default_capture_url
+    )
+    filepath = get_artifact_path(capture.id_capture, "screenshot.png")
+    os.makedirs(os.path.dirname(filepath))
+
+    with open(filepath, "w") as file:
+        file.write("png")
+
+    artifact = Artifact.describe_file(filepath)
+    assert link_to_blob(filepath, artifact["sha256"])
+    Artifact.create(id_capture=capture.id_capture, deduplicated=True, **artifact)
+    ArtifactBlob.add_references([artifact])
+    blob_path = get_blob_path(artifact["sha256"])
+
+    # Blob referenced again while it is being deleted: put back
+    assert not delete_blob(artifact["sha256"], lambda sha256: False)
+    assert os.path.exists(blob_path)
+    assert os.listdir(os.path.dirname(blob_path)) == [artifact["sha256"]]
+
+    # Blob is gone from disk: its reference is released nonetheless
+    os.remove(blob_path)
+    expire(capture)
+    result = runner.invoke(args="cleanup")
+
+    assert result.exit_code == 0
+    assert ArtifactBlob.get_or_none(ArtifactBlob.sha256 == artifact["sha256"]) is None
+
+
+def test_cleanup_cli_s3(runner, access_key, default_capture_url, s3_stand_in):
+    """cleanup command deletes artifacts from the bucket if they are stored in one."""
+    from scoop_witness_api.models import Capture, Artifact
+    from scoop_witness_api.utils import get_storage
+
+    capture = Capture.create(
+        id_access_key=access_key["instance"].id_access_key, url=default_capture_url
+    )
+    directory = os.path.join(current_app.config["TEMPORARY_STORAGE_PATH"], str(capture.id_capture))
+    storage = get_storage()
+
+    # Artifacts are in the bucket, logs in storage
+    os.makedirs(directory)
+
+    for filename in ["archive.wacz", "screenshot.png"]:
+        Artifact.create(
+            id_capture=capture.id_capture, filename=filename, size=3, sha256="", content_type=""
+        )
+        s3_stand_in.objects[storage.get_key(capture.id_capture, filename)] = b"foo"
+
+    expire(capture)
+    result = runner.invoke(args="cleanup")
+
+    assert result.exit_code == 0
+    assert s3_stand_in.objects == {}
+    assert not os.path.exists(directory)
+
+
+def test_cleanup_cli_batches(runner, access_key, default_capture_url, assert_max_queries):
+    """cleanup command only visits expired captures, in batches, and marks them as purged."""
+    from scoop_witness_api.models import Capture, Artifact
+    from scoop_witness_api.utils import capture_to_dict, get_db
+
+    captures = []
+
+    for i in range(0, 6):
+        capture = Capture.create(
+            id_access_key=access_key["instance"].id_access_key,
+            url=default_capture_url,
+            status="success",
+        )
+        directory = os.path.join(
+            current_app.config["TEMPORARY_STORAGE_PATH"], str(capture.id_capture)
+        )
+        os.makedirs(directory)
+        Artifact.create(
+            id_capture=capture.id_capture,
+            filename="archive.wacz",
+            size=0,
+            sha256="",
+            content_type="",
+        )
+        captures.append((capture, directory))
+
+    # 5 captures are due, 1 is not
+    for capture, directory in captures[0:5]:
+        expire(capture)
+
+    # Expired captures are found using the partial index
+    with assert_max_queries(1) as counter:
+        Capture.get_expired(2)
+
+    sql, params = counter.get_queries()[0].msg
+    plan = get_db().execute_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    assert Capture.EXPIRATION_INDEX in str(plan)
+
+    result = runner.invoke(args="cleanup --batch-size 2")
+
+    assert result.exit_code == 0
+    assert "5 expired capture(s) purged, 0 to be retried." in result.output
+
+    for capture, directory in captures[0:5]:
+        capture = Capture.get_by_id(capture.id_capture)
+        assert capture.purged
+        assert not os.path.exists(directory)
+        assert capture_to_dict(capture)["artifacts"] == []
+        assert "temporary_playback_url" not in capture_to_dict(capture)
+
+    capture, directory = captures[5]
+    capture = Capture.get_by_id(capture.id_capture)
+    assert not capture.purged
+    assert os.path.exists(directory)
+    assert len(capture_to_dict(capture)["artifacts"]) == 1
+
+    # Purged captures are not visited again
+    result = runner.invoke(args="cleanup --batch-size 2")
+    assert "0 expired capture(s) purged, 0 to be retried." in result.output
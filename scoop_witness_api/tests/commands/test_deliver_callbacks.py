@@ -0,0 +1,142 @@
+"""
+Test suite for the "deliver-callbacks" command.
+"""
+import os
+import json
+import time
+import datetime
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+from flask import current_app
+
+
+@pytest.fixture()
+def callback_server():
+    """
+    Local HTTP server recording the JSON bodies and content types POSTed to it.
+    Responds with `server.status_code`, after a second if the path ends with "/slow".
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers["Content-Length"]))
+
+            if self.path.endswith("/slow"):
+                time.sleep(1)
+
+            self.server.received.append(json.loads(body))
+            self.server.content_types.append(self.headers["Content-Type"])
+            self.send_response(self.server.status_code)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.received = []
+    server.content_types = []
+    server.status_code = 200
+    server.url = f"http://127.0.0.1:{server.server_port}/callback"
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield server
+
+    server.shutdown()
+    server.server_close()
+
+
+def enqueue_callback(id_capture: str, callback_url: str):
+    """Queues a callback for a given capture, as a capture process would upon completion."""
+    from scoop_witness_api.models import Capture, CallbackDelivery
+    from scoop_witness_api.utils import capture_to_json
+
+    capture = Capture.get(Capture.id_capture == id_capture)
+    capture.callback_url = callback_url
+    capture.save()
+
+    return CallbackDelivery.enqueue(capture, capture_to_json(capture))
+
+
+def test_deliver_callbacks_cli(runner, id_capture, callback_server):
+    """deliver-callbacks command POSTs queued payloads and marks them as delivered."""
+    from scoop_witness_api.models import CallbackDelivery
+
+    delivery = enqueue_callback(id_capture, callback_server.url)
+
+    result = runner.invoke(args="deliver-callbacks --single-run")
+    assert result.exit_code == 0
+
+    delivery = CallbackDelivery.get_by_id(delivery.id_callback_delivery)
+    assert delivery.status == "delivered"
+    assert delivery.attempts == 1
+    assert delivery.delivered_timestamp
+
+    assert len(callback_server.received) == 1
+    assert callback_server.content_types[0] == "application/json"
+    assert callback_server.received[0]["id_capture"] == id_capture
+    assert callback_server.received[0]["callback_url"] == callback_server.url
+
+    # Metrics are written for node_exporter's textfile collector
+    metrics_filepath = os.path.join(
+        current_app.config["METRICS_TEXTFILE_PATH"], "deliver-callbacks.prom"
+    )
+
+    with open(metrics_filepath) as file:
+        assert 'scoop_callback_deliveries_total{outcome="delivered"}' in file.read()
+
+
+def test_deliver_callbacks_cli_retries(runner, id_capture, callback_server, monkeypatch):
+    """deliver-callbacks command retries failed deliveries later, then gives up."""
+    from scoop_witness_api.models import CallbackDelivery
+
+    monkeypatch.setitem(current_app.config, "CALLBACK_DELIVERY_MAX_ATTEMPTS", 2)
+    callback_server.status_code = 500
+
+    delivery = enqueue_callback(id_capture, callback_server.url)
+
+    # First attempt fails: delivery is pushed back by CALLBACK_DELIVERY_BACKOFF seconds
+    result = runner.invoke(args="deliver-callbacks --single-run")
+    assert result.exit_code == 0
+
+    delivery = CallbackDelivery.get_by_id(delivery.id_callback_delivery)
+    assert delivery.status == "pending"
+    assert delivery.attempts == 1
+    assert delivery.last_error
+    assert delivery.next_attempt_timestamp > datetime.datetime.utcnow()
+
+    # Not due yet: nothing happens
+    runner.invoke(args="deliver-callbacks --single-run")
+    assert len(callback_server.received) == 1
+
+    # Second and last attempt fails: delivery is marked as failed
+    delivery.next_attempt_timestamp = datetime.datetime.utcnow()
+    delivery.save()
+
+    result = runner.invoke(args="deliver-callbacks --single-run")
+    assert result.exit_code == 0
+
+    delivery = CallbackDelivery.get_by_id(delivery.id_callback_delivery)
+    assert delivery.status == "failed"
+    assert delivery.attempts == 2
+    assert len(callback_server.received) == 2
+
+
+def test_deliver_callbacks_cli_slow_endpoint(runner, id_capture, callback_server, monkeypatch):
+    """deliver-callbacks command keeps delivering while a callback URL is slow to respond."""
+    monkeypatch.setitem(current_app.config, "CALLBACK_DELIVERY_CONCURRENCY", 2)
+
+    urls = [f"{callback_server.url}/slow"] + [f"{callback_server.url}/{i}" for i in range(0, 3)]
+
+    for url in urls:
+        enqueue_callback(id_capture, url)
+
+    result = runner.invoke(args="deliver-callbacks --single-run")
+    assert result.exit_code == 0
+
+    # Other deliveries went through the second worker while the first was waiting
+    received = [payload["callback_url"] for payload in callback_server.received]
+    assert received == urls[1:] + urls[0:1]
@@ -1,7 +1,13 @@
 """
 Test suite for the "inspect-capture" command.
 """
+import os
+import sys
 import json
+import shutil
+import subprocess
+
+from flask import current_app
 
 
 def test_inspect_capture_cli_invalid_id_capture(runner, id_capture):
@@ -25,3 +31,42 @@ def test_inspect_capture_cli_valid_id_capture(runner, id_capture):
     assert str(capture_from_db.id_capture) == capture_from_cli["id_capture"]
     assert capture_from_db.url == capture_from_cli["url"]
     assert capture_from_db.status == capture_from_cli["status"]
+    assert capture_from_db.id_access_key_id == capture_from_cli["id_access_key"]
+
+
+def test_inspect_capture_cli_full_logs(runner, id_capture):
+    """inspect-capture command returns full logs from storage, while the database holds a tail."""
+    from scoop_witness_api.models import CaptureDetail
+    from scoop_witness_api.utils import ScoopLogsWriter, get_scoop_logs_path
+
+    storage_path = os.path.join(current_app.config["TEMPORARY_STORAGE_PATH"], id_capture)
+    os.makedirs(storage_path)
+
+    try:
+        # Stream 1000 lines of logs through ScoopLogsWriter, keep 1KB of tail
+        process = subprocess.Popen(
+            [sys.executable, "-c", "for i in range(0, 1000): print(f'Line {i}')"],
+            stdout=subprocess.PIPE,
+        )
+
+        writer = ScoopLogsWriter(process.stdout, get_scoop_logs_path(id_capture, "stdout"), 1024)
+        writer.start()
+        process.wait()
+        writer.join()
+
+        assert len(writer.tail()) < 1024 * 2
+        assert writer.tail().startswith("[...]")
+        assert writer.tail().endswith("Line 999\n")
+
+        CaptureDetail.replace(id_capture=id_capture, stdout_logs=writer.tail()).execute()
+
+        # Full logs are returned by inspect-capture
+        result = runner.invoke(args=f'inspect-capture --id_capture="{id_capture}"')
+        capture_from_cli = json.loads(result.output)
+
+        assert result.exit_code == 0
+        assert capture_from_cli["stdout_logs"].startswith("Line 0\n")
+        assert capture_from_cli["stdout_logs"].endswith("Line 999\n")
+        assert capture_from_cli["stderr_logs"] is None
+    finally:
+        shutil.rmtree(storage_path)
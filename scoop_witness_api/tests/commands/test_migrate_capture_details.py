@@ -0,0 +1,48 @@
+"""
+Test suite for the "migrate-capture-details" command.
+"""
+import json
+import uuid
+
+
+def test_migrate_capture_details_cli(runner, id_capture):
+    """migrate-capture-details command moves legacy columns from "capture" to "capture_detail"."""
+    from playhouse.migrate import SqliteMigrator, migrate
+    from peewee import TextField
+    from scoop_witness_api.models import CaptureDetail
+    from scoop_witness_api.utils import get_db
+
+    db = get_db()
+    summary = {"attachments": {}}
+
+    # Nothing to migrate on an up-to-date database
+    result = runner.invoke(args="migrate-capture-details")
+    assert result.exit_code == 0
+    assert "Nothing to migrate." in result.output
+
+    # Simulate a database created before "capture_detail" was introduced
+    migrator = SqliteMigrator(db)
+    migrate(
+        *[
+            migrator.add_column("capture", column, TextField(null=True))
+            for column in ["stdout_logs", "stderr_logs", "summary"]
+        ]
+    )
+
+    db.execute_sql(
+        "UPDATE capture SET stdout_logs = ?, summary = ? WHERE id_capture = ?",
+        ("Line 1\n", json.dumps(summary), uuid.UUID(id_capture).hex),
+    )
+
+    result = runner.invoke(args="migrate-capture-details --vacuum")
+    assert result.exit_code == 0
+    assert "1 capture(s) copied." in result.output
+
+    columns = [column.name for column in db.get_columns("capture")]
+    assert "stdout_logs" not in columns
+    assert "summary" not in columns
+
+    capture_detail = CaptureDetail.get(CaptureDetail.id_capture == id_capture)
+    assert capture_detail.stdout_logs == "Line 1\n"
+    assert capture_detail.stderr_logs is None
+    assert capture_detail.summary == summary
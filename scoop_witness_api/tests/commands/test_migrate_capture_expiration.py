@@ -0,0 +1,49 @@
+"""
+Test suite for the "migrate-capture-expiration" command.
+"""
+import datetime
+
+from flask import current_app
+
+
+def test_migrate_capture_expiration_cli(runner, id_capture):
+    """migrate-capture-expiration command adds expiration dates to the "capture" table."""
+    from playhouse.migrate import SqliteMigrator, migrate
+    from scoop_witness_api.models import Capture
+    from scoop_witness_api.utils import get_db
+
+    db = get_db()
+    started_timestamp = datetime.datetime.utcnow().replace(microsecond=0)
+
+    # Simulate a database created before captures had an expiration date
+    db.execute_sql(f"DROP INDEX {Capture.EXPIRATION_INDEX}")
+    migrator = SqliteMigrator(db)
+    migrate(migrator.drop_column("capture", "expires_timestamp"))
+    migrate(migrator.drop_column("capture", "purged"))
+
+    db.execute_sql(
+        "UPDATE capture SET status = 'success', started_timestamp = ?",
+        (Capture.started_timestamp.db_value(started_timestamp),),
+    )
+
+    result = runner.invoke(args="migrate-capture-expiration")
+    assert result.exit_code == 0
+    assert "1 capture(s) updated." in result.output
+
+    columns = [column.name for column in db.get_columns("capture")]
+    assert "expires_timestamp" in columns
+    assert "purged" in columns
+
+    indexes = [index.name for index in db.get_indexes("capture")]
+    assert Capture.EXPIRATION_INDEX in indexes
+
+    capture = Capture.get_by_id(id_capture)
+    assert not capture.purged
+    assert capture.expires_timestamp == started_timestamp + datetime.timedelta(
+        seconds=current_app.config["TEMPORARY_STORAGE_EXPIRATION"]
+    )
+
+    # Can safely be run multiple times
+    result = runner.invoke(args="migrate-capture-expiration")
+    assert result.exit_code == 0
+    assert "0 capture(s) updated." in result.output
@@ -4,6 +4,7 @@ Test suite for the "start-capture-process" command.
 import time
 import os
 
+import pytest
 from flask import current_app
 
 
@@ -23,3 +24,305 @@ def test_start_capture_process_cli(runner, access_key, id_capture):
     assert capture_before_run.id_capture == capture_after_run.id_capture
     assert capture_before_run.status != capture_after_run.status
     assert capture_before_run.ended_timestamp != capture_after_run.ended_timestamp
+
+
+def test_start_capture_process_proxy_ports(app):
+    """Capture processes reserve distinct proxy ports, and skip ports something listens on."""
+    import socket
+    from scoop_witness_api.utils import ProxyPortManager, is_port_available
+
+    # Find 3 consecutive free ports
+    with socket.socket() as sock:
+        sock.bind(("", 0))
+        first_port = sock.getsockname()[1]
+
+    pool = range(first_port, first_port + 3)
+
+    with socket.socket() as listener:
+        listener.bind(("", first_port))
+        listener.listen()
+
+        assert not is_port_available(first_port)
+
+        # Preferred port is busy: falls back to the next one from the pool
+        process_a = ProxyPortManager(first_port, pool)
+        assert process_a.get_port() == first_port + 1
+
+        # Ports reserved by another process are skipped
+        process_b = ProxyPortManager(first_port + 1, pool)
+        assert process_b.get_port() == first_port + 2
+
+        process_c = ProxyPortManager(first_port, pool)
+        assert process_c.get_port() is None
+
+    # Preferred port was freed
+    assert process_c.get_port() == first_port
+
+    for process in [process_a, process_b, process_c]:
+        process.release()
+
+
+def test_start_capture_process_cli_sigterm(runner, access_key):
+    """start-capture-process command stops gracefully upon receiving SIGTERM."""
+    import signal
+    import threading
+
+    timer = threading.Timer(1, lambda: os.kill(os.getpid(), signal.SIGTERM))
+    timer.start()
+
+    try:
+        before = time.monotonic()
+        result = runner.invoke(args="start-capture-process")
+
+        assert result.exit_code == 0
+        assert "Received SIGTERM - stopping" in result.output
+        assert time.monotonic() - before < current_app.config["CAPTURE_QUEUE_POLL_INTERVAL"]
+    finally:
+        timer.cancel()
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+
+def test_start_capture_process_resolve_scoop_command(app, monkeypatch, tmp_path):
+    """start-capture-process command starts Scoop as per SCOOP_LAUNCH_MODE."""
+    import shutil
+    from scoop_witness_api.commands.start_capture_process import resolve_scoop_command
+
+    assert resolve_scoop_command("npx") == ["npx", "scoop"]
+
+    # "direct": node runs the script node_modules/.bin/scoop links to
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(shutil, "which", lambda name: f"/usr/bin/{name}")
+
+    with pytest.raises(FileNotFoundError, match="npm install"):
+        resolve_scoop_command("direct")
+
+    script_path = tmp_path / "node_modules" / "@harvard-lil" / "scoop" / "bin" / "cli.js"
+    script_path.parent.mkdir(parents=True)
+    script_path.write_text("")
+    (tmp_path / "node_modules" / ".bin").mkdir()
+    (tmp_path / "node_modules" / ".bin" / "scoop").symlink_to(script_path)
+
+    assert resolve_scoop_command("direct") == ["/usr/bin/node", os.path.realpath(script_path)]
+
+    monkeypatch.setattr(shutil, "which", lambda name: None)
+
+    with pytest.raises(FileNotFoundError, match="node"):
+        resolve_scoop_command("direct")
+
+    # Anything else
+    with pytest.raises(ValueError, match='Unknown SCOOP_LAUNCH_MODE "binary"'):
+        resolve_scoop_command("binary")
+
+
+@pytest.fixture()
+def fake_scoop(monkeypatch) -> list:
+    """
+    Replaces Scoop with a stand-in for the duration of a test: takes 2 seconds (0.5 of which to
+    "start"), and outputs an archive, a summary and an attachment.
+    """
+    import sys
+
+    fake_scoop = [
+        sys.executable,
+        "-c",
+        "import sys, json, time\n"
+        "args = sys.argv[1:]\n"
+        "path = lambda option: args[args.index(option) + 1]\n"
+        "import datetime\n"
+        "time.sleep(0.5)\n"
+        "started_at = datetime.datetime.now(datetime.timezone.utc).isoformat()\n"
+        "time.sleep(1.5)\n"
+        "open(path('--output'), 'w').write('wacz')\n"
+        "json.dump({'attachments': {'screenshot': 'screenshot.png'}, 'startedAt': started_at}, "
+        "open(path('--json-summary-output'), 'w'))\n"
+        "open(path('--export-attachments-output') + '/screenshot.png', 'w').write('png')\n"
+        "print('Done')\n",
+    ]
+
+    monkeypatch.setattr(
+        sys.modules["scoop_witness_api.commands.start_capture_process"],
+        "resolve_scoop_command",
+        lambda launch_mode: fake_scoop,
+    )
+
+    return fake_scoop
+
+
+@pytest.fixture()
+def hanging_fake_scoop(app, monkeypatch) -> list:
+    """
+    Replaces Scoop with a stand-in which keeps running past `--capture-timeout` (1 second) and
+    SCOOP_TIMEOUT_FUSE (1 second), for the duration of a test.
+    """
+    import sys
+
+    hanging_fake_scoop = [sys.executable, "-c", "import time\ntime.sleep(30)\n"]
+
+    monkeypatch.setitem(
+        app.config,
+        "SCOOP_CLI_OPTIONS",
+        {**app.config["SCOOP_CLI_OPTIONS"], "--capture-timeout": 1000},
+    )
+    monkeypatch.setitem(app.config, "SCOOP_TIMEOUT_FUSE", 1)
+    monkeypatch.setattr(
+        sys.modules["scoop_witness_api.commands.start_capture_process"],
+        "resolve_scoop_command",
+        lambda launch_mode: hanging_fake_scoop,
+    )
+
+    return hanging_fake_scoop
+
+
+def test_start_capture_process_cli_timeout(
+    runner, access_key, default_capture_url, hanging_fake_scoop
+):
+    """start-capture-process command kills Scoop processes running past their timeout."""
+    from scoop_witness_api.models import Capture, CaptureTiming, Artifact
+
+    capture = Capture.create(
+        id_access_key=access_key["instance"].id_access_key, url=default_capture_url
+    )
+
+    before = time.monotonic()
+    result = runner.invoke(args="start-capture-process --single-run")
+
+    assert result.exit_code == 0
+    assert time.monotonic() - before < 10
+    assert "Failed (timeout violation)" in result.output
+    assert "Failed (other" not in result.output
+    assert "Traceback" not in result.output
+
+    capture = Capture.get_by_id(capture.id_capture)
+    assert capture.status == "failed"
+    assert capture.ended_timestamp is not None
+    assert Artifact.select().where(Artifact.id_capture == capture.id_capture).count() == 0
+
+    # Time spent in each phase is recorded
+    timing = CaptureTiming.get_by_id(capture.id_capture)
+    assert timing.claim_time is not None
+    assert timing.scoop_time >= 2
+    assert timing.save_time is not None
+
+
+def test_start_capture_process_cli_slots(runner, access_key, default_capture_url, fake_scoop):
+    """start-capture-process command with --slots runs captures concurrently."""
+    from scoop_witness_api.models import Capture, CaptureTiming, Artifact
+
+    for i in range(0, 3):
+        Capture.create(id_access_key=access_key["instance"].id_access_key, url=default_capture_url)
+
+    before = time.monotonic()
+    result = runner.invoke(args="start-capture-process --single-run --slots 3")
+
+    assert result.exit_code == 0
+    assert time.monotonic() - before < 6  # 3 captures of 2 seconds each, at once
+    assert Capture.select().where(Capture.status == "success").count() == 3
+    assert Artifact.select().count() == 6
+
+    # Time spent in each phase is recorded
+    assert CaptureTiming.select().count() == 3
+    for timing in CaptureTiming.select():
+        assert timing.claim_time is not None
+        assert timing.queue_time >= 0
+        assert timing.scoop_time >= 2
+        assert 0.5 <= timing.scoop_startup_time < 1.5
+        assert timing.scoop_capture_time == pytest.approx(
+            timing.scoop_time - timing.scoop_startup_time
+        )
+        assert timing.verification_time is not None
+        assert timing.save_time is not None
+        assert timing.total_time >= timing.scoop_time
+
+
+def test_start_capture_process_cli_deduplication(
+    app, runner, access_key, default_capture_url, fake_scoop
+):
+    """start-capture-process command stores identical attachments once if deduplication is on."""
+    from scoop_witness_api.models import Capture, Artifact, ArtifactBlob
+    from scoop_witness_api.utils import get_artifact_path, get_blob_path
+
+    captures = [
+        Capture.create(id_access_key=access_key["instance"].id_access_key, url=default_capture_url)
+        for i in range(0, 2)
+    ]
+
+    app.config["ARTIFACTS_DEDUPLICATION"] = True
+
+    try:
+        result = runner.invoke(args="start-capture-process --single-run --slots 2")
+    finally:
+        app.config["ARTIFACTS_DEDUPLICATION"] = False
+
+    assert result.exit_code == 0
+
+    # Both screenshots are links to the same blob, referenced twice. Archives are left alone.
+    blob = ArtifactBlob.get()
+    assert blob.references == 2
+    assert blob.size == 3
+
+    for capture in captures:
+        screenshot_path = get_artifact_path(capture.id_capture, "screenshot.png")
+        archive_path = get_artifact_path(capture.id_capture, "archive.wacz")
+
+        assert os.path.samefile(screenshot_path, get_blob_path(blob.sha256))
+        assert os.stat(archive_path).st_nlink == 1
+
+        # Deduplication is recorded: `cleanup` releases references based on it
+        deduplicated = Artifact.select(Artifact.filename).where(
+            Artifact.id_capture == capture.id_capture, Artifact.deduplicated == True  # noqa: E712
+        )
+        assert [artifact.filename for artifact in deduplicated] == ["screenshot.png"]
+
+        with open(screenshot_path) as file:
+            assert file.read() == "png"
+
+
+def test_start_capture_process_cli_s3(
+    app, runner, access_key, default_capture_url, fake_scoop, s3_stand_in
+):
+    """start-capture-process command uploads artifacts if they are stored in an S3 bucket."""
+    from scoop_witness_api.models import Capture, Artifact
+    from scoop_witness_api.utils import get_artifact_path, get_storage
+
+    capture = Capture.create(
+        id_access_key=access_key["instance"].id_access_key, url=default_capture_url
+    )
+
+    # Archive ("wacz") and screenshot ("png") are larger than that: both are sent in parts
+    app.config["STORAGE_S3_MULTIPART_CHUNK_SIZE"] = 2
+
+    result = runner.invoke(args="start-capture-process --single-run")
+    capture = Capture.get_by_id(capture.id_capture)
+    storage = get_storage()
+
+    assert result.exit_code == 0
+    assert capture.status == "success"
+
+    for artifact in Artifact.select().where(Artifact.id_capture == capture.id_capture):
+        key = storage.get_key(capture.id_capture, artifact.filename)
+
+        # Uploaded in 2 parts, removed from local storage
+        parts = [
+            params
+            for method, request_key, params in s3_stand_in.requests
+            if request_key == key and "partNumber" in params
+        ]
+
+        assert len(parts) == 2
+        assert s3_stand_in.objects[key] == artifact.filename.split(".")[1].encode()
+        assert not os.path.exists(get_artifact_path(capture.id_capture, artifact.filename))
+
+    assert s3_stand_in.multipart_uploads == {}
+
+    # Upload failure: capture fails
+    capture = Capture.create(
+        id_access_key=access_key["instance"].id_access_key, url=default_capture_url
+    )
+    app.config["STORAGE_S3_SECRET_ACCESS_KEY"] = "wrong-secret-access-key"
+
+    result = runner.invoke(args="start-capture-process --single-run")
+    capture = Capture.get_by_id(capture.id_capture)
+
+    assert result.exit_code == 0
+    assert capture.status == "failed"
+    assert Artifact.select().where(Artifact.id_capture == capture.id_capture).count() == 0
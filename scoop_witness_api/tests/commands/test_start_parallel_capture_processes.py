@@ -0,0 +1,111 @@
+"""
+Test suite for the "start-parallel-capture-processes" command.
+"""
+from flask import current_app
+
+
+def test_start_parallel_capture_processes_scaling_target(app, monkeypatch):
+    """start-parallel-capture-processes --autoscale scales on queue state and host resources."""
+    from scoop_witness_api.commands.start_parallel_capture_processes import get_scaling_target
+
+    for key, value in {
+        "PROCESSES_SLOTS": 1,
+        "MIN_PROCESSES": 2,
+        "MAX_PROCESSES": 10,
+        "AUTOSCALE_STEP": 4,
+        "AUTOSCALE_PENDING_AGE": 5,
+        "AUTOSCALE_MAX_CPU_USAGE": 0.85,
+        "AUTOSCALE_MIN_MEMORY_AVAILABLE": 1024,
+    }.items():
+        monkeypatch.setitem(current_app.config, key, value)
+
+    host = {"cpu_usage": 0.1, "memory_available": 4096}
+
+    # Scale up by AUTOSCALE_STEP at most, up to MAX_PROCESSES
+    assert get_scaling_target(2, 2, 3, 10, **host) == 5
+    assert get_scaling_target(2, 2, 100, 10, **host) == 6
+    assert get_scaling_target(8, 8, 100, 10, **host) == 10
+
+    # Captures have not been waiting for long: no change
+    assert get_scaling_target(2, 2, 3, 1, **host) == 2
+
+    # Host is busy or low on memory: no change. Unknown host stats do not block scaling up.
+    assert get_scaling_target(2, 2, 3, 10, cpu_usage=0.9, memory_available=4096) == 2
+    assert get_scaling_target(2, 2, 3, 10, cpu_usage=0.1, memory_available=512) == 2
+    assert get_scaling_target(2, 2, 3, 10, cpu_usage=None, memory_available=None) == 5
+
+    # Scale down 1 process at a time when idle, down to MIN_PROCESSES
+    assert get_scaling_target(6, 1, 0, 0, **host) == 5
+    assert get_scaling_target(6, 6, 0, 0, **host) == 6
+    assert get_scaling_target(2, 0, 0, 0, **host) == 2
+
+    # Several slots per process: one slot per capture in progress or waiting
+    monkeypatch.setitem(current_app.config, "PROCESSES_SLOTS", 3)
+    assert get_scaling_target(2, 6, 4, 10, **host) == 4
+    assert get_scaling_target(2, 5, 1, 10, **host) == 2
+    assert get_scaling_target(4, 7, 0, 0, **host) == 3
+    assert get_scaling_target(4, 10, 0, 0, **host) == 4
+
+
+def test_start_parallel_capture_processes_restart_backoff(app, monkeypatch):
+    """start-parallel-capture-processes delays restarts of crashing processes exponentially."""
+    import time
+    from scoop_witness_api.commands.start_parallel_capture_processes import CaptureProcessSlot
+
+    monkeypatch.setitem(current_app.config, "PROCESSES_RESTART_BACKOFF", 1)
+    monkeypatch.setitem(current_app.config, "PROCESSES_RESTART_BACKOFF_MAX", 10)
+
+    slot = CaptureProcessSlot(0)
+    delays = []
+
+    for i in range(0, 6):
+        slot.started_at = time.monotonic()  # Crashes right after starting
+        slot.stopped(1)
+        delays.append(slot.schedule_restart())
+
+    assert delays == [1, 2, 4, 8, 10, 10]
+    assert slot.restarts == 6
+    assert slot.last_exit_code == 1
+
+    # Process ran for longer than PROCESSES_RESTART_BACKOFF_MAX: considered stable
+    slot.started_at = time.monotonic() - 11
+    slot.stopped(1)
+    assert slot.schedule_restart() == 1
+    assert slot.crashes == 1
+
+
+def test_start_parallel_capture_processes_status_file(app):
+    """start-parallel-capture-processes reports the state of each slot as JSON."""
+    import os
+    import json
+    from scoop_witness_api.commands.start_parallel_capture_processes import (
+        CaptureProcessSlot,
+        write_status_file,
+        get_status_file_path,
+    )
+
+    slots = {0: CaptureProcessSlot(0), 1: CaptureProcessSlot(1, 60)}
+    slots[0].stopped(2)
+    slots[0].schedule_restart()
+
+    write_status_file(slots, autoscale=True)
+
+    try:
+        with open(get_status_file_path()) as file:
+            status = json.load(file)
+
+        assert status["pid"] == os.getpid()
+        assert status["autoscale"] is True
+        assert len(status["slots"]) == 2
+
+        assert status["slots"][0]["port"] == current_app.config["PROCESSES_PROXY_PORT"]
+        assert status["slots"][0]["state"] == "waiting"
+        assert status["slots"][0]["restarts"] == 1
+        assert status["slots"][0]["last_exit_code"] == 2
+
+        assert status["slots"][1]["port"] == (
+            current_app.config["PROCESSES_PROXY_PORT"] + current_app.config["PROCESSES_SLOTS"]
+        )
+        assert status["slots"][1]["starts_in"] > 50
+    finally:
+        os.remove(get_status_file_path())
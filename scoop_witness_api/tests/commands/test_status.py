@@ -22,3 +22,20 @@ def test_status_cli(runner, access_key, id_capture):
     assert len(re.findall("\n", result.output)) == 8
 
     assert result.exit_code == 0
+
+
+def test_status_cli_query_count(
+    runner, client, access_key, default_capture_url, assert_max_queries
+):
+    """status command runs the same number of queries regardless of queue size."""
+    client.post(
+        "/captures/batch",
+        headers={"Access-Key": access_key["readable"]},
+        json=[{"url": default_capture_url}] * 3,
+    )
+
+    # Access keys + captures
+    with assert_max_queries(2):
+        result = runner.invoke(args="status")
+
+    assert result.exit_code == 0
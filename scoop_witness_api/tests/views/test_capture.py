@@ -3,6 +3,7 @@ Test suite for "views.capture"
 """
 import uuid
 import datetime
+from concurrent.futures import ThreadPoolExecutor
 
 from flask import current_app
 
@@ -78,6 +79,30 @@ def test_capture_post_over_capacity(client, access_key, default_capture_url):
     assert "error" in response.get_json()
 
 
+def test_capture_post_over_capacity_concurrent(app, access_key, default_capture_url):
+    """[POST] /capture never lets concurrent requests exceed MAX_PENDING_CAPTURES."""
+    from scoop_witness_api.models import Capture
+
+    MAX_PENDING_CAPTURES = current_app.config["MAX_PENDING_CAPTURES"]
+    access_key_readable = access_key["readable"]
+
+    def post(i):
+        response = app.test_client().post(
+            "/capture",
+            json={"url": default_capture_url},
+            headers={"Access-Key": access_key_readable},
+        )
+        return response.status_code
+
+    with ThreadPoolExecutor(max_workers=MAX_PENDING_CAPTURES * 4) as executor:
+        status_codes = list(executor.map(post, range(0, MAX_PENDING_CAPTURES * 4)))
+
+    assert status_codes.count(200) == MAX_PENDING_CAPTURES
+    assert status_codes.count(429) == MAX_PENDING_CAPTURES * 3
+    assert Capture.select().where(Capture.status == "pending").count() == MAX_PENDING_CAPTURES
+    assert Capture.count_pending() == MAX_PENDING_CAPTURES
+
+
 def test_capture_post_no_url(client, access_key):
     """[POST] /capture returns HTTP 400 if no capture URL is provided."""
     access_key_readable = access_key["readable"]
@@ -144,6 +169,75 @@ def test_capture_post_save(client, access_key, default_capture_url):
     assert response_data["status"] == "pending"
 
 
+def test_capture_post_wakes_capture_process(app, client, access_key, default_capture_url):
+    """
+    [POST] /capture wakes up idle capture processes right away, instead of letting them wait for
+    CAPTURE_QUEUE_POLL_INTERVAL (see utils.capture_queue_wakeup).
+    """
+    import time
+    from scoop_witness_api.utils import wait_for_capture
+
+    poll_interval = current_app.config["CAPTURE_QUEUE_POLL_INTERVAL"]
+
+    def wait():
+        with app.app_context():
+            start = time.monotonic()
+            return (wait_for_capture(poll_interval), time.monotonic() - start)
+
+    # Consume notifications left by previous tests, if any
+    with app.app_context():
+        while wait_for_capture(0):
+            pass
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        waiting = executor.submit(wait)
+        time.sleep(0.2)
+
+        response = client.post(
+            "/capture",
+            headers={"Access-Key": access_key["readable"]},
+            json={"url": default_capture_url},
+        )
+        assert response.status_code == 200
+
+        woken_up, waited = waiting.result(timeout=poll_interval)
+
+    assert woken_up
+    assert waited < 5 < poll_interval
+
+
+def test_capture_post_no_capture_process(app, monkeypatch, tmp_path):
+    """
+    Waking up capture processes never blocks nor raises: whether none is listening,
+    the FIFO does not exist yet, or it is full.
+    """
+    import os
+    import time
+    from scoop_witness_api.utils import wake_capture_process
+    from scoop_witness_api.utils.capture_queue_wakeup import get_capture_queue_fifo_path
+
+    monkeypatch.setitem(app.config, "TEMPORARY_STORAGE_PATH", str(tmp_path))
+    start = time.monotonic()
+
+    # FIFO does not exist yet
+    wake_capture_process()
+
+    # No capture process listening
+    os.mkfifo(get_capture_queue_fifo_path())
+    wake_capture_process(3)
+
+    # Capture process listening, but not consuming notifications: FIFO fills up
+    fd = os.open(get_capture_queue_fifo_path(), os.O_RDONLY | os.O_NONBLOCK)
+
+    try:
+        for i in range(0, 3):
+            wake_capture_process(1024 * 1024)
+    finally:
+        os.close(fd)
+
+    assert time.monotonic() - start < 1
+
+
 def test_capture_get_misformatted_id_capture(client, access_key):
     """[GET] /capture returns HTTP 400 when provided with an id_capture in an invalid format."""
     access_key_readable = access_key["readable"]
@@ -235,3 +329,66 @@ def test_capture_get_id_capture(client, runner, access_key, default_capture_url,
     assert "scoop_capture_summary" in response_data
     assert "artifacts" in response_data
     assert len(response_data["artifacts"]) > 0
+
+
+def test_capture_get_artifacts_from_manifest(client, access_key, id_capture):
+    """[GET] /capture lists artifacts from the manifest stored in the database, in order."""
+    from scoop_witness_api.models import Capture, Artifact
+
+    access_key_readable = access_key["readable"]
+    filenames = ["archive.wacz", "provenance-summary.html", "screenshot.png"]
+
+    # Simulate the end of a successful capture. Files do not need to exist.
+    Capture.update(status="success").where(Capture.id_capture == id_capture).execute()
+
+    for filename in filenames:
+        Artifact.create(
+            id_capture=id_capture,
+            filename=filename,
+            size=0,
+            sha256="e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+            content_type="application/octet-stream",
+        )
+
+    response = client.get(f"/capture/{id_capture}", headers={"Access-Key": access_key_readable})
+    response_data = response.get_json()
+    api_domain = current_app.config["API_DOMAIN"]
+
+    assert response.status_code == 200
+    assert response_data["artifacts"] == [
+        f"{api_domain}/artifact/{id_capture}/{filename}" for filename in filenames
+    ]
+    assert response_data["temporary_playback_url"].endswith(response_data["artifacts"][0])
+
+
+def test_capture_post_get_query_count(client, access_key, default_capture_url, assert_max_queries):
+    """[POST|GET] /capture run a fixed, small number of queries once the access key is cached."""
+    from scoop_witness_api.models import Capture, Artifact
+
+    headers = {"Access-Key": access_key["readable"]}
+    client.get(f"/capture/{uuid.uuid4()}", headers=headers)  # Verifies and caches access key
+
+    # Access key generation check + transaction + pending captures counter check + insert
+    with assert_max_queries(4):
+        response = client.post("/capture", headers=headers, json={"url": default_capture_url})
+
+    id_capture = response.get_json()["id_capture"]
+
+    # Access key generation check + capture
+    with assert_max_queries(2):
+        client.get(f"/capture/{id_capture}", headers=headers)
+
+    # Access key generation check + capture + artifacts + logs and summary (if exposed)
+    Capture.update(status="success").where(Capture.id_capture == id_capture).execute()
+    Artifact.create(
+        id_capture=id_capture,
+        filename="archive.wacz",
+        size=0,
+        sha256="e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+        content_type="application/octet-stream",
+    )
+
+    with assert_max_queries(4):
+        response = client.get(f"/capture/{id_capture}", headers=headers)
+
+    assert response.status_code == 200
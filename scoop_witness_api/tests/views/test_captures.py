@@ -0,0 +1,207 @@
+"""
+Test suite for "views.captures"
+"""
+import uuid
+
+from flask import current_app
+
+
+def test_captures_batch_post_missing_access_key(client):
+    """[POST] /captures/batch returns HTTP 401 if no Access-Key was provided."""
+    response = client.post("/captures/batch")
+    assert response.status_code == 401
+    assert "error" in response.get_json()
+
+
+def test_captures_batch_post_invalid_body(client, access_key, default_capture_url):
+    """[POST] /captures/batch returns HTTP 400 if body is not a non-empty array or is too long."""
+    access_key_readable = access_key["readable"]
+    too_long = [{"url": default_capture_url}] * (current_app.config["MAX_CAPTURES_PER_BATCH"] + 1)
+
+    for body in [{}, [], {"url": default_capture_url}, too_long]:
+        response = client.post(
+            "/captures/batch",
+            headers={"Access-Key": access_key_readable},
+            json=body,
+        )
+
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_captures_batch_post_over_capacity(client, access_key, default_capture_url):
+    """[POST] /captures/batch returns HTTP 429 and saves nothing if batch exceeds capacity."""
+    from scoop_witness_api.models import Capture
+
+    access_key_readable = access_key["readable"]
+    batch = [{"url": default_capture_url}] * (current_app.config["MAX_PENDING_CAPTURES"] + 1)
+
+    response = client.post(
+        "/captures/batch",
+        headers={"Access-Key": access_key_readable},
+        json=batch,
+    )
+
+    assert response.status_code == 429
+    assert "error" in response.get_json()
+    assert Capture.select().count() == 0
+
+
+def test_captures_batch_post_save(client, access_key, default_capture_url):
+    """[POST] /captures/batch returns HTTP 200, saves valid entries and reports invalid ones."""
+    from scoop_witness_api.models import Capture
+
+    access_key_readable = access_key["readable"]
+    callback_url = default_capture_url + "callback"
+
+    batch = [
+        {"url": default_capture_url},
+        {"url": "foo-bar-baz"},
+        {"url": default_capture_url, "callback_url": callback_url},
+        {"url": default_capture_url, "callback_url": "foo-bar-baz"},
+        "foo",
+    ]
+
+    response = client.post(
+        "/captures/batch",
+        headers={"Access-Key": access_key_readable},
+        json=batch,
+    )
+
+    response_data = response.get_json()
+
+    assert response.status_code == 200
+    assert len(response_data) == len(batch)
+
+    for index in [1, 3, 4]:
+        assert "error" in response_data[index]
+
+    for index in [0, 2]:
+        assert uuid.UUID(response_data[index]["id_capture"], version=4)
+        assert response_data[index]["url"] == default_capture_url
+        assert response_data[index]["status"] == "pending"
+
+    assert response_data[0]["callback_url"] is None
+    assert response_data[2]["callback_url"] == callback_url
+
+    assert Capture.select().count() == 2
+    assert Capture.count_pending() == 2
+
+    # Saved captures can be retrieved individually
+    capture = Capture.get_by_id(response_data[2]["id_capture"])
+    assert capture.callback_url == callback_url
+    assert capture.id_access_key_id == access_key["instance"].id_access_key
+
+
+def test_captures_batch_post_claim_order(client, access_key):
+    """Captures requested via [POST] /captures/batch are claimed in order of submission."""
+    from scoop_witness_api.models import Capture
+
+    batch = [{"url": f"https://example.com/{index}"} for index in range(0, 5)]
+
+    response = client.post(
+        "/captures/batch",
+        headers={"Access-Key": access_key["readable"]},
+        json=batch,
+    )
+
+    assert response.status_code == 200
+    assert len({capture.created_timestamp for capture in Capture.select()}) == 1
+
+    claimed = [Capture.claim_next().url for index in range(0, len(batch))]
+    assert claimed == [entry["url"] for entry in batch]
+
+
+def test_captures_status_post_invalid_body(client, access_key):
+    """[POST] /captures/status returns HTTP 400 if body is not a non-empty array or is too long."""
+    access_key_readable = access_key["readable"]
+    too_long = [str(uuid.uuid4())] * (current_app.config["MAX_CAPTURES_PER_BATCH"] + 1)
+
+    for body in [{}, [], "foo", too_long]:
+        response = client.post(
+            "/captures/status",
+            headers={"Access-Key": access_key_readable},
+            json=body,
+        )
+
+        assert response.status_code == 400
+        assert "error" in response.get_json()
+
+
+def test_captures_status_post(client, access_key, default_capture_url, id_capture):
+    """[POST] /captures/status returns info for captures owned by the current access key only."""
+    from scoop_witness_api.models import AccessKey
+
+    access_key_readable = access_key["readable"]
+
+    #
+    # Setup: create a distinct access key and make a capture using it
+    #
+    restricted_access_key_digest = AccessKey.create_key_digest(
+        salt=current_app.config["ACCESS_KEY_SALT"]
+    )
+
+    AccessKey.create(label="Test", key_digest=restricted_access_key_digest[1])
+
+    restricted_capture = client.post(
+        "/capture",
+        headers={"Access-Key": restricted_access_key_digest[0]},
+        json={"url": default_capture_url},
+    )
+
+    restricted_id_capture = restricted_capture.get_json()["id_capture"]
+
+    #
+    # Look up own capture, restricted capture, unknown capture and misformatted id_capture
+    #
+    body = [id_capture, restricted_id_capture, str(uuid.uuid4()), "foo-bar-baz"]
+
+    response = client.post(
+        "/captures/status",
+        headers={"Access-Key": access_key_readable},
+        json=body,
+    )
+
+    response_data = response.get_json()
+
+    assert response.status_code == 200
+    assert len(response_data) == len(body)
+
+    assert response_data[0]["id_capture"] == id_capture
+    assert response_data[0]["url"] == default_capture_url
+    assert response_data[0]["status"] == "pending"
+
+    for index in [1, 2, 3]:
+        assert response_data[index]["id_capture"] == body[index]
+        assert "error" in response_data[index]
+
+
+def test_captures_status_post_query_count(
+    client, access_key, default_capture_url, assert_max_queries
+):
+    """[POST] /captures/status runs the same number of queries regardless of batch size."""
+    from scoop_witness_api.models import Capture, Artifact
+
+    headers = {"Access-Key": access_key["readable"]}
+    batch = [{"url": default_capture_url}] * current_app.config["MAX_PENDING_CAPTURES"]
+
+    response = client.post("/captures/batch", headers=headers, json=batch)
+    id_captures = [capture["id_capture"] for capture in response.get_json()]
+
+    Capture.update(status="success").execute()
+
+    for id_capture in id_captures:
+        Artifact.create(
+            id_capture=id_capture,
+            filename="archive.wacz",
+            size=0,
+            sha256="e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855",
+            content_type="application/octet-stream",
+        )
+
+    # Access key generation check + captures + artifacts + logs and summaries (if exposed)
+    with assert_max_queries(4):
+        response = client.post("/captures/status", headers=headers, json=id_captures)
+
+    assert response.status_code == 200
+    assert len(response.get_json()) == len(id_captures)
@@ -0,0 +1,95 @@
+"""
+Test suite for "views.metrics"
+"""
+
+
+def test_metrics_get(client, access_key, id_capture):
+    """
+    [GET] /metrics returns metrics in the Prometheus text format, including queue depth.
+    Note: metrics are process-wide, and accumulate across tests.
+    """
+    client.get(f"/capture/{id_capture}", headers={"Access-Key": access_key["readable"]})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+
+    body = response.data.decode("utf-8")
+    assert 'scoop_captures_queue_depth{status="pending"} 1' in body
+    assert 'scoop_captures_queue_depth{status="started"} 0' in body
+    assert "# TYPE scoop_api_request_duration_seconds histogram" in body
+
+    route = 'route="/capture/<id_capture>",method="GET",status="200"'
+    assert f"scoop_api_request_duration_seconds_count{{{route}}}" in body
+
+    route = 'route="/capture",method="POST",status="200",le="+Inf"'
+    assert f"scoop_api_request_duration_seconds_bucket{{{route}}}" in body
+
+    assert 'scoop_api_access_key_cache_total{result="hit"}' in body
+
+
+def test_metrics_get_other_processes(app, client):
+    """
+    [GET] /metrics adds up counters and histograms of every API process, as shared via
+    METRICS_API_PATH. Gauges are those of the process serving the request.
+    Snapshots of processes that are gone are deleted.
+    """
+    import os
+    import sys
+    import json
+    import subprocess
+
+    path = app.config["METRICS_API_PATH"]
+    os.makedirs(path, exist_ok=True)
+
+    # Snapshot of a worker that is gone
+    gone = subprocess.Popen([sys.executable, "-c", "pass"])
+    gone.wait()
+    gone_worker_path = os.path.join(path, f"{gone.pid}-gone.json")
+
+    with open(gone_worker_path, "w") as file:
+        json.dump({"scoop_api_access_key_cache_total": [[["gone-worker"], 3]]}, file)
+
+    # Snapshot of another gunicorn worker
+    other_worker = {
+        "scoop_api_access_key_cache_total": [[["other-worker"], 7]],
+        "scoop_api_request_duration_seconds": [
+            [["/other-worker", "GET", "200"], [[1] + [0] * 11, 1, 0.001]],
+        ],
+        "scoop_captures_queue_depth": [[["pending"], 1000]],
+    }
+
+    other_worker_path = os.path.join(path, f"{os.getppid()}-other.json")
+
+    with open(other_worker_path, "w") as file:
+        json.dump(other_worker, file)
+
+    try:
+        body = client.get("/metrics").data.decode("utf-8")
+        assert 'scoop_api_access_key_cache_total{result="other-worker"} 7' in body
+
+        route = 'route="/other-worker",method="GET",status="200"'
+        assert f"scoop_api_request_duration_seconds_count{{{route}}} 1" in body
+        assert f'scoop_api_request_duration_seconds_bucket{{{route},le="+Inf"}} 1' in body
+
+        # Requests served by this process are counted as well
+        route = 'route="/metrics",method="GET",status="200"'
+        assert f"scoop_api_request_duration_seconds_count{{{route}}}" in body
+
+        assert 'scoop_captures_queue_depth{status="pending"} 1000' not in body
+
+        assert "gone-worker" not in body
+        assert not os.path.exists(gone_worker_path)
+    finally:
+        os.remove(other_worker_path)
+
+
+def test_metrics_get_disabled(app, client):
+    """[GET] /metrics returns HTTP 404 unless EXPOSE_METRICS is True."""
+    app.config["EXPOSE_METRICS"] = False
+
+    try:
+        response = client.get("/metrics")
+        assert response.status_code == 404
+    finally:
+        app.config["EXPOSE_METRICS"] = True
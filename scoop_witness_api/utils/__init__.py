@@ -4,4 +4,13 @@
 from .config_check import config_check
 from .get_db import get_db
 from .access_check import access_check
-from .capture_to_dict import capture_to_dict
+from .capture_to_dict import capture_to_dict, captures_to_dict, capture_to_json
+from .capture_queue_wakeup import wake_capture_process, wait_for_capture
+from .scoop_logs import ScoopLogsWriter, get_scoop_logs_path, read_scoop_logs
+from .proxy_ports import ProxyPortManager, is_port_available
+from .host_stats import get_cpu_times, get_cpu_usage, get_memory_available
+from .artifact_storage import get_artifact_path, get_blob_path, link_to_blob
+from .artifact_storage import restore_blob, delete_blob
+from .storage import get_storage
+from .artifact_cache import artifact_cache_get, artifact_cache_set, artifact_cache_delete
+from . import metrics
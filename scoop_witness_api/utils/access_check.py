@@ -2,10 +2,27 @@
 `utils.access_check` module: Flask route decorator checking for a valid access key.
 """
 import uuid
+import hmac
+import hashlib
+import secrets
+import threading
+import time
+from collections import OrderedDict
 
 from functools import wraps
 from flask import g, request, jsonify
 
+from . import metrics
+
+_cache = OrderedDict()
+""" In-process cache of verified access keys: header HMAC -> (AccessKey, generation, expires). """
+
+_cache_lock = threading.Lock()
+""" Guards _cache, which is shared between the threads of a given worker. """
+
+_cache_hmac_key = secrets.token_bytes(32)
+""" Per-process secret used to derive cache keys. Raw access keys are never kept in memory. """
+
 
 def access_check(to_decorate):
     """
@@ -19,6 +36,11 @@ def access_check(to_decorate):
     Returns HTTP 400 if access key is in an invalid format.
 
     AccessKey object will be accessible in app context via g.access_key.
+
+    Verified keys are kept in a bounded, in-process cache for ACCESS_KEY_CACHE_TTL seconds,
+    which saves a bcrypt round on subsequent requests.
+    Cached entries are dropped as soon as the access keys generation counter moves
+    (see models.AccessKey.cancel).
     """
     from ..models import AccessKey
     from flask import current_app
@@ -49,6 +71,21 @@ def access_check(to_decorate):
         except ValueError:
             return jsonify({"error": "Invalid access key format."}), 400
 
+        #
+        # Use cached access key, if any
+        #
+        cache_key = hmac.new(_cache_hmac_key, access_key_header.encode(), hashlib.sha256).digest()
+        generation = None
+
+        if current_app.config["ACCESS_KEY_CACHE_SIZE"] > 0:
+            generation = AccessKey.get_generation()
+            access_key = cache_get(cache_key, generation)
+            metrics.API_ACCESS_KEY_CACHE.inc(result="hit" if access_key else "miss")
+
+        if access_key:
+            g.access_key = access_key
+            return to_decorate(*args, **kwargs)
+
         #
         # Generate access key digest
         #
@@ -74,6 +111,52 @@ def access_check(to_decorate):
         # Make access key object globally accessible for this context
         g.access_key = access_key
 
+        if generation is not None:
+            cache_set(cache_key, access_key, generation)
+
         return to_decorate(*args, **kwargs)
 
     return decorated
+
+
+def cache_get(cache_key: bytes, generation: int):
+    """
+    Returns a cached AccessKey object for a given cache key, if any.
+    Clears the cache entirely if the access keys generation counter moved since it was populated.
+    """
+    with _cache_lock:
+        entry = _cache.get(cache_key)
+
+        if not entry:
+            return None
+
+        access_key, entry_generation, expires = entry
+
+        if entry_generation != generation:
+            _cache.clear()
+            return None
+
+        if expires < time.monotonic():
+            del _cache[cache_key]
+            return None
+
+        _cache.move_to_end(cache_key)
+        return access_key
+
+
+def cache_set(cache_key: bytes, access_key, generation: int) -> None:
+    """
+    Stores a verified AccessKey object in cache.
+    Evicts least recently used entries past ACCESS_KEY_CACHE_SIZE.
+    """
+    from flask import current_app
+
+    size = int(current_app.config["ACCESS_KEY_CACHE_SIZE"])
+    expires = time.monotonic() + int(current_app.config["ACCESS_KEY_CACHE_TTL"])
+
+    with _cache_lock:
+        _cache[cache_key] = (access_key, generation, expires)
+        _cache.move_to_end(cache_key)
+
+        while len(_cache) > size:
+            _cache.popitem(last=False)
@@ -0,0 +1,65 @@
+"""
+`utils.artifact_cache` module: In-process cache of artifact lookups, used by [GET] /artifact.
+Artifacts are immutable once written: repeated requests for the same file (i.e. range requests
+issued by replay tools) skip validation, path resolution and database access.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+_cache = OrderedDict()
+""" (id_capture, filename) -> (artifact, expires). See views.artifact.find_artifact(). """
+
+_cache_lock = threading.Lock()
+""" Guards _cache, which is shared between the threads of a given worker. """
+
+
+def artifact_cache_get(id_capture: str, filename: str):
+    """
+    Returns a cached artifact description for a given id_capture and filename, if any.
+    Keys are the raw values found in the URL.
+    """
+    key = (id_capture, filename)
+
+    with _cache_lock:
+        entry = _cache.get(key)
+
+        if not entry:
+            return None
+
+        artifact, expires = entry
+
+        if expires < time.monotonic():
+            del _cache[key]
+            return None
+
+        _cache.move_to_end(key)
+        return artifact
+
+
+def artifact_cache_set(id_capture: str, filename: str, artifact: dict) -> None:
+    """
+    Stores an artifact description for ARTIFACTS_CACHE_TTL seconds.
+    Evicts least recently used entries past ARTIFACTS_CACHE_SIZE. No-op if size is 0.
+    """
+    size = int(current_app.config["ARTIFACTS_CACHE_SIZE"])
+    expires = time.monotonic() + int(current_app.config["ARTIFACTS_CACHE_TTL"])
+    key = (id_capture, filename)
+
+    if size <= 0:
+        return
+
+    with _cache_lock:
+        _cache[key] = (artifact, expires)
+        _cache.move_to_end(key)
+
+        while len(_cache) > size:
+            _cache.popitem(last=False)
+
+
+def artifact_cache_delete(id_capture: str, filename: str) -> None:
+    """Forgets about a given artifact, i.e. because it was removed from storage."""
+    with _cache_lock:
+        _cache.pop((id_capture, filename), None)
@@ -0,0 +1,114 @@
+"""
+`utils.artifact_storage` module: Where artifacts are stored, and content-addressed deduplication.
+
+Layout, under TEMPORARY_STORAGE_PATH:
+- `<id_capture>/archive.wacz`
+- `<id_capture>/attachments/<filename>`
+- `blobs/<sha256[0:2]>/<sha256>`: content-addressed store (see ARTIFACTS_DEDUPLICATION).
+
+Deduplicated artifacts are hard links to their blob: removing a blob never affects the captures
+linking to it. Blob references are counted in the database (see models.ArtifactBlob), and
+released based on what the database recorded (see models.Artifact.deduplicated), never based on
+what is found on disk.
+"""
+import os
+import uuid
+
+from flask import current_app
+
+
+def get_artifact_path(id_capture, filename: str) -> str:
+    """Returns the path at which a given artifact is stored (see models.Artifact.filename)."""
+    temporary_storage_path = current_app.config["TEMPORARY_STORAGE_PATH"]
+
+    if filename != "archive.wacz":
+        filename = f"attachments{os.sep}{filename}"
+
+    return f"{temporary_storage_path}{os.sep}{id_capture}{os.sep}{filename}"
+
+
+def get_blob_path(sha256: str) -> str:
+    """Returns the path of a given blob in the content-addressed store."""
+    temporary_storage_path = current_app.config["TEMPORARY_STORAGE_PATH"]
+    return f"{temporary_storage_path}{os.sep}blobs{os.sep}{sha256[0:2]}{os.sep}{sha256}"
+
+
+def link_to_blob(path: str, sha256: str) -> bool:
+    """
+    Deduplicates a file using the content-addressed store:
+    - If a blob with the same hash exists, the file is replaced with a hard link to it.
+    - Otherwise, the file becomes the blob: it is hard-linked into the store.
+
+    Returns True if the file is now linked to a blob, False if that could not be done
+    (i.e. the store is on a different filesystem). The file is left untouched in that case.
+    """
+    blob_path = get_blob_path(sha256)
+
+    try:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+
+        try:
+            os.link(path, blob_path)  # New blob
+            return True
+        except FileExistsError:
+            pass
+
+        # Existing blob: swap the file for a link to it, atomically
+        temporary_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        os.link(blob_path, temporary_path)
+
+        try:
+            os.replace(temporary_path, path)
+        except OSError:
+            os.remove(temporary_path)
+            raise
+
+        return True
+    except OSError:
+        return False
+
+
+def restore_blob(path: str, sha256: str) -> None:
+    """
+    Puts a deduplicated file back in the content-addressed store, if its blob is missing.
+    A blob can be deleted by `cleanup` after a capture linked to it, but before that capture
+    referenced it again (see delete_blob()).
+    """
+    blob_path = get_blob_path(sha256)
+
+    try:
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.link(path, blob_path)
+    except OSError:  # Blob exists, or file is gone: nothing to restore
+        pass
+
+
+def delete_blob(sha256: str, delete_record) -> bool:
+    """
+    Deletes a blob from the content-addressed store, if `delete_record(sha256)` returns True.
+    `delete_record` is expected to delete the blob's record, unless it was referenced again
+    (see models.ArtifactBlob.delete_unreferenced()).
+
+    The blob is moved out of the way first: captures deduplicating the same file in the meantime
+    create a new blob rather than linking to this one. It is put back if the record was kept.
+    Returns True if the blob was deleted.
+    """
+    blob_path = get_blob_path(sha256)
+    deleted_path = f"{blob_path}.{uuid.uuid4().hex}.deleted"
+
+    try:
+        os.rename(blob_path, deleted_path)
+    except FileNotFoundError:
+        return delete_record(sha256)
+
+    deleted = False
+
+    try:
+        deleted = delete_record(sha256)
+    finally:
+        if not deleted:
+            restore_blob(deleted_path, sha256)
+
+        os.remove(deleted_path)
+
+    return deleted
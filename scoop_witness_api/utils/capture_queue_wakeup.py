@@ -0,0 +1,70 @@
+"""
+`utils.capture_queue_wakeup` module: Lets the API wake up idle capture processes.
+Relies on a named pipe (FIFO) under TEMPORARY_STORAGE_PATH: 1 byte written = 1 capture enqueued.
+"""
+import os
+import errno
+import select
+
+from flask import current_app
+
+_fifo_fd = None
+""" File descriptor of the FIFO, held open for the lifetime of a given capture process. """
+
+
+def get_capture_queue_fifo_path() -> str:
+    """Returns the path of the FIFO used to signal new captures."""
+    return f"{current_app.config['TEMPORARY_STORAGE_PATH']}{os.sep}capture-queue.fifo"
+
+
+def wake_capture_process(captures: int = 1) -> None:
+    """
+    Signals idle capture processes, if any, that `captures` captures were just enqueued.
+    Never blocks and never raises: capture processes poll the queue regardless.
+    """
+    try:
+        fd = os.open(get_capture_queue_fifo_path(), os.O_WRONLY | os.O_NONBLOCK)
+    except OSError:  # FIFO not created yet (ENOENT) or no capture process listening (ENXIO)
+        return
+
+    try:
+        os.write(fd, b"\n" * captures)
+    except OSError:  # Pipe is full (EAGAIN): capture processes have plenty to wake up for already
+        pass
+    finally:
+        os.close(fd)
+
+
+def wait_for_capture(timeout: float) -> bool:
+    """
+    Blocks until a capture is enqueued, or for `timeout` seconds at most.
+    Returns True if woken up by wake_capture_process().
+
+    The FIFO is created if needed and opened read-write, so it never reports end-of-file
+    when the API closes its end.
+    """
+    global _fifo_fd
+
+    if _fifo_fd is None:
+        path = get_capture_queue_fifo_path()
+
+        try:
+            os.mkfifo(path)
+        except FileExistsError:
+            pass
+
+        _fifo_fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+
+    readable, _, _ = select.select([_fifo_fd], [], [], timeout)
+
+    if not readable:
+        return False
+
+    # Consume a single notification: other idle processes may claim the next ones.
+    try:
+        os.read(_fifo_fd, 1)
+    except OSError as err:
+        if err.errno != errno.EAGAIN:  # Another process consumed it first
+            raise
+
+    return True
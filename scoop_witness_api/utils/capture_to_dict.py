@@ -1,9 +1,6 @@
 """
-`utils.capture_to_dict` module: Converts a Capture object to dictionary.
+`utils.capture_to_dict` module: Converts Capture objects to dictionaries and JSON.
 """
-import os
-import glob
-
 from flask import current_app
 
 
@@ -12,64 +9,129 @@ def capture_to_dict(capture) -> dict:
     Formats a models.Capture object into a dictionary.
     Only lists properties the end-user should be able to see.
     """
-    from ..models import Capture
+    return captures_to_dict([capture])[0]
+
+
+def capture_to_json(capture) -> bytes:
+    """
+    Formats a models.Capture object into UTF-8 encoded JSON, as [GET] /capture/<id_capture> would.
+    Uses the app's JSON provider, for consistency with jsonify().
+    """
+    return current_app.json.dumps(capture_to_dict(capture)).encode("utf-8")
+
+
+def captures_to_dict(captures: list) -> list:
+    """
+    Formats a list of models.Capture objects into a list of dictionaries, in the same order.
+    Only lists properties the end-user should be able to see.
+    Settings are read once per batch, and artifacts of successful captures are pulled from the
+    database at once (see models.Artifact): storage is not accessed. Artifacts of purged captures
+    are not listed.
+    Logs and summary of completed captures are only pulled if exposed (see models.CaptureDetail).
+    """
+    from ..models import Capture, CaptureDetail, Artifact
 
-    if not isinstance(capture, Capture):
-        raise Exception("capture must be a valid Capture object")
+    api_domain = current_app.config["API_DOMAIN"]
+    expose_scoop_logs = current_app.config["EXPOSE_SCOOP_LOGS"]
+    expose_scoop_capture_summary = current_app.config["EXPOSE_SCOOP_CAPTURE_SUMMARY"]
+    results = []
+    artifacts = {}
+    details = {}
 
-    to_return = {
-        "id_capture": capture.id_capture,
-        "status": capture.status,
-        "created_timestamp": capture.created_timestamp,
-        "started_timestamp": capture.started_timestamp,
-        "ended_timestamp": capture.ended_timestamp,
-        "url": capture.url,
-        "callback_url": capture.callback_url,
-    }
+    for capture in captures:
+        if not isinstance(capture, Capture):
+            raise Exception("capture must be a valid Capture object")
 
     #
-    # Properties specific to status "pending" or "started"
+    # Pull artifacts filenames for all successful captures at once, in order of creation.
+    # Purged captures no longer have artifacts (see `cleanup`).
     #
-    if capture.status == "pending" or capture.status == "started":
-        to_return["follow"] = f"{current_app.config['API_DOMAIN']}/capture/{capture.id_capture}"
+    ids_capture = [
+        capture.id_capture
+        for capture in captures
+        if capture.status == "success" and not capture.purged
+    ]
+
+    if ids_capture:
+        query = (
+            Artifact.select(Artifact.id_capture, Artifact.filename)
+            .where(Artifact.id_capture.in_(ids_capture))
+            .order_by(Artifact.id_artifact)
+        )
+
+        for artifact in query:
+            artifacts.setdefault(str(artifact.id_capture_id), []).append(artifact.filename)
 
     #
-    # Properties specific to status "success"
+    # Pull exposed heavy properties for all completed captures at once
     #
-    if capture.status == "success":
-        # Generate "/artifact" URLs for all existing files, except "archive.json"
-        api_domain = current_app.config["API_DOMAIN"]
-        storage_path = f"{current_app.config['TEMPORARY_STORAGE_PATH']}{os.sep}{capture.id_capture}"
-        attachments_path = f"{storage_path}{os.sep}attachments{os.sep}*"
-        archive_path = f"{storage_path}{os.sep}*.wacz"
+    ids_capture = [
+        capture.id_capture for capture in captures if capture.status in ["success", "failed"]
+    ]
+    fields = []
 
-        artifacts = glob.glob(archive_path) + glob.glob(attachments_path)
+    if expose_scoop_logs:
+        fields += [CaptureDetail.stdout_logs, CaptureDetail.stderr_logs]
 
-        for i in range(0, len(artifacts)):
-            artifact = artifacts[i]
-            filename = artifact.replace(f"{storage_path}{os.sep}", "")
-            filename = filename.replace("attachments/", "")
-            artifacts[i] = f"{api_domain}/artifact/{capture.id_capture}/{filename}"
+    if expose_scoop_capture_summary:
+        fields.append(CaptureDetail.summary)
 
-        to_return["artifacts"] = artifacts
+    if ids_capture and fields:
+        query = CaptureDetail.select(CaptureDetail.id_capture, *fields).where(
+            CaptureDetail.id_capture.in_(ids_capture)
+        )
 
-        if artifacts:
-            to_return["temporary_playback_url"] = f"https://replayweb.page/?source={artifacts[0]}"
+        for detail in query:
+            details[str(detail.id_capture_id)] = detail
 
-    #
-    # Expose logs?
-    #
-    if capture.status in ["success", "failed"] and current_app.config["EXPOSE_SCOOP_LOGS"]:
-        to_return["stdout_logs"] = capture.stdout_logs
-        to_return["stderr_logs"] = capture.stderr_logs
+    for capture in captures:
+        to_return = {
+            "id_capture": capture.id_capture,
+            "status": capture.status,
+            "created_timestamp": capture.created_timestamp,
+            "started_timestamp": capture.started_timestamp,
+            "ended_timestamp": capture.ended_timestamp,
+            "url": capture.url,
+            "callback_url": capture.callback_url,
+        }
 
-    #
-    # Expose capture summary?
-    #
-    if (
-        capture.status in ["success", "failed"]
-        and current_app.config["EXPOSE_SCOOP_CAPTURE_SUMMARY"]
-    ):
-        to_return["scoop_capture_summary"] = capture.summary
+        #
+        # Properties specific to status "pending" or "started"
+        #
+        if capture.status == "pending" or capture.status == "started":
+            to_return["follow"] = f"{api_domain}/capture/{capture.id_capture}"
+
+        #
+        # Properties specific to status "success"
+        #
+        if capture.status == "success":
+            # Generate "/artifact" URLs from the artifacts manifest
+            artifacts_urls = [
+                f"{api_domain}/artifact/{capture.id_capture}/{filename}"
+                for filename in artifacts.get(str(capture.id_capture), [])
+            ]
+
+            to_return["artifacts"] = artifacts_urls
+
+            if artifacts_urls:
+                playback_url = f"https://replayweb.page/?source={artifacts_urls[0]}"
+                to_return["temporary_playback_url"] = playback_url
+
+        detail = details.get(str(capture.id_capture), CaptureDetail())
+
+        #
+        # Expose logs?
+        #
+        if capture.status in ["success", "failed"] and expose_scoop_logs:
+            to_return["stdout_logs"] = detail.stdout_logs
+            to_return["stderr_logs"] = detail.stderr_logs
+
+        #
+        # Expose capture summary?
+        #
+        if capture.status in ["success", "failed"] and expose_scoop_capture_summary:
+            to_return["scoop_capture_summary"] = detail.summary
+
+        results.append(to_return)
 
-    return to_return
+    return results
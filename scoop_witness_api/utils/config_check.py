@@ -35,7 +35,6 @@ def config_check() -> bool:
         "DATABASE_PATH",
         "DATABASE_FILENAME",
         "API_DOMAIN",
-        "API_STORAGE_URL",
     ]:
         if prop not in config:
             raise Exception(f"config object must contain a {prop} property")
@@ -43,6 +42,10 @@ def config_check() -> bool:
         if not isinstance(config[prop], str):
             raise Exception(f"{prop} config property must be a string")
 
+    # Check DATABASE_PRAGMAS
+    if "DATABASE_PRAGMAS" not in config or not isinstance(config["DATABASE_PRAGMAS"], dict):
+        raise Exception("config object must contain a DATABASE_PRAGMAS dictionary.")
+
     # Check SCOOP_CLI_OPTIONS
     if "SCOOP_CLI_OPTIONS" not in config or not isinstance(config["SCOOP_CLI_OPTIONS"], dict):
         raise Exception("config object must contain a SCOOP_CLI_OPTIONS dictionary.")
@@ -57,14 +60,78 @@ def config_check() -> bool:
     # Misc (just check presence)
     for prop in [
         "MAX_PENDING_CAPTURES",
+        "MAX_CAPTURES_PER_BATCH",
         "EXPOSE_SCOOP_LOGS",
         "TEMPORARY_STORAGE_EXPIRATION",
+        "CLEANUP_BATCH_SIZE",
+        "CLEANUP_CONCURRENCY",
         "PROCESSES",
+        "PROCESSES_SLOTS",
+        "PROCESSES_STARTUP_JITTER",
+        "PROCESSES_RESTART_BACKOFF",
+        "PROCESSES_RESTART_BACKOFF_MAX",
+        "MIN_PROCESSES",
+        "MAX_PROCESSES",
+        "AUTOSCALE_INTERVAL",
+        "AUTOSCALE_STEP",
+        "AUTOSCALE_PENDING_AGE",
+        "AUTOSCALE_MAX_CPU_USAGE",
+        "AUTOSCALE_MIN_MEMORY_AVAILABLE",
         "PROCESSES_PROXY_PORT",
+        "PROXY_PORTS_POOL_SIZE",
+        "CAPTURE_QUEUE_POLL_INTERVAL",
+        "CALLBACK_DELIVERY_CONCURRENCY",
+        "CALLBACK_DELIVERY_TIMEOUT",
+        "CALLBACK_DELIVERY_MAX_ATTEMPTS",
+        "CALLBACK_DELIVERY_BACKOFF",
+        "CALLBACK_DELIVERY_POLL_INTERVAL",
+        "EXPOSE_METRICS",
+        "METRICS_TEXTFILE_PATH",
+        "METRICS_API_PATH",
         "ACCESS_KEY_SALT",
+        "ACCESS_KEY_CACHE_SIZE",
+        "ACCESS_KEY_CACHE_TTL",
+        "ARTIFACTS_MAX_AGE",
+        "ARTIFACTS_MAX_RANGES",
+        "ARTIFACTS_CACHE_SIZE",
+        "ARTIFACTS_CACHE_TTL",
+        "ARTIFACTS_DEDUPLICATION",
+        "ARTIFACTS_OFFLOAD",
+        "ARTIFACTS_OFFLOAD_PREFIX",
+        "STORAGE_BACKEND",
+        "STORAGE_S3_ENDPOINT_URL",
+        "STORAGE_S3_REGION",
+        "STORAGE_S3_BUCKET",
+        "STORAGE_S3_PREFIX",
+        "STORAGE_S3_ACCESS_KEY_ID",
+        "STORAGE_S3_SECRET_ACCESS_KEY",
+        "STORAGE_S3_PRESIGNED_URL_EXPIRATION",
+        "STORAGE_S3_MULTIPART_CHUNK_SIZE",
+        "STORAGE_S3_UPLOAD_CONCURRENCY",
+        "STORAGE_S3_TIMEOUT",
         "SCOOP_TIMEOUT_FUSE",
+        "SCOOP_LAUNCH_MODE",
+        "SCOOP_LOGS_TAIL_SIZE",
     ]:
         if prop not in config:
             raise Exception(f"config object must define {prop}.")
 
+    if config["SCOOP_LAUNCH_MODE"] not in ["npx", "direct"]:
+        raise Exception("SCOOP_LAUNCH_MODE must be either npx or direct.")
+
+    if config["ARTIFACTS_OFFLOAD"] not in [None, "x-accel-redirect", "x-sendfile"]:
+        raise Exception("ARTIFACTS_OFFLOAD must be either None, x-accel-redirect or x-sendfile.")
+
+    if config["STORAGE_BACKEND"] not in ["local", "s3"]:
+        raise Exception("STORAGE_BACKEND must be either local or s3.")
+
+    if config["STORAGE_BACKEND"] == "s3" and config["ARTIFACTS_DEDUPLICATION"]:
+        raise Exception("ARTIFACTS_DEDUPLICATION is only available with the local storage backend.")
+
+    if int(config["PROCESSES_SLOTS"]) < 1:
+        raise Exception("PROCESSES_SLOTS must be at least 1.")
+
+    if int(config["MIN_PROCESSES"]) > int(config["MAX_PROCESSES"]):
+        raise Exception("MIN_PROCESSES cannot be greater than MAX_PROCESSES.")
+
     return True
@@ -3,33 +3,52 @@
 """
 import re
 import os
+import threading
 
-from flask import g, current_app
+from flask import current_app
 import peewee
 
+_db = None
+""" Process-wide database handle. Created on first call to get_db(). """
+
+_db_lock = threading.Lock()
+""" Prevents concurrent threads from creating separate database handles. """
+
 
 def get_db() -> peewee.SqliteDatabase:
     """
-    Returns a connection to the database.
-    - Creates it if not available.
-    - Populates g.db
-    - Uses the DATABASE_PATH and DATABASE_FILENAME environment variables.
+    Returns a process-wide database handle.
+    - Creates it on first call, using the DATABASE_PATH and DATABASE_FILENAME settings.
+    - DATABASE_PRAGMAS are applied to every new connection.
+    - Connections are opened lazily, one per thread, and reused (see create_app for request hooks).
     """
-    with current_app.app_context():
-        os.makedirs(current_app.config["DATABASE_PATH"], exist_ok=True)
+    global _db
+
+    if _db is not None:
+        return _db
+
+    with _db_lock:
+        if _db is not None:
+            return _db
+
+        with current_app.app_context():
+            os.makedirs(current_app.config["DATABASE_PATH"], exist_ok=True)
 
-        if not re.match(r"^[a-zA-Z0-9\-\_]+\.db$", current_app.config["DATABASE_FILENAME"]):
-            raise NameError("DATABASE_FILENAME is invalid. Example: database12.db")
+            if not re.match(r"^[a-zA-Z0-9\-\_]+\.db$", current_app.config["DATABASE_FILENAME"]):
+                raise NameError("DATABASE_FILENAME is invalid. Example: database12.db")
 
-        db_fullpath = os.path.join(
-            current_app.config["DATABASE_PATH"], current_app.config["DATABASE_FILENAME"]
-        )
+            db_fullpath = os.path.join(
+                current_app.config["DATABASE_PATH"], current_app.config["DATABASE_FILENAME"]
+            )
 
-        g.db = peewee.SqliteDatabase(db_fullpath)
+            db = peewee.SqliteDatabase(
+                db_fullpath, pragmas=dict(current_app.config["DATABASE_PRAGMAS"])
+            )
 
-        try:
-            assert g.db.connect(reuse_if_open=True)
-        except AssertionError:
-            raise ConnectionError(f"Could not connect to {db_fullpath}.")
+            try:
+                assert db.connect(reuse_if_open=True)
+            except AssertionError:
+                raise ConnectionError(f"Could not connect to {db_fullpath}.")
 
-        return g.db
+            _db = db
+            return _db
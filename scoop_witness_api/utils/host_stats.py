@@ -0,0 +1,47 @@
+"""
+`utils.host_stats` module: Reads host-level CPU and memory statistics from /proc (Linux only).
+Functions return None when statistics are not available.
+"""
+
+
+def get_cpu_times():
+    """
+    Returns a (idle, total) tuple of cumulative CPU times since boot, across all CPUs.
+    See get_cpu_usage() to turn two samples into a usage ratio.
+    """
+    try:
+        with open("/proc/stat") as file:
+            times = [int(value) for value in file.readline().split()[1:]]
+    except (OSError, ValueError):
+        return None
+
+    # user nice system idle iowait irq softirq steal (guest times are included in user / nice)
+    return (times[3] + times[4], sum(times[0:8]))
+
+
+def get_cpu_usage(before, after):
+    """
+    Returns the share of CPU time spent working between two samples of get_cpu_times(),
+    between 0.0 and 1.0.
+    """
+    if not before or not after or after[1] <= before[1]:
+        return None
+
+    idle = after[0] - before[0]
+    total = after[1] - before[1]
+    return 1.0 - idle / total
+
+
+def get_memory_available():
+    """
+    Returns an estimate of how much memory is available for new processes, in bytes.
+    """
+    try:
+        with open("/proc/meminfo") as file:
+            for line in file:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024  # Expressed in kB
+    except (OSError, ValueError):
+        pass
+
+    return None
@@ -0,0 +1,386 @@
+"""
+`utils.metrics` module: In-process metrics, rendered in the Prometheus text exposition format.
+- The API exposes its metrics via [GET] /metrics (see views.metrics). Each API process writes a
+  snapshot of its counters and histograms to METRICS_API_PATH (see export_snapshot()), so that
+  any of them can report the totals of every gunicorn worker (see render_all()).
+- CLI workers write theirs to METRICS_TEXTFILE_PATH (see export_textfile()), for node_exporter's
+  textfile collector to pick up.
+
+Updating a metric takes a lock and a few dictionary operations: cheap enough for hot paths.
+"""
+import os
+import json
+import time
+import uuid
+import bisect
+import threading
+
+from flask import current_app
+
+_lock = threading.Lock()
+""" Guards every metric of this process. """
+
+_registry = []
+""" Every metric defined in this module, in order of definition. """
+
+_last_textfile_export = 0
+""" When was export_textfile() last run, as per time.monotonic(). """
+
+TEXTFILE_EXPORT_INTERVAL = 5
+""" export_textfile() writes to disk at most once every X seconds, unless forced. """
+
+_last_snapshot_export = 0
+""" When was export_snapshot() last run, as per time.monotonic(). """
+
+_snapshot_name = (None, None)
+""" (pid, name) of this process' snapshot file. Regenerated after a fork. """
+
+SNAPSHOT_EXPORT_INTERVAL = 5
+""" export_snapshot() writes to disk at most once every X seconds, unless forced. """
+
+
+class Metric:
+    """
+    Base class for metrics. Values are stored by label values, in order of `labels`.
+    """
+
+    type = None
+
+    aggregate = True
+    """ Are values of every API process added up by render_all()? """
+
+    def __init__(self, name: str, documentation: str, labels: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self.values = {}
+        _registry.append(self)
+
+    def label_values(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(label, "")) for label in self.labels)
+
+    def format_labels(self, label_values: tuple, extra: dict = {}) -> str:
+        pairs = list(zip(self.labels, label_values)) + list(extra.items())
+
+        if not pairs:
+            return ""
+
+        escape = str.maketrans({"\\": r"\\", '"': r"\"", "\n": r"\n"})
+        return (
+            "{" + ",".join(f'{key}="{str(value).translate(escape)}"' for key, value in pairs) + "}"
+        )
+
+    def merge(self, value, other):
+        """Adds up two values of this metric, from different processes."""
+        return value + other
+
+    def render(self, values: dict = None) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        values = self.values if values is None else values
+
+        for label_values, value in sorted(values.items()):
+            lines.append(f"{self.name}{self.format_labels(label_values)} {value}")
+
+        return lines
+
+
+class Counter(Metric):
+    """Value that only goes up."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self.label_values(labels)
+
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """Value that can go up and down. Not added up across processes."""
+
+    type = "gauge"
+
+    aggregate = False
+
+    def set(self, value: float, **labels) -> None:
+        key = self.label_values(labels)
+
+        with _lock:
+            self.values[key] = value
+
+
+class Histogram(Metric):
+    """Distribution of observed values, by bucket. Buckets are upper bounds."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: tuple = (), buckets: tuple = ()):
+        super().__init__(name, documentation, labels)
+        self.buckets = sorted(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self.label_values(labels)
+        index = bisect.bisect_left(self.buckets, value)
+
+        with _lock:
+            entry = self.values.get(key)
+
+            if not entry:
+                entry = self.values[key] = [[0] * (len(self.buckets) + 1), 0, 0.0]
+
+            entry[0][index] += 1  # Per-bucket count, cumulated at render time
+            entry[1] += 1
+            entry[2] += value
+
+    def merge(self, value, other):
+        """Adds up two values of this histogram, bucket by bucket."""
+        if len(value[0]) != len(other[0]):  # Buckets changed between versions
+            return value
+
+        return [
+            [a + b for a, b in zip(value[0], other[0])],
+            value[1] + other[1],
+            value[2] + other[2],
+        ]
+
+    def render(self, values: dict = None) -> list:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        values = self.values if values is None else values
+
+        for label_values, (buckets, count, total) in sorted(values.items()):
+            cumulated = 0
+
+            for bound, bucket_count in zip(self.buckets + ["+Inf"], buckets):
+                cumulated += bucket_count
+                le = {"le": bound}
+                lines.append(
+                    f"{self.name}_bucket{self.format_labels(label_values, le)} {cumulated}"
+                )
+
+            lines.append(f"{self.name}_count{self.format_labels(label_values)} {count}")
+            lines.append(f"{self.name}_sum{self.format_labels(label_values)} {total}")
+
+        return lines
+
+
+def render() -> str:
+    """Returns every metric of this process in the Prometheus text exposition format."""
+    with _lock:
+        lines = [line for metric in _registry if metric.values for line in metric.render()]
+
+    return "\n".join(lines) + "\n"
+
+
+def export_textfile(name: str, force: bool = False) -> None:
+    """
+    Writes every metric of this process to METRICS_TEXTFILE_PATH/<name>.prom, if set.
+    Runs at most once every TEXTFILE_EXPORT_INTERVAL seconds, unless `force` is True.
+    The file is replaced atomically: readers never see a partial write.
+    """
+    global _last_textfile_export
+
+    path = current_app.config["METRICS_TEXTFILE_PATH"]
+
+    if not path or (
+        not force and time.monotonic() - _last_textfile_export < TEXTFILE_EXPORT_INTERVAL
+    ):
+        return
+
+    _last_textfile_export = time.monotonic()
+    os.makedirs(path, exist_ok=True)
+    filepath = f"{path}{os.sep}{name}.prom"
+
+    with open(f"{filepath}.tmp", "w") as file:
+        file.write(render())
+
+    os.replace(f"{filepath}.tmp", filepath)
+
+
+def export_snapshot(force: bool = False) -> None:
+    """
+    Writes the counters and histograms of this API process to METRICS_API_PATH, if set, as JSON.
+    Runs at most once every SNAPSHOT_EXPORT_INTERVAL seconds, unless `force` is True.
+
+    Each process has its own file, named after its pid (see render_all(), which removes those
+    of processes that are gone). The file is replaced atomically.
+    """
+    global _last_snapshot_export, _snapshot_name
+
+    path = current_app.config["METRICS_API_PATH"]
+
+    if not path or (
+        not force and time.monotonic() - _last_snapshot_export < SNAPSHOT_EXPORT_INTERVAL
+    ):
+        return
+
+    _last_snapshot_export = time.monotonic()
+
+    # Workers forked from the same parent may share a pid with a former worker: name is unique
+    pid = os.getpid()
+
+    if _snapshot_name[0] != pid:
+        _snapshot_name = (pid, f"{pid}-{uuid.uuid4().hex}")
+
+    with _lock:
+        snapshot = {
+            metric.name: [[list(key), value] for key, value in metric.values.items()]
+            for metric in _registry
+            if metric.aggregate and metric.values
+        }
+
+    os.makedirs(path, exist_ok=True)
+    filepath = f"{path}{os.sep}{_snapshot_name[1]}.json"
+
+    with open(f"{filepath}.tmp", "w") as file:
+        json.dump(snapshot, file)
+
+    os.replace(f"{filepath}.tmp", filepath)
+
+
+def render_all() -> str:
+    """
+    Returns metrics of every API process in the Prometheus text exposition format:
+    counters and histograms are added up from the snapshots in METRICS_API_PATH, gauges are those
+    of this process. Same as render() if METRICS_API_PATH is not set.
+
+    This process' snapshot is written first: other processes' snapshots can only be more recent
+    than what a previous scrape read, which keeps totals from going backwards between scrapes.
+
+    Snapshots of processes that are gone (recycled gunicorn workers, previous deploys) are
+    deleted: their counts leave the totals, which Prometheus handles as a counter reset.
+    """
+    path = current_app.config["METRICS_API_PATH"]
+
+    if not path:
+        return render()
+
+    export_snapshot(force=True)
+
+    metrics = {metric.name: metric for metric in _registry}
+    totals = {metric.name: {} for metric in _registry if metric.aggregate}
+
+    for entry in os.scandir(path):
+        pid = entry.name.split("-", 1)[0]
+
+        if not entry.name.endswith(".json") or not pid.isdigit():
+            continue
+
+        if not is_running(int(pid)):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:  # Removed by another process in the meantime
+                pass
+
+            continue
+
+        try:
+            with open(entry.path) as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError):  # Unreadable or removed: skipped for this scrape
+            continue
+
+        for name, values in snapshot.items():
+            if name not in totals:
+                continue
+
+            for key, value in values:
+                key = tuple(key)
+                current = totals[name].get(key)
+                totals[name][key] = (
+                    value if current is None else metrics[name].merge(current, value)
+                )
+
+    lines = []
+
+    with _lock:
+        for metric in _registry:
+            values = totals[metric.name] if metric.aggregate else metric.values
+
+            if values:
+                lines += metric.render(values)
+
+    return "\n".join(lines) + "\n"
+
+
+def is_running(pid: int) -> bool:
+    """Returns True if a process with a given pid is running on this host."""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:  # Running, as another user
+        return True
+
+    return True
+
+
+#
+# API
+#
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+API_REQUEST_DURATION = Histogram(
+    "scoop_api_request_duration_seconds",
+    "Time spent handling API requests.",
+    ("route", "method", "status"),
+    LATENCY_BUCKETS,
+)
+
+API_ACCESS_KEY_CACHE = Counter(
+    "scoop_api_access_key_cache_total",
+    "Access key cache lookups, by result (hit, miss).",
+    ("result",),
+)
+
+API_ARTIFACT_BYTES_SERVED = Counter(
+    "scoop_api_artifact_bytes_served_total",
+    "Bytes of artifacts served by [GET] /artifact, transfers offloaded to the proxy excluded.",
+)
+
+CAPTURES_QUEUE_DEPTH = Gauge(
+    "scoop_captures_queue_depth",
+    "Captures waiting or in progress, by status. Read from the database upon scrape.",
+    ("status",),
+)
+
+#
+# Capture processes
+#
+CAPTURE_CLAIM_DURATION = Histogram(
+    "scoop_capture_claim_duration_seconds",
+    "Time spent claiming a capture from the queue.",
+    (),
+    (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+CAPTURE_SCOOP_DURATION = Histogram(
+    "scoop_capture_scoop_duration_seconds",
+    "Wall time of Scoop subprocesses.",
+    (),
+    (1, 2.5, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180),
+)
+
+CAPTURES_COMPLETED = Counter(
+    "scoop_captures_completed_total",
+    "Captures completed, by status and failure reason "
+    "(exit_code, missing_archive, missing_summary, missing_attachment, storage, timeout, error, "
+    "aborted).",
+    ("status", "reason"),
+)
+
+#
+# Callbacks
+#
+CALLBACK_DELIVERY_DURATION = Histogram(
+    "scoop_callback_delivery_duration_seconds",
+    "Time spent calling callback URLs, by result (delivered, error).",
+    ("result",),
+    LATENCY_BUCKETS,
+)
+
+CALLBACK_DELIVERIES = Counter(
+    "scoop_callback_deliveries_total",
+    "Callback delivery attempts, by outcome (delivered, retry, failed).",
+    ("outcome",),
+)
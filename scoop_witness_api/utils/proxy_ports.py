@@ -0,0 +1,86 @@
+"""
+`utils.proxy_ports` module: Helps capture processes find a port Scoop's proxy can listen on.
+Ports are reserved across capture processes via lock files stored under TEMPORARY_STORAGE_PATH.
+"""
+import os
+import fcntl
+import socket
+
+from flask import current_app
+
+
+def is_port_available(port: int) -> bool:
+    """
+    Returns True if a TCP server could listen on `port` right now, determined by binding it.
+    Connections left in TIME_WAIT by a previous capture do not make a port unavailable.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+        try:
+            sock.bind(("", port))
+        except OSError:
+            return False
+
+    return True
+
+
+class ProxyPortManager:
+    """
+    Reserves a proxy port for the lifetime of a capture process.
+    - `preferred_port` is tried first, other ports from `pool` are used as fallbacks.
+    - Reservations are advisory file locks: they are released by the OS if the process stops.
+    - The reserved port is bind-tested every time it is requested (see get_port()): Scoop must be
+      able to listen on it, and it is not held open in the meantime.
+    """
+
+    def __init__(self, preferred_port: int, pool: list):
+        self.ports = [preferred_port] + [port for port in pool if port != preferred_port]
+        self.port = None
+        self.lock_file = None
+        self.locks_path = f"{current_app.config['TEMPORARY_STORAGE_PATH']}{os.sep}proxy-ports"
+
+        os.makedirs(self.locks_path, exist_ok=True)
+
+    def get_port(self):
+        """
+        Returns the reserved port if it is available, or reserves another one.
+        Returns None if no port from the pool can be used at the moment.
+        """
+        if self.port and is_port_available(self.port):
+            return self.port
+
+        self.release()
+
+        for port in self.ports:
+            if not self.reserve(port):
+                continue
+
+            if is_port_available(port):
+                return port
+
+            self.release()
+
+        return None
+
+    def reserve(self, port: int) -> bool:
+        """Tries to reserve `port` for this process. Returns False if reserved elsewhere."""
+        lock_file = open(f"{self.locks_path}{os.sep}{port}.lock", "a")
+
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+
+        self.port = port
+        self.lock_file = lock_file
+        return True
+
+    def release(self) -> None:
+        """Releases the port currently reserved by this process, if any."""
+        if self.lock_file:
+            self.lock_file.close()  # Closing the file releases the lock
+
+        self.port = None
+        self.lock_file = None
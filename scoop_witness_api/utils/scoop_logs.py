@@ -0,0 +1,71 @@
+"""
+`utils.scoop_logs` module: Streams Scoop's output to compressed log files.
+Full logs are kept in the capture's storage folder, only their tail is stored in the database.
+"""
+import os
+import gzip
+import threading
+from collections import deque
+
+from flask import current_app
+
+
+def get_scoop_logs_path(id_capture, stream: str) -> str:
+    """
+    Returns the path of the compressed log file for a given capture and stream.
+    `stream` is either "stdout" or "stderr".
+    """
+    temporary_storage_path = current_app.config["TEMPORARY_STORAGE_PATH"]
+    return f"{temporary_storage_path}{os.sep}{id_capture}{os.sep}scoop-{stream}.log.gz"
+
+
+def read_scoop_logs(id_capture, stream: str):
+    """
+    Returns the full logs of a given capture and stream as a string.
+    Returns None if the log file does not exist (anymore).
+    """
+    try:
+        with gzip.open(get_scoop_logs_path(id_capture, stream), "rb") as file:
+            return file.read().decode("utf-8", errors="replace")
+    except FileNotFoundError:
+        return None
+
+
+class ScoopLogsWriter(threading.Thread):
+    """
+    Reads a pipe line by line until it closes, and:
+    - Writes every line to a gzip-compressed file
+    - Keeps the last `tail_size` bytes worth of lines in memory (see tail())
+    """
+
+    def __init__(self, pipe, path: str, tail_size: int):
+        super().__init__(daemon=True)
+        self.pipe = pipe
+        self.path = path
+        self.tail_size = tail_size
+        self.tail_lines = deque()
+        self.tail_bytes = 0
+        self.truncated = False
+
+    def run(self) -> None:
+        with gzip.open(self.path, "wb", compresslevel=6) as file:
+            for line in iter(self.pipe.readline, b""):
+                file.write(line)
+
+                self.tail_lines.append(line)
+                self.tail_bytes += len(line)
+
+                while self.tail_bytes > self.tail_size and len(self.tail_lines) > 1:
+                    self.tail_bytes -= len(self.tail_lines.popleft())
+                    self.truncated = True
+
+        self.pipe.close()
+
+    def tail(self) -> str:
+        """Returns the last lines read, as a string. Flags truncation on the first line."""
+        tail = b"".join(self.tail_lines).decode("utf-8", errors="replace")
+
+        if self.truncated:
+            tail = "[...] (truncated, full logs available via inspect-capture)\n" + tail
+
+        return tail
@@ -0,0 +1,327 @@
+"""
+`utils.storage` module: Where artifacts are kept once a capture is complete (see STORAGE_BACKEND).
+- "local": Artifacts stay where Scoop wrote them, under TEMPORARY_STORAGE_PATH, and are served by
+  the API itself (see utils.artifact_storage and views.artifact).
+- "s3": Artifacts are uploaded to an S3-compatible bucket, and [GET] /artifact redirects to
+  short-lived presigned URLs. Any API node can serve any artifact.
+
+The S3 backend signs requests itself (AWS Signature Version 4) and sends them via `requests`.
+Objects are addressed "path-style" (<endpoint>/<bucket>/<key>), which AWS S3, MinIO, Ceph and
+most S3-compatible services support.
+"""
+import hmac
+import hashlib
+import datetime
+from urllib.parse import quote, urlparse
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+import requests
+from flask import current_app
+
+from .artifact_storage import get_artifact_path
+
+
+def get_storage():
+    """Returns the storage backend selected by STORAGE_BACKEND."""
+    if current_app.config["STORAGE_BACKEND"] == "s3":
+        return S3Storage(current_app.config)
+
+    return LocalStorage()
+
+
+class LocalStorage:
+    """
+    Artifacts are kept in TEMPORARY_STORAGE_PATH: nothing to upload, and `cleanup` removes them
+    along with the rest of the capture's folder.
+    """
+
+    local = True
+    """ Are artifacts read from TEMPORARY_STORAGE_PATH? """
+
+    def store_artifacts(self, id_capture, artifacts: list) -> None:
+        pass
+
+    def get_artifact_url(self, id_capture, filename: str):
+        return None
+
+    def delete_artifacts(self, id_capture, filenames: list) -> None:
+        pass
+
+
+class S3Storage:
+    """
+    Artifacts are kept in an S3-compatible bucket, under STORAGE_S3_PREFIX, with the same layout
+    as TEMPORARY_STORAGE_PATH (`<id_capture>/archive.wacz`, `<id_capture>/attachments/...`).
+    """
+
+    local = False
+    """ Are artifacts read from TEMPORARY_STORAGE_PATH? """
+
+    def __init__(self, config):
+        self.endpoint_url = config["STORAGE_S3_ENDPOINT_URL"].rstrip("/")
+        self.host = urlparse(self.endpoint_url).netloc
+        self.region = config["STORAGE_S3_REGION"]
+        self.bucket = config["STORAGE_S3_BUCKET"]
+        self.prefix = config["STORAGE_S3_PREFIX"].strip("/")
+        self.access_key_id = config["STORAGE_S3_ACCESS_KEY_ID"]
+        self.secret_access_key = config["STORAGE_S3_SECRET_ACCESS_KEY"]
+        self.presigned_url_expiration = int(config["STORAGE_S3_PRESIGNED_URL_EXPIRATION"])
+        self.multipart_chunk_size = int(config["STORAGE_S3_MULTIPART_CHUNK_SIZE"])
+        self.upload_concurrency = int(config["STORAGE_S3_UPLOAD_CONCURRENCY"])
+        self.timeout = int(config["STORAGE_S3_TIMEOUT"])
+        self._session = None
+
+    @property
+    def session(self) -> requests.Session:
+        """HTTP session, created on first use: generating presigned URLs does not need one."""
+        if not self._session:
+            self._session = requests.Session()
+
+        return self._session
+
+    def get_key(self, id_capture, filename: str) -> str:
+        """Returns the object key of a given artifact (see models.Artifact.filename)."""
+        if filename != "archive.wacz":
+            filename = f"attachments/{filename}"
+
+        return "/".join([part for part in [self.prefix, str(id_capture), filename] if part])
+
+    #
+    # Artifacts
+    #
+    def store_artifacts(self, id_capture, artifacts: list) -> None:
+        """
+        Uploads artifacts (see models.Artifact.describe_file()) from TEMPORARY_STORAGE_PATH.
+        Files larger than STORAGE_S3_MULTIPART_CHUNK_SIZE (the archive, usually) are uploaded in
+        parts. Up to STORAGE_S3_UPLOAD_CONCURRENCY files or parts are sent at once.
+        Raises if any upload fails.
+        """
+        large_files = []
+        uploads = []
+
+        with ThreadPoolExecutor(max_workers=self.upload_concurrency) as executor:
+            # Small files first, each in a single request ...
+            for artifact in artifacts:
+                path = get_artifact_path(id_capture, artifact["filename"])
+                key = self.get_key(id_capture, artifact["filename"])
+
+                if artifact["size"] > self.multipart_chunk_size:
+                    large_files.append((path, key, artifact))
+                    continue
+
+                uploads.append(
+                    executor.submit(self.put_object, path, key, artifact["content_type"])
+                )
+
+            # ... then large files, in parts, using the same workers.
+            for path, key, artifact in large_files:
+                self.put_object_multipart(
+                    executor, path, key, artifact["content_type"], artifact["size"]
+                )
+
+            for upload in uploads:
+                upload.result()
+
+    def get_artifact_url(self, id_capture, filename: str) -> str:
+        """Returns a presigned URL to a given artifact, valid for STORAGE_S3_PRESIGNED_URL_EXPIRATION."""  # noqa
+        return self.presign("GET", self.get_key(id_capture, filename))
+
+    def delete_artifacts(self, id_capture, filenames: list) -> None:
+        """Deletes a given capture's artifacts from the bucket. Raises on failure."""
+        for filename in filenames:
+            self.request("DELETE", self.get_key(id_capture, filename))
+
+    #
+    # Objects
+    #
+    def put_object(self, path: str, key: str, content_type: str = None) -> None:
+        """Uploads a file in a single request."""
+        with open(path, "rb") as file:
+            data = file.read()
+
+        headers = {"Content-Type": content_type} if content_type else {}
+        self.request("PUT", key, data=data, headers=headers)
+
+    def put_object_multipart(
+        self, executor, path: str, key: str, content_type: str, size: int
+    ) -> None:
+        """
+        Uploads a file in parts of STORAGE_S3_MULTIPART_CHUNK_SIZE bytes, using `executor`.
+        The upload is aborted if any part fails: no incomplete parts are left in the bucket.
+        """
+        headers = {"Content-Type": content_type} if content_type else {}
+        response = self.request("POST", key, {"uploads": ""}, headers=headers)
+        upload_id = ElementTree.fromstring(response.content).findtext("{*}UploadId")
+
+        try:
+            parts = [
+                executor.submit(
+                    self.put_object_part,
+                    path,
+                    key,
+                    upload_id,
+                    part_number,
+                    offset,
+                )
+                for part_number, offset in enumerate(
+                    range(0, size, self.multipart_chunk_size), start=1
+                )
+            ]
+
+            etags = [part.result() for part in parts]
+
+            body = "".join(
+                f"<Part><PartNumber>{part_number}</PartNumber><ETag>{etag}</ETag></Part>"
+                for part_number, etag in enumerate(etags, start=1)
+            )
+            body = f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode()
+
+            response = self.request("POST", key, {"uploadId": upload_id}, data=body)
+
+            # Completion can fail after HTTP 200 was sent: errors are then reported in the body
+            if ElementTree.fromstring(response.content).tag.endswith("Error"):
+                raise Exception(f"Multipart upload of {key} failed: {response.text}")
+        except Exception:
+            try:
+                self.request("DELETE", key, {"uploadId": upload_id})
+            except Exception:
+                pass
+
+            raise
+
+    def put_object_part(
+        self, path: str, key: str, upload_id: str, part_number: int, offset: int
+    ) -> str:
+        """Uploads part of a file as part of a multipart upload. Returns the part's ETag."""
+        with open(path, "rb") as file:
+            file.seek(offset)
+            data = file.read(self.multipart_chunk_size)
+
+        response = self.request(
+            "PUT",
+            key,
+            {"partNumber": part_number, "uploadId": upload_id},
+            data=data,
+        )
+
+        return response.headers["ETag"]
+
+    #
+    # Requests signing (AWS Signature Version 4)
+    #
+    def request(
+        self, method: str, key: str, params: dict = None, data: bytes = b"", headers: dict = None
+    ) -> requests.Response:
+        """Sends a signed request for a given object. Raises if the request was not successful."""
+        timestamp = datetime.datetime.now(datetime.timezone.utc)
+        payload_hash = hashlib.sha256(data).hexdigest()
+        path = self.get_path(key)
+        query = self.get_query_string(params if params else {})
+
+        headers = {
+            **(headers if headers else {}),
+            "Host": self.host,
+            "X-Amz-Date": timestamp.strftime("%Y%m%dT%H%M%SZ"),
+            "X-Amz-Content-SHA256": payload_hash,
+        }
+
+        signed_headers, signature = self.sign(method, path, query, headers, payload_hash, timestamp)
+
+        headers["Authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key_id}/{self.get_scope(timestamp)}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+
+        response = self.session.request(
+            method,
+            f"{self.endpoint_url}{path}{'?' if query else ''}{query}",
+            data=data,
+            headers=headers,
+            timeout=self.timeout,
+        )
+        response.raise_for_status()
+
+        return response
+
+    def presign(self, method: str, key: str, timestamp: datetime.datetime = None) -> str:
+        """Returns a URL for a given object, signed for STORAGE_S3_PRESIGNED_URL_EXPIRATION."""
+        if not timestamp:
+            timestamp = datetime.datetime.now(datetime.timezone.utc)
+
+        path = self.get_path(key)
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key_id}/{self.get_scope(timestamp)}",
+            "X-Amz-Date": timestamp.strftime("%Y%m%dT%H%M%SZ"),
+            "X-Amz-Expires": self.presigned_url_expiration,
+            "X-Amz-SignedHeaders": "host",
+        }
+        query = self.get_query_string(params)
+
+        signed_headers, signature = self.sign(
+            method, path, query, {"Host": self.host}, "UNSIGNED-PAYLOAD", timestamp
+        )
+
+        return f"{self.endpoint_url}{path}?{query}&X-Amz-Signature={signature}"
+
+    def sign(
+        self,
+        method: str,
+        path: str,
+        query: str,
+        headers: dict,
+        payload_hash: str,
+        timestamp: datetime.datetime,
+    ) -> tuple:
+        """
+        Signs a request, as described by its encoded path and query string.
+        Every header in `headers` is signed.
+        Returns a (signed_headers, signature) tuple.
+        """
+        headers = {name.lower(): str(value).strip() for name, value in headers.items()}
+        signed_headers = ";".join(sorted(headers.keys()))
+
+        canonical_request = "\n".join(
+            [
+                method,
+                path,
+                query,
+                "".join(f"{name}:{headers[name]}\n" for name in sorted(headers.keys())),
+                signed_headers,
+                payload_hash,
+            ]
+        )
+
+        string_to_sign = "\n".join(
+            [
+                "AWS4-HMAC-SHA256",
+                timestamp.strftime("%Y%m%dT%H%M%SZ"),
+                self.get_scope(timestamp),
+                hashlib.sha256(canonical_request.encode()).hexdigest(),
+            ]
+        )
+
+        signing_key = f"AWS4{self.secret_access_key}".encode()
+
+        for value in self.get_scope(timestamp).split("/"):
+            signing_key = hmac.new(signing_key, value.encode(), hashlib.sha256).digest()
+
+        signature = hmac.new(signing_key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+        return (signed_headers, signature)
+
+    def get_scope(self, timestamp: datetime.datetime) -> str:
+        """Returns the credential scope of requests signed at a given time."""
+        return f"{timestamp.strftime('%Y%m%d')}/{self.region}/s3/aws4_request"
+
+    def get_path(self, key: str) -> str:
+        """Returns the encoded path of a given object."""
+        return f"/{quote(self.bucket)}/{quote(key)}"
+
+    def get_query_string(self, params: dict) -> str:
+        """Returns a canonical query string: keys in order, everything but unreserved encoded."""
+        return "&".join(
+            f"{quote(str(name), safe='')}={quote(str(value), safe='')}"
+            for name, value in sorted(params.items())
+        )
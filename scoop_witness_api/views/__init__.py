@@ -3,4 +3,6 @@
 """
 from .ping import ping_get
 from .capture import capture_get, capture_post
+from .captures import captures_batch_post, captures_status_post
 from .artifact import artifact_get
+from .metrics import metrics_get
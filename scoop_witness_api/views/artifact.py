@@ -4,9 +4,16 @@
 import re
 import os
 import uuid
+import datetime
+import secrets
+import mimetypes
 from pathlib import Path
 
-from flask import jsonify, make_response, send_file, current_app
+from flask import jsonify, make_response, send_file, redirect, current_app, request, Response
+
+from ..utils import metrics
+from ..utils import artifact_cache_get, artifact_cache_set, artifact_cache_delete
+from ..utils import get_artifact_path, get_storage
 
 
 @current_app.route("/artifact/<id_capture>/<filename>")
@@ -16,46 +23,281 @@ def artifact_get(id_capture, filename):
     Retrieves a specific artifact from a given capture.
     `id_capture` and `filename` params must be provided.
 
+    Artifacts are immutable:
+    - Their ETag is the SHA-256 of their contents, as stored in the database (see models.Artifact)
+    - They can be cached for ARTIFACTS_MAX_AGE seconds
+    - Lookups are cached in memory (see utils.artifact_cache). Once a capture has expired,
+      cached lookups are re-checked: its files may have been deleted (see `cleanup`).
+
+    Supports conditional requests, single and multiple byte ranges (the full file is returned
+    for more than ARTIFACTS_MAX_RANGES).
+    Can hand file transfers over to the reverse proxy (see ARTIFACTS_OFFLOAD).
+    Redirects to the object itself if artifacts are not stored locally (see STORAGE_BACKEND):
+    the bucket must then allow cross-origin range requests (see README).
+
     Not behind auth.
     """
-    full_path = None
     id_capture = str(id_capture)
     filename = str(filename)
 
-    # Is id_capture an uuid?
-    try:
-        uuid.UUID(id_capture, version=4)  # noqa
-    except ValueError:
-        return jsonify({"error": "Invalid format for id_capture."}), 400
+    # Repeated requests for a given file skip validation and lookup entirely
+    artifact = artifact_cache_get(id_capture, filename)
 
-    # Is `filename` valid?
-    # Can only be:
-    # - "archive.wacz"
-    # - "*.(pem|png|pdf|html|mp4|vtt)" (will be loaded from /attachments/ in that case)
-    attachments_pattern = r"^[\w._-]+\.(pem|png|pdf|html|mp4|vtt)$"
+    # Capture expired since it was cached: it may have been purged, look it up again
+    if (
+        artifact
+        and artifact["expires_timestamp"]
+        and artifact["expires_timestamp"] <= datetime.datetime.utcnow()
+    ):
+        artifact_cache_delete(id_capture, filename)
+        artifact = None
 
-    if filename != "archive.wacz" and not re.match(attachments_pattern, filename):
-        return jsonify({"error": "Invalid filename provided."}), 400
+    if not artifact:
+        # Is id_capture an uuid?
+        try:
+            uuid.UUID(id_capture, version=4)  # noqa
+        except ValueError:
+            return jsonify({"error": "Invalid format for id_capture."}), 400
 
-    if re.match(attachments_pattern, filename):  # Prefix "attachments/" to the filename if needed
-        filename = f"attachments{os.sep}{filename}"
+        # Is `filename` valid?
+        # Can only be:
+        # - "archive.wacz"
+        # - "*.(pem|png|pdf|html|mp4|vtt)" (will be loaded from /attachments/ in that case)
+        attachments_pattern = r"^[\w._-]+\.(pem|png|pdf|html|mp4|vtt)$"
 
-    # Can the file be found?
-    temporary_storage_path = current_app.config["TEMPORARY_STORAGE_PATH"]
-    full_path = f"{temporary_storage_path}{os.sep}{id_capture}{os.sep}{filename}"
-    full_path = Path(full_path).resolve()
+        if filename != "archive.wacz" and not re.match(attachments_pattern, filename):
+            return jsonify({"error": "Invalid filename provided."}), 400
 
-    if not os.path.isfile(full_path):
-        return jsonify({"error": "Requested file was not found."}), 404
+        artifact = find_artifact(id_capture, filename)
+
+        if not artifact:
+            return jsonify({"error": "Requested file was not found."}), 404
+
+        artifact_cache_set(id_capture, filename, artifact)
 
     # Return file from storage
-    response = make_response(send_file(full_path))
+    try:
+        response = serve_artifact(artifact)
+    except FileNotFoundError:  # Removed from storage since it was looked up (see `cleanup`)
+        artifact_cache_delete(id_capture, filename)
+        return jsonify({"error": "Requested file was not found."}), 404
+
     response.headers["Access-Control-Allow-Origin"] = "*"
     response.headers["Access-Control-Allow-Headers"] = "*"
     response.headers["Access-Control-Allow-Methods"] = "*"
 
     response.headers[
         "Access-Control-Expose-Headers"
-    ] = "Content-Range, Content-Encoding, Content-Length"
+    ] = "Content-Range, Content-Encoding, Content-Length, ETag"
+
+    metrics.API_ARTIFACT_BYTES_SERVED.inc(response.content_length or 0)
+
+    return response
+
+
+def find_artifact(id_capture: str, filename: str):
+    """
+    Returns a description of a given artifact as a dict (id_capture, filename, path, sha256,
+    content_type, expires_timestamp), or None if the file cannot be found in storage.
+    `id_capture` and `filename` must have been validated.
+    sha256, content_type and expires_timestamp are None for files missing from the artifacts
+    manifest, or whose capture was purged (see `cleanup`).
+    """
+    from ..models import Capture, Artifact
+
+    storage = get_storage()
+
+    # Can the file be found? (Remote storage: the artifacts manifest is the source of truth)
+    full_path = Path(get_artifact_path(id_capture, filename)).resolve()
+
+    if storage.local and not os.path.isfile(full_path):
+        return None
+
+    manifest_entry = (
+        Artifact.select(Artifact.sha256, Artifact.content_type, Capture.expires_timestamp)
+        .join(Capture)
+        .where(
+            Artifact.id_capture == id_capture,
+            Artifact.filename == filename,
+            Capture.purged == False,  # noqa: E712
+        )
+        .dicts()
+        .first()
+    )
+
+    if not storage.local and not manifest_entry:
+        return None
+
+    return {
+        "id_capture": id_capture,
+        "filename": filename,
+        "path": str(full_path),
+        "sha256": manifest_entry["sha256"] if manifest_entry else None,
+        "content_type": manifest_entry["content_type"] if manifest_entry else None,
+        "expires_timestamp": manifest_entry["expires_timestamp"] if manifest_entry else None,
+    }
+
+
+def serve_artifact(artifact: dict) -> Response:
+    """
+    Returns a response for a given artifact (see find_artifact()), honoring conditional and range
+    request headers. Does not touch storage if the client's copy is up-to-date.
+    """
+    max_age = int(current_app.config["ARTIFACTS_MAX_AGE"])
+    etag = artifact["sha256"]
+    storage = get_storage()
+
+    # Fast path: the client already has this exact file
+    if etag and request.if_none_match.contains_weak(etag):
+        response = make_response("", 304)
+        response.set_etag(etag)
+    # Remote storage: redirect to a short-lived URL to the object itself
+    elif not storage.local:
+        response = redirect(
+            storage.get_artifact_url(artifact["id_capture"], artifact["filename"]), 302
+        )
+        response.cache_control.private = True
+        response.cache_control.max_age = (
+            int(current_app.config["STORAGE_S3_PRESIGNED_URL_EXPIRATION"]) // 2
+        )
+    # Offload: the reverse proxy reads the file and handles ranges
+    elif current_app.config["ARTIFACTS_OFFLOAD"]:
+        response = offload_artifact(artifact)
+    # Multiple ranges: not supported by send_file()
+    elif (
+        request.range
+        and len(request.range.ranges) > 1
+        and (not request.if_range.etag or request.if_range.etag == etag)
+        and not request.if_range.date
+    ):
+        response = send_byte_ranges(artifact, request.range.ranges)
+
+        # Too many ranges: the Range header is ignored, and the full file is returned
+        if response is None:
+            response = send_file(
+                artifact["path"],
+                mimetype=artifact["content_type"],
+                etag=etag if etag else True,
+                max_age=max_age,
+                conditional=False,
+            )
+            response.accept_ranges = "bytes"
+    # Everything else: full file, single range, If-Modified-Since ...
+    else:
+        response = send_file(
+            artifact["path"],
+            mimetype=artifact["content_type"],
+            etag=etag if etag else True,
+            max_age=max_age,
+            conditional=True,
+        )
+
+    if response.status_code in [200, 206, 304]:
+        response.cache_control.public = True
+        response.cache_control.max_age = max_age
+        response.cache_control.immutable = True
+
+    return response
+
+
+def offload_artifact(artifact: dict) -> Response:
+    """
+    Returns an empty response instructing the reverse proxy to serve a given artifact itself:
+    - "x-accel-redirect" (nginx): path under ARTIFACTS_OFFLOAD_PREFIX, an internal location
+      mapped to TEMPORARY_STORAGE_PATH. nginx drops CORS headers and the ETag of this response:
+      the internal location must set them itself (see README).
+    - "x-sendfile" (Apache, lighttpd ...): absolute path of the file.
+    """
+    ARTIFACTS_OFFLOAD = current_app.config["ARTIFACTS_OFFLOAD"]
+    content_type = artifact["content_type"] or mimetypes.guess_type(artifact["path"])[0]
+
+    response = make_response("", 200)
+    response.headers["Content-Type"] = content_type or "application/octet-stream"
+
+    if ARTIFACTS_OFFLOAD == "x-accel-redirect":
+        storage_path = Path(current_app.config["TEMPORARY_STORAGE_PATH"]).resolve()
+        relative_path = Path(artifact["path"]).relative_to(storage_path).as_posix()
+        prefix = current_app.config["ARTIFACTS_OFFLOAD_PREFIX"].rstrip("/")
+        response.headers["X-Accel-Redirect"] = f"{prefix}/{relative_path}"
+    else:
+        response.headers["X-Sendfile"] = artifact["path"]
+
+    if artifact["sha256"]:
+        response.set_etag(artifact["sha256"])
+
+    return response
+
+
+def send_byte_ranges(artifact: dict, ranges: list):
+    """
+    Returns a multipart/byteranges response for a list of (start, stop) byte ranges, as parsed
+    by werkzeug. Unsatisfiable ranges are skipped. Parts are streamed from disk.
+    Returns HTTP 416 if no range can be satisfied.
+    Returns None if more than ARTIFACTS_MAX_RANGES ranges can: the Range header should then be
+    ignored, as allowed by RFC 9110.
+    """
+    length = os.path.getsize(artifact["path"])
+    content_type = artifact["content_type"] or "application/octet-stream"
+    boundary = secrets.token_hex(16)
+    parts = []
+
+    for start, stop in ranges:
+        if start < 0:  # Suffix range ("bytes=-500"): last X bytes
+            start, stop = max(length + start, 0), length
+        elif stop is None or stop > length:
+            stop = length
+
+        if start >= stop:
+            continue
+
+        delimiter = f"\r\n--{boundary}\r\n" if parts else f"--{boundary}\r\n"
+        header = (
+            f"{delimiter}"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Range: bytes {start}-{stop - 1}/{length}\r\n\r\n"
+        ).encode("ascii")
+
+        parts.append((header, start, stop))
+
+    if not parts:
+        response = make_response("", 416)
+        response.headers["Content-Range"] = f"bytes */{length}"
+        return response
+
+    if len(parts) > int(current_app.config["ARTIFACTS_MAX_RANGES"]):
+        return None
+
+    closing = f"\r\n--{boundary}--\r\n".encode("ascii")
+
+    def generate():
+        with open(artifact["path"], "rb") as file:
+            for header, start, stop in parts:
+                yield header
+                file.seek(start)
+                remaining = stop - start
+
+                while remaining > 0:
+                    chunk = file.read(min(remaining, 64 * 1024))
+
+                    if not chunk:
+                        break
+
+                    remaining -= len(chunk)
+                    yield chunk
+
+            yield closing
+
+    response = Response(
+        generate(),
+        206,
+        mimetype=f"multipart/byteranges; boundary={boundary}",
+        direct_passthrough=True,
+    )
+    response.headers["Content-Length"] = str(
+        sum(len(header) + stop - start for header, start, stop in parts) + len(closing)
+    )
+
+    if artifact["sha256"]:
+        response.set_etag(artifact["sha256"])
 
     return response
@@ -9,6 +9,8 @@ import validators
 from ..utils import access_check
 from ..models import Capture
 from ..utils import capture_to_dict
+from ..utils import wake_capture_process
+from ..utils import get_db
 
 
 @current_app.route("/capture", methods=["POST"])
@@ -33,32 +35,15 @@ def capture_post():
     MAX_PENDING_CAPTURES = current_app.config["MAX_PENDING_CAPTURES"]
 
     #
-    # Check if there is remaining capacity
+    # Validate input
     #
-    pending_captures_count = Capture.select().where(Capture.status == "pending").count()
+    error = validate_capture_input(input)
 
-    if pending_captures_count >= MAX_PENDING_CAPTURES:
-        return jsonify({"error": "Capture server is over capacity."}), 429
-
-    #
-    # Required input: url
-    #
-    if "url" not in input:
-        return jsonify({"error": "No URL provided."}), 400
-
-    if validators.url(input["url"]) is not True:
-        return jsonify({"error": "Provided URL is not valid."}), 400
+    if error:
+        return jsonify({"error": error}), 400
 
     url = input["url"]
-
-    #
-    # Optional input: callback url
-    #
-    if "callback_url" in input:
-        if validators.url(input["callback_url"]) is not True:
-            return jsonify({"error": "Provided callback URL is not valid."}), 400
-
-        callback_url = input["callback_url"]
+    callback_url = input.get("callback_url")
 
     #
     # Create capture request
@@ -71,12 +56,22 @@ def capture_post():
 
     capture.id_access_key = g.access_key.id_access_key
 
+    #
+    # Check if there is remaining capacity, and save.
+    # Both happen in the same IMMEDIATE transaction: concurrent requests cannot overshoot the limit.
+    #
     try:
-        capture.save(force_insert=True)
+        with get_db().atomic(lock_type="IMMEDIATE"):
+            if Capture.count_pending() >= MAX_PENDING_CAPTURES:
+                return jsonify({"error": "Capture server is over capacity."}), 429
+
+            capture.save(force_insert=True)
     except Exception as err:
         current_app.logger.error(err)
         return jsonify({"error": "Could not create capture request."}), 500
 
+    wake_capture_process()
+
     #
     # Return info
     #
@@ -102,14 +97,46 @@ def capture_get(id_capture):
     except ValueError:
         return jsonify({"error": "Invalid format for id_capture."}), 400
 
-    # Get capture object from database
-    try:
-        capture = Capture.get_by_id(id_capture)
-    except Capture.DoesNotExist:
-        return jsonify({"error": "No match for given id_capture."}), 404
+    # Get capture object from database, if owned by the currently logged-in user
+    capture = Capture.get_or_none(
+        Capture.id_capture == id_capture,
+        Capture.id_access_key == g.access_key.id_access_key,
+    )
 
-    # Is the currently logged-in user the owner of this capture?
-    if capture.id_access_key.id_access_key != g.access_key.id_access_key:
-        return jsonify({"error": "Access to this capture was denied."}), 403
+    # If not: does this capture exist at all?
+    if not capture:
+        if Capture.select().where(Capture.id_capture == id_capture).exists():
+            return jsonify({"error": "Access to this capture was denied."}), 403
+        else:
+            return jsonify({"error": "No match for given id_capture."}), 404
 
     return jsonify(capture_to_dict(capture)), 200
+
+
+def validate_capture_input(input) -> str:
+    """
+    Validates a capture request, as accepted by [POST] /capture:
+    - "url": Url to capture (required)
+    - "callback_url": POST URL to be called upon completion (optional)
+
+    Returns an error message, or an empty string if input is valid.
+    """
+    if not isinstance(input, dict):
+        return "Invalid capture request."
+
+    #
+    # Required input: url
+    #
+    if "url" not in input:
+        return "No URL provided."
+
+    if validators.url(input["url"]) is not True:
+        return "Provided URL is not valid."
+
+    #
+    # Optional input: callback url
+    #
+    if "callback_url" in input and validators.url(input["callback_url"]) is not True:
+        return "Provided callback URL is not valid."
+
+    return ""
@@ -0,0 +1,157 @@
+"""
+`views.captures` module: /captures routes (operations on multiple captures).
+"""
+import uuid
+import datetime
+
+from flask import request, jsonify, g, current_app
+from peewee import chunked
+
+from ..utils import access_check
+from ..models import Capture
+from ..utils import captures_to_dict
+from ..utils import wake_capture_process
+from ..utils import get_db
+from .capture import validate_capture_input
+
+
+@current_app.route("/captures/batch", methods=["POST"])
+@access_check
+def captures_batch_post():
+    """
+    [POST] /captures/batch
+    Creates multiple capture requests at once.
+
+    Behind auth: Requires Access-Key header (see utils.access_check).
+
+    Accepts a JSON array of objects with the following properties:
+    - "url": Url to capture (required)
+    - "callback_url": POST URL to be called upon completion (optional)
+
+    Returns HTTP 200 and a JSON array containing, for each entry and in the same order, either
+    user-facing capture information or an "error" property if that entry is invalid.
+    Returns HTTP 400 if the body is not an array, or has more than MAX_CAPTURES_PER_BATCH entries.
+    Returns HTTP 429 if MAX_PENDING_CAPTURES would be exceeded by the valid entries.
+    """
+    input = request.get_json(silent=True)
+    results = []
+    captures = []
+    MAX_PENDING_CAPTURES = current_app.config["MAX_PENDING_CAPTURES"]
+    MAX_CAPTURES_PER_BATCH = current_app.config["MAX_CAPTURES_PER_BATCH"]
+
+    if not isinstance(input, list) or not input:
+        return jsonify({"error": "Body must be a non-empty array of capture requests."}), 400
+
+    if len(input) > MAX_CAPTURES_PER_BATCH:
+        return jsonify({"error": f"Batch exceeds {MAX_CAPTURES_PER_BATCH} entries."}), 400
+
+    #
+    # Validate input and prepare capture requests
+    #
+    created_timestamp = datetime.datetime.utcnow()
+
+    for entry in input:
+        error = validate_capture_input(entry)
+
+        if error:
+            results.append({"error": error})
+            continue
+
+        capture = Capture(
+            id_capture=uuid.uuid4(),
+            id_access_key=g.access_key.id_access_key,
+            created_timestamp=created_timestamp,
+            url=entry["url"],
+            callback_url=entry.get("callback_url"),
+        )
+
+        captures.append(capture)
+        results.append(capture)
+
+    #
+    # Check if there is remaining capacity for the whole batch, and save.
+    # Both happen in the same IMMEDIATE transaction: concurrent requests cannot overshoot the limit.
+    #
+    try:
+        with get_db().atomic(lock_type="IMMEDIATE"):
+            if Capture.count_pending() + len(captures) > MAX_PENDING_CAPTURES:
+                return jsonify({"error": "Capture server is over capacity."}), 429
+
+            for batch in chunked([capture.__data__ for capture in captures], 100):
+                Capture.insert_many(batch).execute()
+    except Exception as err:
+        current_app.logger.error(err)
+        return jsonify({"error": "Could not create capture requests."}), 500
+
+    if captures:
+        wake_capture_process(len(captures))
+
+    #
+    # Return info
+    #
+    captures_dicts = iter(captures_to_dict(captures))
+    results = [
+        next(captures_dicts) if isinstance(result, Capture) else result for result in results
+    ]
+
+    return jsonify(results), 200
+
+
+@current_app.route("/captures/status", methods=["POST"])
+@access_check
+def captures_status_post():
+    """
+    [POST] /captures/status
+    Returns information about multiple captures at once, in a single database query.
+
+    Behind auth: Requires Access-Key header (see utils.access_check).
+
+    Accepts a JSON array of `id_capture`.
+    Will only return information about captures associated with the access key that was provided.
+
+    Returns HTTP 200 and a JSON array containing, for each `id_capture` and in the same order,
+    either user-facing capture information or an "error" property if it could not be retrieved.
+    Returns HTTP 400 if the body is not an array, or has more than MAX_CAPTURES_PER_BATCH entries.
+    """
+    input = request.get_json(silent=True)
+    id_captures = []
+    captures = {}
+    results = []
+    MAX_CAPTURES_PER_BATCH = current_app.config["MAX_CAPTURES_PER_BATCH"]
+
+    if not isinstance(input, list) or not input:
+        return jsonify({"error": "Body must be a non-empty array of id_capture."}), 400
+
+    if len(input) > MAX_CAPTURES_PER_BATCH:
+        return jsonify({"error": f"Batch exceeds {MAX_CAPTURES_PER_BATCH} entries."}), 400
+
+    # Normalize id_capture entries. None stands for an invalid format.
+    for id_capture in input:
+        try:
+            uuid.UUID(str(id_capture), version=4)  # noqa
+            id_captures.append(str(uuid.UUID(str(id_capture))))
+        except ValueError:
+            id_captures.append(None)
+
+    # Pull all matching captures owned by the current access key at once
+    if any(id_captures):
+        query = Capture.select().where(
+            Capture.id_capture.in_([id_capture for id_capture in id_captures if id_capture]),
+            Capture.id_access_key == g.access_key.id_access_key,
+        )
+
+        captures = {str(capture.id_capture): capture for capture in query}
+
+    captures_dicts = dict(zip(captures.keys(), captures_to_dict(list(captures.values()))))
+
+    for index, id_capture in enumerate(id_captures):
+        if not id_capture:
+            error = "Invalid format for id_capture."
+            results.append({"id_capture": input[index], "error": error})
+        elif id_capture not in captures_dicts:
+            error = "No match for given id_capture."
+            results.append({"id_capture": input[index], "error": error})
+        else:
+            results.append(captures_dicts[id_capture])
+
+    return jsonify(results), 200
@@ -0,0 +1,34 @@
+"""
+`views.metrics` module: Exposes metrics in the Prometheus text exposition format.
+"""
+from flask import current_app, make_response
+
+from ..utils import metrics
+
+
+@current_app.route("/metrics")
+def metrics_get():
+    """
+    [GET] /metrics
+    Returns metrics of every API process, added up from METRICS_API_PATH (see
+    utils.metrics.render_all()), as well as the current depth of the capture queue.
+    Metrics of CLI workers are written to METRICS_TEXTFILE_PATH instead.
+
+    Not behind auth. Returns HTTP 404 unless EXPOSE_METRICS is True.
+    """
+    from ..models import Capture
+
+    if not current_app.config["EXPOSE_METRICS"]:
+        return "", 404
+
+    # Queue depth is read at scrape time: pending captures are counted by a trigger, and "started"
+    # is an indexed lookup over a handful of rows.
+    metrics.CAPTURES_QUEUE_DEPTH.set(Capture.count_pending(), status="pending")
+    metrics.CAPTURES_QUEUE_DEPTH.set(
+        Capture.select().where(Capture.status == "started").count(),
+        status="started",
+    )
+
+    response = make_response(metrics.render_all(), 200)
+    response.headers["Content-Type"] = "text/plain; version=0.0.4; charset=utf-8"
+    return response